@@ -12,7 +12,18 @@ def create_app():
 
     app.config.from_object('app.config.Config')
 
-    from . import routes, api
+    from .json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    from db import db_session
+    db_session.init_app(app)
+
+    from . import cache, assets
+    cache.init_app(app)
+    assets.init_app(app)
+
+    from . import routes, api, images
     app.register_blueprint(routes.bp)
     app.register_blueprint(api.api_bp)
+    app.register_blueprint(images.images_bp)
     return app
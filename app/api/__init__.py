@@ -2,8 +2,16 @@ from flask import Blueprint
 
 from .places import places_api_bp
 from .events import events_api_bp
+from .streaming import export_api_bp
+from app.cache import cache_api_bp
+from app.compression import compress_response
 
 api_bp = Blueprint('api', __name__)
 
 api_bp.register_blueprint(places_api_bp)
 api_bp.register_blueprint(events_api_bp)
+api_bp.register_blueprint(export_api_bp)
+api_bp.register_blueprint(cache_api_bp)
+
+# Compression of every API response (see app/compression.py)
+api_bp.after_request(compress_response)
@@ -0,0 +1,128 @@
+import json
+
+from sqlalchemy import delete, insert, select, update
+
+from db import derivatives
+
+# --- Bulk creation, update and deletion of places and events ---
+#
+# The body is a JSON array of objects or NDJSON (one object per line, Content-Type
+# application/x-ndjson). Every item is validated first, with the referenced ids checked
+# in one query per column. The valid rows are then written in one transaction by a single
+# statement: executemany INSERT ... RETURNING id or UPDATE by primary key, DELETE ... IN.
+# The ORM doesn't see Core statements, so the values its listeners would derive
+# (search_key, image_digest, ...) are filled in by the caller. The SQL triggers (FTS,
+# R*Tree, closure tables, write counters) fire as usual.
+#
+# Updates are partial like PUT of a single item: {"id": 5, "name": "..."} changes only the
+# name. Deletes take the ids, as [5, 6] or [{"id": 5}, {"id": 6}].
+#
+# The response has one result per item, in request order:
+# {"index": 0, "status": 201, "id": 17} or {"index": 1, "status": 400, "message": "..."}.
+# With atomic=true nothing is written if any item is invalid, the valid ones get status 424.
+
+MAX_ITEMS = 5000
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-seq')
+
+
+def parse_items(request) -> list:
+    """The posted items; raises ValueError with a message for the client."""
+    if request.mimetype in NDJSON_MIMETYPES:
+        items = []
+        for number, line in enumerate(request.get_data(as_text=True).splitlines(), start=1):
+            line = line.strip().lstrip('\x1e')
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError:
+                raise ValueError(f"Line {number} is not valid JSON.")
+    else:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array of objects or NDJSON (application/x-ndjson).")
+
+    if len(items) > MAX_ITEMS:
+        raise ValueError(f"At most {MAX_ITEMS} items per request.")
+    return items
+
+
+def existing_ids(db_sess, column, ids) -> set:
+    """Which of the ids exist, one query."""
+    ids = {i for i in ids if isinstance(i, int) and not isinstance(i, bool)}
+    if not ids:
+        return set()
+    return set(db_sess.execute(select(column).where(column.in_(ids))).scalars())
+
+
+def item_id(item):
+    """The id of an update or delete item ({"id": 5} or a bare 5), None if it has none."""
+    value = item.get('id') if isinstance(item, dict) else item
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def current_rows(db_sess, columns: list, ids) -> dict:
+    """id -> row of the given columns (the first one being the primary key) for the ids that exist, one query."""
+    ids = set(ids)
+    if not ids:
+        return {}
+    return {row[0]: row for row in db_sess.execute(select(*columns).where(columns[0].in_(ids)))}
+
+
+def fill_image_columns(rows: list, current: dict = None):
+    """
+    Adds image_digest / image_width to the row dicts: read once per new image_url,
+    kept from the current row (id -> row, for updates) where image_url didn't change.
+    """
+    read = {}
+    for row in rows:
+        old = current[row['id']] if current is not None else None
+        if old is not None and row['image_url'] == old.image_url:
+            row.update(image_digest=old.image_digest, image_width=old.image_width)
+            continue
+        if row['image_url'] not in read:
+            read[row['image_url']] = derivatives.image_columns(row['image_url'])
+        row.update(read[row['image_url']])
+
+
+def insert_rows(db_sess, model, rows: list) -> list:
+    """executemany INSERT of the row dicts, the new ids in the rows' order."""
+    if not rows:
+        return []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(db_sess.execute(statement, rows).scalars())
+
+
+def update_rows(db_sess, model, rows: list) -> list:
+    """executemany UPDATE by primary key of the row dicts ('id' and the new values), their ids."""
+    if not rows:
+        return []
+    db_sess.execute(update(model), rows)
+    return [row['id'] for row in rows]
+
+
+def delete_rows(db_sess, model, ids: list) -> list:
+    """One DELETE of the ids, the ids."""
+    if not ids:
+        return []
+    db_sess.execute(delete(model).where(model.id.in_(ids)), execution_options={"synchronize_session": False})
+    return list(ids)
+
+
+def results(items: list, errors: dict, ids, status: int = 201, action: str = "created") -> dict:
+    """
+    errors: index -> message of rejected items (status 400) or (status, message);
+    ids: ids of the accepted ones, in order, None if nothing was written because
+    of the rejected ones (atomic=true). status / action: what happened to the accepted ones.
+    """
+    accepted_ids = iter(ids or ())
+    item_results = []
+    for index in range(len(items)):
+        if index in errors:
+            error_status, message = errors[index] if isinstance(errors[index], tuple) else (400, errors[index])
+            item_results.append({"index": index, "status": error_status, "message": message})
+        elif ids is None:
+            item_results.append({"index": index, "status": 424, "message": f"Not {action}, other items are invalid."})
+        else:
+            item_results.append({"index": index, "status": status, "id": next(accepted_ids)})
+    return {action: len(ids or ()), "failed": len(errors), "results": item_results}
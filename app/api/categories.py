@@ -0,0 +1,31 @@
+from sqlalchemy import select
+
+# Helpers shared by the place and event category endpoints.
+# The category models come in pairs: the adjacency list (parent_id) and its closure table.
+
+
+def subtree_ids(category_model, closure_model, names: list):
+    """Ids of the named categories and all of their subcategories, for an IN filter."""
+    return (
+        select(closure_model.descendant_id)
+        .join(category_model, category_model.id == closure_model.ancestor_id)
+        .where(category_model.name.in_(names))
+    )
+
+
+def is_in_subtree(db_sess, closure_model, root_id: int, category_id: int) -> bool:
+    return db_sess.query(closure_model).filter_by(ancestor_id=root_id, descendant_id=category_id).first() is not None
+
+
+def build_tree(categories: list) -> list:
+    """Nest flat categories (already loaded with one query) as [{id, name, children: [...]}, ...]."""
+    nodes = {category.id: {"id": category.id, "name": category.name, "children": []} for category in categories}
+    roots = []
+    for category in categories:
+        node = nodes[category.id]
+        parent = nodes.get(category.parent_id)
+        if parent is not None:
+            parent["children"].append(node)
+        else:
+            roots.append(node)
+    return roots
@@ -0,0 +1,191 @@
+import math
+import threading
+
+from sqlalchemy import func
+
+from . import versions
+
+# --- Grid clustering of map markers ---
+#
+# Every zoom level of the map is covered by a grid of CELL_PX x CELL_PX pixel cells
+# (Web Mercator, like the OSM tiles Leaflet draws). For each zoom the index keeps
+# {cell: [count, sum_lat, sum_lng]}, so a cluster is a cell's count and centroid.
+# The grids are built once from the database and then updated point by point by
+# the write handlers; if the table changed behind their back (the write counter
+# moved without an update reaching the index) the grids are rebuilt on next use.
+#
+# Event clusters have one point per place, weighted by the place's number of events.
+# Every place has a point there (weight 0 without events, no position without
+# coordinates), so an event write only changes weights and a place write only moves
+# a point, both without a query.
+
+MIN_ZOOM = 0
+MAX_ZOOM = 19
+CELL_PX = 64
+TILE_PX = 256
+_CELL_SHIFT = int(math.log2(TILE_PX // CELL_PX))  # cells per tile side = 2 ** _CELL_SHIFT
+_MAX_MERCATOR_LAT = 85.05112878
+
+
+def _mercator(latitude: float, longitude: float):
+    """Normalized Web Mercator coordinates in [0, 1)."""
+    latitude = max(-_MAX_MERCATOR_LAT, min(_MAX_MERCATOR_LAT, latitude))
+    x = (longitude + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(latitude))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12)
+
+
+def _cells_per_side(zoom: int) -> int:
+    return 1 << (zoom + _CELL_SHIFT)
+
+
+class GridClusterIndex:
+    def __init__(self, load_points, tables: tuple):
+        """
+        load_points(db_sess) -> iterable of (key, latitude, longitude, weight);
+        tables: the tables whose write counters the index follows.
+        """
+        self._load_points = load_points
+        self._tables = tables
+        self._grids = None
+        self._points = {}  # key -> (latitude, longitude, weight)
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _add(self, latitude, longitude, weight):
+        if latitude is None or longitude is None or not weight:
+            return
+        mx, my = _mercator(latitude, longitude)
+        for zoom, grid in enumerate(self._grids):
+            n = _cells_per_side(zoom)
+            cell = (int(mx * n), int(my * n))
+            entry = grid.get(cell)
+            if entry is None:
+                grid[cell] = [weight, latitude * weight, longitude * weight]
+                continue
+            entry[0] += weight
+            entry[1] += latitude * weight
+            entry[2] += longitude * weight
+            if entry[0] <= 0:
+                del grid[cell]
+
+    def _rebuild(self, db_sess):
+        self._grids = [{} for _ in range(MIN_ZOOM, MAX_ZOOM + 1)]
+        self._points = {}
+        for key, latitude, longitude, weight in self._load_points(db_sess):
+            self._points[key] = (latitude, longitude, weight)
+            self._add(latitude, longitude, weight)
+
+    def _ensure_fresh(self, db_sess):
+        stamp = versions.stamp(*self._tables)
+        if self._grids is None or self._stamp != stamp:
+            self._rebuild(db_sess)
+            # A write committed while the points were read may be in the grids or not,
+            # updates are held back and the next use rebuilds again
+            self._stamp = stamp if versions.stamp(*self._tables) == stamp else None
+
+    def _apply_write(self, apply, writes=1):
+        """
+        Applies committed writes (rows written) to the grids with apply() if they are exactly
+        that far behind the write counters. A rebuild may already have read them (nothing to do);
+        further behind, writes never reached the index (or haven't yet) and it is rebuilt on next use.
+        """
+        with self._lock:
+            if self._grids is None or self._stamp is None:
+                return
+            stamp = versions.stamp(*self._tables)
+            behind = sum(stamp) - sum(self._stamp)
+            if behind == writes:
+                apply()
+                self._stamp = stamp
+            elif behind > writes:
+                self._grids = None
+
+    def _set_point(self, key, latitude, longitude, weight):
+        """weight None removes the point."""
+        old = self._points.pop(key, None)
+        if old is not None:
+            self._add(old[0], old[1], -old[2])
+        if weight is not None:
+            self._points[key] = (latitude, longitude, weight)
+            self._add(latitude, longitude, weight)
+
+    def move(self, key, latitude=None, longitude=None, weight=1):
+        """
+        One write: the point `key` is now at (latitude, longitude) with `weight`,
+        or gone when they are None. Call right after the write is committed.
+        """
+        gone = latitude is None or longitude is None
+        self._apply_write(lambda: self._set_point(key, latitude, longitude, None if gone else weight))
+
+    def relocate(self, key, latitude=None, longitude=None):
+        """
+        One write: the point `key` moved, or lost its position when they are None.
+        Its weight stays, new points start with weight 0.
+        """
+        def apply():
+            old = self._points.get(key)
+            self._set_point(key, latitude, longitude, old[2] if old is not None else 0)
+        self._apply_write(apply)
+
+    def reweigh(self, *changes, writes=1):
+        """`writes` rows written: (key, delta) weight changes of points that keep their position."""
+        def apply():
+            for key, delta in changes:
+                old = self._points.get(key)
+                if old is None:
+                    # A point the index never loaded, only a rebuild can place it
+                    self._grids = None
+                    return
+                self._set_point(key, old[0], old[1], old[2] + delta)
+        self._apply_write(apply, writes)
+
+    def clusters(self, db_sess, zoom: int, bbox=None) -> list:
+        """
+        Clusters at a zoom level, optionally limited to bbox=(min_lat, min_lng, max_lat, max_lng):
+        [{"latitude", "longitude", "count"}], latitude/longitude being the centroid of the cell.
+        """
+        zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+        with self._lock:
+            self._ensure_fresh(db_sess)
+            grid = self._grids[zoom - MIN_ZOOM]
+
+            if bbox is None:
+                cells = list(grid.items())
+            else:
+                min_lat, min_lng, max_lat, max_lng = bbox
+                n = _cells_per_side(zoom)
+                left, top = _mercator(max_lat, min_lng)
+                right, bottom = _mercator(min_lat, max_lng)
+                x0, x1, y0, y1 = int(left * n), int(right * n), int(top * n), int(bottom * n)
+                if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(grid):
+                    cells = [((x, y), grid[(x, y)]) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)
+                             if (x, y) in grid]
+                else:
+                    cells = [(cell, entry) for cell, entry in grid.items()
+                             if x0 <= cell[0] <= x1 and y0 <= cell[1] <= y1]
+
+            return [
+                {"latitude": entry[1] / entry[0], "longitude": entry[2] / entry[0], "count": entry[0]}
+                for cell, entry in cells
+            ]
+
+
+def _place_points(db_sess):
+    from models.__all_models import Place
+    return db_sess.query(Place.id, Place.latitude, Place.longitude, 1).filter(
+        Place.latitude.is_not(None), Place.longitude.is_not(None)
+    ).all()
+
+
+def _event_points(db_sess):
+    """Events sit at their place's position: one point per place, weighted by its events."""
+    from models.__all_models import Place, Event
+    return db_sess.query(Place.id, Place.latitude, Place.longitude, func.count(Event.id)).outerjoin(
+        Event, Event.place_id == Place.id
+    ).group_by(Place.id).all()
+
+
+place_clusters = GridClusterIndex(_place_points, ('places',))
+event_clusters = GridClusterIndex(_event_points, ('events', 'places'))
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import func, select
+
+from . import versions
+
+# --- Cached and approximate totals for the paginated list endpoints ---
+#
+# The exact COUNT over the filtered query only changes when one of the underlying
+# tables is written, so it is cached per normalized filter set and re-validated
+# against the tables' write counters.
+
+COUNT_CACHE_SIZE = 1024
+# total=estimate counts at most this many rows; above it the total is reported as the cap
+ESTIMATE_LIMIT = 1000
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # key -> (stamp, count)
+
+
+def _get_cached(key):
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+
+def _store(key, stamp, count):
+    with _lock:
+        _cache[key] = (stamp, count)
+        _cache.move_to_end(key)
+        while len(_cache) > COUNT_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def filter_key(endpoint: str, categories=None, search=None, **filters) -> tuple:
+    """Cache key of a filter set; categories order and duplicates don't matter."""
+    return (
+        endpoint,
+        tuple(sorted(set(categories or ()))),
+        search or None,
+        tuple(sorted((name, value) for name, value in filters.items() if value is not None)),
+    )
+
+
+def total_mode(args) -> str:
+    """'none' for include_total=false, 'estimate' for total=estimate, 'exact' otherwise."""
+    if args.get('include_total', '').lower() in ('false', '0', 'no'):
+        return 'none'
+    if args.get('total', '').lower() == 'estimate':
+        return 'estimate'
+    return 'exact'
+
+
+def _bounded_count(query, limit: int) -> int:
+    limited = query.order_by(None).limit(limit).subquery()
+    return query.session.execute(select(func.count()).select_from(limited)).scalar()
+
+
+def total_for(query, key: tuple, tables: tuple, mode: str):
+    """
+    Total number of rows of the (unpaginated) query as (total, estimated).
+    total is None in 'none' mode; 'estimate' mode may return a stale cached value
+    or a count capped at ESTIMATE_LIMIT instead of running the full aggregate.
+    """
+    if mode == 'none':
+        return None, False
+
+    stamp = versions.stamp(*tables)
+    entry = _get_cached(key)
+    if entry is not None and (entry[0] == stamp or mode == 'estimate'):
+        return entry[1], entry[0] != stamp
+
+    if mode == 'estimate':
+        count = _bounded_count(query, ESTIMATE_LIMIT + 1)
+        if count <= ESTIMATE_LIMIT:
+            _store(key, stamp, count)
+            return count, False
+        return ESTIMATE_LIMIT, True
+
+    count = query.order_by(None).count()
+    _store(key, stamp, count)
+    return count, False
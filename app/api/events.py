@@ -1,23 +1,76 @@
 from flask import Blueprint, jsonify, request
-from sqlalchemy.orm import joinedload
-from sqlalchemy import exc, or_
+from sqlalchemy import exc, false
 from datetime import datetime
-
-from db import db_session
-from models.__all_models import Event, EventCategory, Place  # Place is imported for the /events/<id>/place route
+from collections import Counter
+from itertools import islice
+
+from db import db_session, fts, recurrence
+from db.normalize import build_search_key
+from . import pagination, serializers, streaming, counts, geo, clusters, timerange, occurrences, feeds, bulk
+from app import cache, images
+from app.cache import cached
+from .categories import subtree_ids, is_in_subtree, build_tree
+from models.__all_models import Event, EventCategory, EventCategoryClosure, Place  # Place is imported for the /events/<id>/place route
+from models.loading import eager_options, serialize_shape
 
 # Create a Blueprint specifically for Event-related APIs
 events_api_bp = Blueprint('events_api', __name__, url_prefix='/api')
 
 
+def event_to_dict(row, serializer, near=None, occurrence=None):
+    """
+    The serialized row (with the place's position), plus 'distance' in meters when searching
+    near a point. A series' occurrence shows up with the occurrence's datetime.
+    """
+    event_data = serializer.to_dict(row)
+    if occurrence is not None and 'datetime' in event_data:
+        event_data['datetime'] = occurrence
+    if near is not None:
+        event_data['distance'] = geo.distance(
+            serializer.value(row, Place.latitude), serializer.value(row, Place.longitude), near)
+    return event_data
+
+
+def events_to_dicts(rows, serializer, near=None):
+    return [event_to_dict(row, serializer, near) for row in rows]
+
+
+def occurrences_to_dicts(items, serializer, near=None):
+    """(datetime, id, row) items of occurrences.merge()"""
+    return [event_to_dict(row, serializer, near, occurrence) for occurrence, _, row in items]
+
+
 @events_api_bp.route('/events', methods=['GET'])
+@cached("events:list", "event_categories", "places:list")
 def find_events():
     """
     Query string parameters:
         page (int, optional): The page number to retrieve. Default is 1.
-        per_page (int, optional): The number of items per page. Default is 10.
+        per_page (int, optional): The number of items per page, 1 to 1000. Default is 10.
         search (str, optional): A keyword to search for in event names or descriptions.
-        categories (str, optional): A comma-separated string of category names to filter by.
+        categories (str, optional): A comma-separated string of category names to filter by,
+            a category matches together with all of its subcategories.
+        cursor (str, optional): Switches to keyset pagination ordered by (datetime, id).
+            Empty value for the first page, 'next_cursor' of the previous response afterwards.
+            'page' is ignored and no totals are computed.
+        include_total (str, optional): 'false' skips counting, the totals are returned as null.
+        total (str, optional): 'estimate' allows a cached or capped (approximate) total.
+        bbox (str, optional): 'min_lng,min_lat,max_lng,max_lat' (Leaflet's toBBoxString()), only events at places inside it.
+        near (str, optional): 'lat,lng', only events at places within 'radius' of it. Adds 'distance' (meters) to every event.
+        radius (float, optional): Radius for 'near' in meters. Default is 1000.
+        from (str, optional): ISO date or datetime, only events at or after it.
+        to (str, optional): ISO date or datetime, only events before it (a date includes that whole day).
+        upcoming (str, optional): 'true' keeps only events that haven't started yet.
+        sort (str, optional): 'distance' orders by distance from 'near', nearest first,
+            'datetime' orders chronologically.
+        fields (str, optional): A comma-separated list of the event fields to return
+            (e.g. 'id,name,datetime'), all fields by default.
+        stream (str, optional): 'true' (or the header Accept: application/x-ndjson) streams the
+            events as NDJSON, one event per line, without totals. All matching events are sent
+            unless 'per_page' is given, 'cursor' is ignored.
+        With a time window (from, to or upcoming) a recurring event is listed once per occurrence
+        inside the window (open-ended windows expand a year ahead), and a page that contains
+        occurrences is in chronological order.
 
     Returns:
         JSON: A JSON object containing:
@@ -26,87 +79,252 @@ def find_events():
             - 'page' (int): Current page.
             - 'per_page' (int): Items per page.
             - 'total_pages' (int): Total number of pages.
+            - 'total_estimated' (bool): True if the totals are approximate.
+        In cursor mode:
+            - 'events' (list), 'per_page' (int)
+            - 'next_cursor' (str | null): Cursor of the next page, null on the last page.
         Status:
             200 OK
+            400 Bad Request (invalid paging parameter, cursor, spatial or time parameter, unknown field)
             500 Internal Server Error
     """
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
-        query = db_sess.query(Event).options(
-            joinedload(Event.category),
-            joinedload(Event.place)
-        )
+        query = db_sess.query(Event)
 
         # Filter by categories
+        categories_list = []
         categories_param = request.args.get('categories')
         if categories_param:
             categories_list = [c.strip() for c in categories_param.split(',')]
-            query = query.join(Event.category).filter(EventCategory.name.in_(categories_list))
-
-        # Filter by search
-        search_query = request.args.get('search')
-        if search_query:
-            search_pattern = f"%{search_query.lower()}%"
+            # Every named category expands to its whole subtree through the closure table
             query = query.filter(
-                or_(
-                    Event.name.ilike(search_pattern),
-                    Event.description.ilike(search_pattern)
-                )
+                Event.category_id.in_(subtree_ids(EventCategory, EventCategoryClosure, categories_list))
             )
 
-        # Pagination
-        page = request.args.get('page', default=1, type=int)
-        per_page = request.args.get('per_page', default=10, type=int)
-
-        total_events = query.count()
-        events = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        # Convert to dicts with place.position included
-        event_dicts = []
-        for event in events:
-            event_data = event.to_dict()
-            event_data['position'] = event.place.position if event.place and hasattr(event.place, 'position') else None
-            event_dicts.append(event_data)
+        # Filter by search (FTS5 index, best bm25 matches first)
+        matches = None
+        search_query = request.args.get('search', '').strip()
+        if search_query:
+            matches = fts.match_subquery(Event.__tablename__, search_query)
+            if matches is not None:
+                query = query.join(matches, matches.c.rowid == Event.id)
+            else:
+                # Nothing searchable in it ('-', '"'): it matches no rows, not every row
+                query = query.filter(false())
+
+        # Filter by the place's location (R*Tree index) and by time (datetime indexes)
+        try:
+            spatial_args = geo.parse_spatial_args(request.args)
+            time_args = timerange.parse_time_args(request.args)
+            fields = serializers.parse_fields(request.args, serializers.EVENT_FIELDS)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        joined = ()
+        if spatial_args['bbox'] is not None or spatial_args['near'] is not None:
+            query = query.join(Event.place)
+            joined = (Event.place,)
+        query, distance_order = geo.apply_spatial_filters(
+            query, Event.place_id, Place.latitude, Place.longitude, spatial_args)
+
+        # Only the columns of the requested fields are selected, plus the sort keys and
+        # what occurrences and distances are computed from
+        hidden_columns = [(Event.id, None), (Event.datetime, None), (Event.rrule, None)]
+        if spatial_args['near'] is not None:
+            hidden_columns += [(Place.latitude, Event.place), (Place.longitude, Event.place)]
+        serializer = serializers.RowSerializer(Event, serializers.EVENT_FIELDS, fields, hidden_columns)
+
+        # Within a time window recurring series are replaced by their occurrences
+        window = occurrences.window(time_args)
+        series = []
+        if window is not None:
+            series = serializer.select(occurrences.series_in_window(query, *window), joined).all()
+            query = query.filter(Event.rrule.is_(None))
+        query = timerange.apply_time_filters(query, Event.datetime, time_args)
 
-        total_pages = (total_events + per_page - 1) // per_page
+        # Pagination
+        try:
+            page, per_page = pagination.parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        # Keyset pagination: range scan on the (datetime, id) index, no COUNT
+        stream = streaming.wants_stream(request)
+        cursor_param = request.args.get('cursor')
+        if cursor_param is not None and not stream:
+            sort_columns = [Event.datetime, Event.id]
+            try:
+                cursor_values = pagination.decode_cursor(cursor_param, sort_columns) if cursor_param else None
+            except ValueError:
+                return jsonify({"message": "Invalid cursor."}), 400
+
+            rows_query = serializer.select(query, joined)
+            if series:
+                items, next_cursor = occurrences.keyset_page(rows_query, series, *window, cursor_values, per_page)
+                event_dicts = occurrences_to_dicts(items, serializer, spatial_args['near'])
+            else:
+                rows, next_cursor = pagination.keyset_page(rows_query, sort_columns, cursor_values, per_page)
+                event_dicts = events_to_dicts(rows, serializer, spatial_args['near'])
+            return jsonify({
+                "events": event_dicts,
+                "per_page": per_page,
+                "next_cursor": next_cursor
+            }), 200
+
+        if spatial_args['sort_by_distance']:
+            query = query.order_by(distance_order, Event.id)
+        elif request.args.get('sort') == 'datetime':
+            query = query.order_by(Event.datetime, Event.id)
+        elif matches is not None:
+            query = query.order_by(matches.c.rank, Event.id)
+
+        # NDJSON: rows are read in batches and written out as they come
+        if stream:
+            near = spatial_args['near']
+            if series:
+                singles = serializer.select(query.order_by(None), joined).order_by(*occurrences.SORT_COLUMNS)
+                items = occurrences.merge(singles.yield_per(streaming.YIELD_PER), occurrences.expand(series, *window))
+                if 'per_page' in request.args:
+                    items = islice(items, (page - 1) * per_page, page * per_page)
+                return streaming.ndjson_response(
+                    event_to_dict(row, serializer, near, occurrence) for occurrence, _, row in items)
+            if not spatial_args['sort_by_distance'] and request.args.get('sort') != 'datetime' and matches is None:
+                query = query.order_by(Event.id)
+            rows = serializer.select(query, joined)
+            if 'per_page' in request.args:
+                rows = rows.offset((page - 1) * per_page).limit(per_page)
+            return streaming.ndjson_response(
+                event_to_dict(row, serializer, near) for row in rows.yield_per(streaming.YIELD_PER))
+
+        # Exact totals come from the count cache unless a write happened since
+        count_key = counts.filter_key('events', categories_list,
+                                      fts.build_match_query(search_query) or search_query,
+                                      **geo.cache_key_args(spatial_args), **timerange.cache_key_args(time_args))
+        # Spatial filters match through the places, moving or deleting one changes the total
+        count_tables = ('events', 'event_categories') + (('places',) if joined else ())
+        total_events, total_estimated = counts.total_for(
+            query, count_key, count_tables, counts.total_mode(request.args))
+
+        if series:
+            # Occurrences interleave with the single events, so the page is chronological
+            occurrence_items = occurrences.expand(series, *window)
+            if total_events is not None:
+                total_events += len(occurrence_items)
+            items = occurrences.offset_page(
+                serializer.select(query.order_by(None), joined), occurrence_items, page, per_page)
+            event_dicts = occurrences_to_dicts(items, serializer, spatial_args['near'])
+        else:
+            rows = serializer.select(query, joined).offset((page - 1) * per_page).limit(per_page).all()
+            event_dicts = events_to_dicts(rows, serializer, spatial_args['near'])
+
+        total_pages = (total_events + per_page - 1) // per_page if total_events is not None else None
 
         return jsonify({
             "events": event_dicts,
             "total_events": total_events,
             "page": page,
             "per_page": per_page,
-            "total_pages": total_pages
+            "total_pages": total_pages,
+            "total_estimated": total_estimated
         }), 200
 
     except Exception as e:
         print(f"Error in find_events: {e}")
         return jsonify({"message": f"Error retrieving events: {str(e)}"}), 500
-    finally:
-        db_sess.close()
+
+
+# GET Event clusters for the map
+@events_api_bp.route('/events/clusters', methods=['GET'])
+@cached("events:list", "places:list")
+def get_event_clusters():
+    """
+    Query string parameters:
+        zoom (int, required): The map zoom level, events are grouped by their place's
+            position into cells of about 64x64 pixels at that zoom.
+        bbox (str, optional): 'min_lng,min_lat,max_lng,max_lat', only clusters inside it.
+    Returns: [{"latitude", "longitude", "count"}], the position being the cluster's centroid.
+    """
+    db_sess = db_session.create_reader_session()
+    try:
+        zoom = request.args.get('zoom', type=int)
+        if zoom is None:
+            return jsonify({"message": "'zoom' must be an integer."}), 400
+        try:
+            spatial_args = geo.parse_spatial_args(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        return jsonify(clusters.event_clusters.clusters(db_sess, zoom, spatial_args['bbox'])), 200
+    except Exception as e:
+        return jsonify({"message": f"Error retrieving event clusters: {str(e)}"}), 500
+
+
+def feed_events(db_sess):
+    """Events of a feed (categories= and place_id= filters) in time order, read through a server-side cursor"""
+    query = db_sess.query(Event).options(*eager_options(Event, {"place": {}}))
+    categories_param = request.args.get('categories')
+    if categories_param:
+        categories_list = [c.strip() for c in categories_param.split(',')]
+        query = query.filter(Event.category_id.in_(subtree_ids(EventCategory, EventCategoryClosure, categories_list)))
+    place_id = request.args.get('place_id', type=int)
+    if place_id is not None:
+        query = query.filter(Event.place_id == place_id)
+    return query.order_by(Event.datetime, Event.id).yield_per(feeds.YIELD_PER)
+
+
+FEED_TAGS = ("events:list", "event_categories", "places:list")
+FEED_TABLES = ('events', 'event_categories', 'places')
+FEED_NAME = "Zrenjanin for Youth: events"
+
+
+# GET Events as an iCalendar subscription
+@events_api_bp.route('/events.ics', methods=['GET'])
+def get_events_ics():
+    """
+    Query string parameters:
+        categories (str, optional): Comma-separated category names (with their subcategories).
+        place_id (int, optional): Only events at this place.
+    Recurring events are exported once, with their RRULE.
+    """
+    try:
+        return feeds.feed_response(
+            lambda: feeds.ics_chunks(feed_events(db_session.create_reader_session()), FEED_NAME),
+            'text/calendar', FEED_TAGS, FEED_TABLES)
+    except Exception as e:
+        return jsonify({"message": f"Error retrieving the calendar: {str(e)}"}), 500
+
+
+# GET Events as a JSON Feed
+@events_api_bp.route('/events/feed.json', methods=['GET'])
+def get_events_json_feed():
+    """Same parameters as /api/events.ics."""
+    try:
+        return feeds.feed_response(
+            lambda: feeds.json_feed_chunks(feed_events(db_session.create_reader_session()), FEED_NAME),
+            'application/feed+json', FEED_TAGS, FEED_TABLES)
+    except Exception as e:
+        return jsonify({"message": f"Error retrieving the feed: {str(e)}"}), 500
 
 
 # GET a specific Event by ID
 @events_api_bp.route('/events/<int:event_id>', methods=['GET'])
+@cached("event:{event_id}", "event_categories")
 def get_event_by_id(event_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
         # Eager load category for the embedded category in to_dict
-        event = db_sess.query(Event).options(
-            joinedload(Event.category)
-        ).get(event_id)
+        event = db_sess.get(Event, event_id, options=eager_options(Event))
         if not event:
             return jsonify({"message": "Event not found."}), 404
         return jsonify(event.to_dict()), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving event: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # POST (Create) a new Event
 @events_api_bp.route('/events', methods=['POST'])
 def create_event():
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
         data = request.json
         if not all(k in data for k in ['name', 'datetime', 'place_id', 'category_id']):
@@ -114,24 +332,31 @@ def create_event():
                 {"message": "Missing required fields for event creation (name, datetime, place_id, category_id)."}), 400
 
         try:
-            event_datetime = datetime.fromisoformat(data['datetime'])
-        except ValueError:
+            event_datetime = timerange.naive_utc(datetime.fromisoformat(data['datetime']))
+        except (TypeError, ValueError):
             return jsonify({"message": "Invalid datetime format. Use ISO 8601 (e.g., 'YYYY-MM-DD HH:MM:SS')."}), 400
 
+        if data.get('rrule'):
+            try:
+                recurrence.recurrence_end(data['rrule'], event_datetime)
+            except (OverflowError, ValueError) as e:
+                return jsonify({"message": str(e)}), 400
+
         new_event = Event(
             name=data['name'],
             description=data.get('description'),
             datetime=event_datetime,
+            rrule=data.get('rrule') or None,
             place_id=data['place_id'],
             category_id=data['category_id']
         )
         db_sess.add(new_event)
         db_sess.commit()
+        clusters.event_clusters.reweigh((new_event.place_id, 1))
+        cache.invalidate('events:list', f'place_events:{new_event.place_id}')
 
         # After commit, to ensure category relationship is available for .to_dict()
-        event_response = db_sess.query(Event).options(
-            joinedload(Event.category)
-        ).get(new_event.id)
+        event_response = db_sess.get(Event, new_event.id, options=eager_options(Event))
 
         return jsonify(event_response.to_dict()), 201
     except exc.IntegrityError:
@@ -140,23 +365,244 @@ def create_event():
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error creating event: {str(e)}"}), 500
-    finally:
-        db_sess.close()
+
+
+# POST (Create) many Events at once
+@events_api_bp.route('/events/bulk', methods=['POST'])
+def create_events_bulk():
+    """
+    Body: a JSON array of event objects (as for POST /api/events) or NDJSON.
+    Query string parameters:
+        atomic (str, optional): 'true' creates nothing unless every item is valid.
+    Returns: {"created", "failed", "results": [{"index", "status", "id" | "message"}]}
+    """
+    db_sess = db_session.create_writer_session()
+    try:
+        try:
+            items = bulk.parse_items(request)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        objects = [item for item in items if isinstance(item, dict)]
+        place_ids = bulk.existing_ids(db_sess, Place.id, (item.get('place_id') for item in objects))
+        category_ids = bulk.existing_ids(db_sess, EventCategory.id, (item.get('category_id') for item in objects))
+        rows, errors = [], {}
+        for index, data in enumerate(items):
+            if not isinstance(data, dict):
+                errors[index] = "Item must be a JSON object."
+                continue
+            if not isinstance(data.get('name'), str) or not data['name'].strip():
+                errors[index] = "Missing required field: 'name'."
+                continue
+            if data.get('place_id') not in place_ids:
+                errors[index] = "Missing or unknown 'place_id'."
+                continue
+            if data.get('category_id') not in category_ids:
+                errors[index] = "Missing or unknown 'category_id'."
+                continue
+            try:
+                event_datetime = timerange.naive_utc(datetime.fromisoformat(data['datetime']))
+            except (KeyError, TypeError, ValueError):
+                errors[index] = "Missing or invalid 'datetime'. Use ISO 8601 (e.g., 'YYYY-MM-DD HH:MM:SS')."
+                continue
+            rrule = data.get('rrule') or None
+            try:
+                end = recurrence.recurrence_end(rrule, event_datetime) if rrule else None
+            except (OverflowError, ValueError) as e:
+                errors[index] = str(e)
+                continue
+            rows.append({
+                'name': data['name'],
+                'description': data.get('description'),
+                'datetime': event_datetime,
+                'rrule': rrule,
+                'recurrence_end': end,
+                'image_url': data.get('image_url'),
+                'place_id': data['place_id'],
+                'category_id': data['category_id'],
+                'search_key': build_search_key(data['name'], data.get('description')),
+            })
+
+        if errors and request.args.get('atomic', '').lower() in ('true', '1', 'yes'):
+            return jsonify(bulk.results(items, errors, None)), 400
+
+        bulk.fill_image_columns(rows)
+        ids = bulk.insert_rows(db_sess, Event, rows)
+        db_sess.commit()
+        if ids:
+            clusters.event_clusters.reweigh(*Counter(row['place_id'] for row in rows).items(), writes=len(ids))
+            cache.invalidate('events:list', *{f"place_events:{row['place_id']}" for row in rows})
+            # Derivatives of the new images are made in the background, not on the first page view
+            for image_url in {row['image_url'] for row in rows if row['image_url']}:
+                images.warm(image_url)
+        return jsonify(bulk.results(items, errors, ids)), 200
+    except exc.IntegrityError:
+        db_sess.rollback()
+        return jsonify({"message": "Integrity error: nothing was created."}), 400
+    except Exception as e:
+        db_sess.rollback()
+        return jsonify({"message": f"Error creating events: {str(e)}"}), 500
+
+
+# PUT (Update) many Events at once
+@events_api_bp.route('/events/bulk', methods=['PUT'])
+def update_events_bulk():
+    """
+    Body: a JSON array (or NDJSON) of {"id", ...fields to change}, fields as for POST /api/events/bulk.
+    Query string parameters:
+        atomic (str, optional): 'true' updates nothing unless every item is valid.
+    Returns: {"updated", "failed", "results": [{"index", "status", "id" | "message"}]}
+    """
+    db_sess = db_session.create_writer_session()
+    try:
+        try:
+            items = bulk.parse_items(request)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        objects = [item for item in items if isinstance(item, dict)]
+        current = bulk.current_rows(
+            db_sess, [Event.id, Event.name, Event.description, Event.datetime, Event.rrule,
+                      Event.image_url, Event.image_digest, Event.image_width, Event.place_id, Event.category_id],
+            (bulk.item_id(item) for item in objects if bulk.item_id(item) is not None))
+        place_ids = bulk.existing_ids(db_sess, Place.id, (item['place_id'] for item in objects if 'place_id' in item))
+        category_ids = bulk.existing_ids(
+            db_sess, EventCategory.id, (item['category_id'] for item in objects if 'category_id' in item))
+        rows, errors, seen = [], {}, set()
+        for index, data in enumerate(items):
+            event_id = bulk.item_id(data) if isinstance(data, dict) else None
+            if event_id is None:
+                errors[index] = "Item must be a JSON object with an integer 'id'."
+                continue
+            if event_id not in current:
+                errors[index] = (404, "Event not found.")
+                continue
+            if event_id in seen:
+                errors[index] = "Duplicate 'id' in the request."
+                continue
+            old = current[event_id]
+            if 'name' in data and (not isinstance(data['name'], str) or not data['name'].strip()):
+                errors[index] = "'name' must be a non-empty string."
+                continue
+            if 'place_id' in data and data['place_id'] not in place_ids:
+                errors[index] = "Unknown 'place_id'."
+                continue
+            if 'category_id' in data and data['category_id'] not in category_ids:
+                errors[index] = "Unknown 'category_id'."
+                continue
+            try:
+                event_datetime = timerange.naive_utc(datetime.fromisoformat(data['datetime'])) \
+                    if 'datetime' in data else old.datetime
+            except (TypeError, ValueError):
+                errors[index] = "Invalid 'datetime'. Use ISO 8601 (e.g., 'YYYY-MM-DD HH:MM:SS')."
+                continue
+            rrule = (data['rrule'] or None) if 'rrule' in data else old.rrule
+            try:
+                end = recurrence.recurrence_end(rrule, event_datetime) if rrule else None
+            except (OverflowError, ValueError) as e:
+                errors[index] = str(e)
+                continue
+            seen.add(event_id)
+            name = data.get('name', old.name)
+            description = data.get('description', old.description)
+            rows.append({
+                'id': event_id,
+                'name': name,
+                'description': description,
+                'datetime': event_datetime,
+                'rrule': rrule,
+                'recurrence_end': end,
+                'image_url': data.get('image_url', old.image_url),
+                'place_id': data.get('place_id', old.place_id),
+                'category_id': data.get('category_id', old.category_id),
+                'search_key': build_search_key(name, description),
+            })
+
+        if errors and request.args.get('atomic', '').lower() in ('true', '1', 'yes'):
+            return jsonify(bulk.results(items, errors, None, 200, "updated")), 400
+
+        bulk.fill_image_columns(rows, current)
+        ids = bulk.update_rows(db_sess, Event, rows)
+        db_sess.commit()
+        if ids:
+            moves = Counter()
+            for row in rows:
+                moves[current[row['id']].place_id] -= 1
+                moves[row['place_id']] += 1
+            clusters.event_clusters.reweigh(*moves.items(), writes=len(ids))
+            cache.invalidate('events:list', *(f'event:{event_id}' for event_id in ids),
+                             *{f"place_events:{place_id}" for place_id in moves})
+            for image_url in {row['image_url'] for row in rows
+                              if row['image_url'] and row['image_url'] != current[row['id']].image_url}:
+                images.warm(image_url)
+        return jsonify(bulk.results(items, errors, ids, 200, "updated")), 200
+    except exc.IntegrityError:
+        db_sess.rollback()
+        return jsonify({"message": "Integrity error: nothing was updated."}), 400
+    except Exception as e:
+        db_sess.rollback()
+        return jsonify({"message": f"Error updating events: {str(e)}"}), 500
+
+
+# DELETE many Events at once
+@events_api_bp.route('/events/bulk', methods=['DELETE'])
+def delete_events_bulk():
+    """
+    Body: a JSON array (or NDJSON) of event ids, or of {"id"} objects.
+    Query string parameters:
+        atomic (str, optional): 'true' deletes nothing unless every item can be deleted.
+    Returns: {"deleted", "failed", "results": [{"index", "status", "id" | "message"}]}
+    """
+    db_sess = db_session.create_writer_session()
+    try:
+        try:
+            items = bulk.parse_items(request)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        requested = [bulk.item_id(item) for item in items]
+        current = bulk.current_rows(db_sess, [Event.id, Event.place_id], (i for i in requested if i is not None))
+        ids, errors, seen = [], {}, set()
+        for index, event_id in enumerate(requested):
+            if event_id is None:
+                errors[index] = "Item must be an event id or a JSON object with an integer 'id'."
+            elif event_id not in current:
+                errors[index] = (404, "Event not found.")
+            elif event_id in seen:
+                errors[index] = "Duplicate 'id' in the request."
+            else:
+                seen.add(event_id)
+                ids.append(event_id)
+
+        if errors and request.args.get('atomic', '').lower() in ('true', '1', 'yes'):
+            return jsonify(bulk.results(items, errors, None, 200, "deleted")), 400
+
+        ids = bulk.delete_rows(db_sess, Event, ids)
+        db_sess.commit()
+        if ids:
+            removed = Counter(current[event_id].place_id for event_id in ids)
+            clusters.event_clusters.reweigh(*((place_id, -count) for place_id, count in removed.items()),
+                                            writes=len(ids))
+            cache.invalidate('events:list', *(f'event:{event_id}' for event_id in ids),
+                             *(f"place_events:{place_id}" for place_id in removed))
+        return jsonify(bulk.results(items, errors, ids, 200, "deleted")), 200
+    except Exception as e:
+        db_sess.rollback()
+        return jsonify({"message": f"Error deleting events: {str(e)}"}), 500
 
 
 # PUT (Update) an existing Event
 @events_api_bp.route('/events/<int:event_id>', methods=['PUT'])
 def update_event(event_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
         data = request.json
         # Eager load category for the embedded category in to_dict for the response
-        event = db_sess.query(Event).options(
-            joinedload(Event.category)
-        ).get(event_id)
+        event = db_sess.get(Event, event_id, options=eager_options(Event))
         if not event:
             return jsonify({"message": "Event not found."}), 404
 
+        old_place_id = event.place_id
         event.name = data.get('name', event.name)
         event.description = data.get('description', event.description)
         event.place_id = data.get('place_id', event.place_id)
@@ -164,11 +610,24 @@ def update_event(event_id):
 
         if 'datetime' in data:
             try:
-                event.datetime = datetime.fromisoformat(data['datetime'])
-            except ValueError:
+                event.datetime = timerange.naive_utc(datetime.fromisoformat(data['datetime']))
+            except (TypeError, ValueError):
                 return jsonify({"message": "Invalid datetime format. Use ISO 8601 (e.g., 'YYYY-MM-DD HH:MM:SS')."}), 400
 
+        if 'rrule' in data:
+            event.rrule = data['rrule'] or None
+        if event.rrule:
+            # A new rule, or the old one from a new first occurrence
+            try:
+                recurrence.recurrence_end(event.rrule, event.datetime)
+            except (OverflowError, ValueError) as e:
+                return jsonify({"message": str(e)}), 400
+
         db_sess.commit()
+        # Every write has to reach the index, an event that stays at its place changes nothing
+        clusters.event_clusters.reweigh((old_place_id, -1), (event.place_id, 1))
+        cache.invalidate(f'event:{event_id}', 'events:list',
+                         f'place_events:{old_place_id}', f'place_events:{event.place_id}')
         return jsonify(event.to_dict()), 200
     except exc.IntegrityError:
         db_sess.rollback()
@@ -176,84 +635,93 @@ def update_event(event_id):
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error updating event: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # DELETE an Event
 @events_api_bp.route('/events/<int:event_id>', methods=['DELETE'])
 def delete_event(event_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
-        event = db_sess.query(Event).get(event_id)
+        event = db_sess.get(Event, event_id)
         if not event:
             return jsonify({"message": "Event not found."}), 404
 
+        place_id = event.place_id
         db_sess.delete(event)
         db_sess.commit()
+        clusters.event_clusters.reweigh((place_id, -1))
+        cache.invalidate(f'event:{event_id}', 'events:list', f'place_events:{place_id}')
         return jsonify({"message": f"Event {event_id} deleted successfully."}), 200
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error deleting event: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # GET the Place for a specific Event
 @events_api_bp.route('/events/<int:event_id>/place', methods=['GET'])
+@cached("event:{event_id}", "place_categories")
 def get_place_for_event(event_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
         # Eager load place AND its category for the place's to_dict
-        event = db_sess.query(Event).options(
-            joinedload(Event.place).joinedload(Place.category)  # Chain joinedload to get place's category
-        ).get(event_id)
+        event = db_sess.get(Event, event_id, options=eager_options(Event, {"place": serialize_shape(Place)}))
         if not event:
             return jsonify({"message": "Event not found."}), 404
         if not event.place:  # Should not happen if place_id is non-nullable, but good for robustness
             return jsonify({"message": "Place associated with this event not found."}), 404
 
+        cache.tag(f"place:{event.place_id}")
         return jsonify(event.place.to_dict()), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving place for event {event_id}: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # --- EventCategory API Endpoints ---
 
 # GET basic event categories (where parent_id is null)
 @events_api_bp.route('/event_categories/basic', methods=['GET'])
+@cached("event_categories")
 def get_basic_event_categories():
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
-        basic_categories = db_sess.query(EventCategory).filter(EventCategory.parent_id.is_(None)).all()
+        basic_categories = db_sess.query(EventCategory).options(
+            *eager_options(EventCategory)
+        ).filter(EventCategory.parent_id.is_(None)).all()
         return jsonify([category.to_dict() for category in basic_categories]), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving basic event categories: {str(e)}"}), 500
-    finally:
-        db_sess.close()
+
+
+# GET the whole EventCategory tree (one query)
+@events_api_bp.route('/event_categories/tree', methods=['GET'])
+@cached("event_categories")
+def get_event_category_tree():
+    db_sess = db_session.create_reader_session()
+    try:
+        all_categories = db_sess.query(EventCategory).order_by(EventCategory.id).all()
+        return jsonify(build_tree(all_categories)), 200
+    except Exception as e:
+        return jsonify({"message": f"Error retrieving event category tree: {str(e)}"}), 500
 
 
 # GET a specific EventCategory by ID
 @events_api_bp.route('/event_categories/<int:category_id>', methods=['GET'])
+@cached("event_categories")
 def get_event_category_by_id(category_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
-        category = db_sess.query(EventCategory).get(category_id)
+        category = db_sess.get(EventCategory, category_id, options=eager_options(EventCategory))
         if not category:
             return jsonify({"message": "Event category not found."}), 404
         return jsonify(category.to_dict()), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving event category: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # POST (Create) a new EventCategory
 @events_api_bp.route('/event_categories', methods=['POST'])
 def create_event_category():
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
         data = request.json
         if not 'name' in data:
@@ -265,6 +733,7 @@ def create_event_category():
         )
         db_sess.add(new_category)
         db_sess.commit()
+        cache.invalidate('event_categories')
         return jsonify(new_category.to_dict()), 201
     except exc.IntegrityError as e:
         db_sess.rollback()
@@ -274,24 +743,27 @@ def create_event_category():
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error creating event category: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # PUT (Update) an existing EventCategory
 @events_api_bp.route('/event_categories/<int:category_id>', methods=['PUT'])
 def update_event_category(category_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
         data = request.json
-        category = db_sess.query(EventCategory).get(category_id)
+        category = db_sess.get(EventCategory, category_id, options=eager_options(EventCategory))
         if not category:
             return jsonify({"message": "Event category not found."}), 404
 
+        parent_id = data.get('parent_id', category.parent_id)
+        if parent_id is not None and is_in_subtree(db_sess, EventCategoryClosure, category.id, parent_id):
+            return jsonify({"message": "A category can't be moved under itself or its own subcategory."}), 400
+
         category.name = data.get('name', category.name)
-        category.parent_id = data.get('parent_id', category.parent_id)
+        category.parent_id = parent_id
 
         db_sess.commit()
+        cache.invalidate('event_categories')
         return jsonify(category.to_dict()), 200
     except exc.IntegrityError as e:
         db_sess.rollback()
@@ -301,21 +773,20 @@ def update_event_category(category_id):
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error updating event category: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # DELETE an EventCategory
 @events_api_bp.route('/event_categories/<int:category_id>', methods=['DELETE'])
 def delete_event_category(category_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
-        category = db_sess.query(EventCategory).get(category_id)
+        category = db_sess.get(EventCategory, category_id)
         if not category:
             return jsonify({"message": "Event category not found."}), 404
 
         db_sess.delete(category)
         db_sess.commit()
+        cache.invalidate('event_categories')
         return jsonify({"message": f"Event category {category_id} deleted successfully."}), 200
     except exc.IntegrityError:
         db_sess.rollback()
@@ -324,5 +795,3 @@ def delete_event_category(category_id):
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error deleting event category: {str(e)}"}), 500
-    finally:
-        db_sess.close()
@@ -0,0 +1,168 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from flask import current_app, request, stream_with_context, url_for
+from werkzeug.http import is_resource_modified
+
+from app import cache, compression
+from app.cache import response_cache
+from . import versions
+
+# --- Subscribable event feeds (iCalendar and JSON Feed) ---
+#
+# Feeds are written row by row from a yield_per() cursor, so a feed of any size is
+# served in constant memory. Validators don't need the body: the ETag is derived from
+# the versions of the cache tags the feed depends on, so an unchanged feed is answered
+# with a 304 before any query runs. Feeds up to FEED_CACHE_MAX_BYTES are also kept
+# in the response cache under those tags and are dropped by the same invalidations
+# as the JSON API responses (events:list on every event write).
+
+YIELD_PER = 500
+FEED_CACHE_MAX_BYTES = 1024 * 1024
+ICS_LINE_OCTETS = 75
+PRODID = "-//Zrenjanin for Youth//Events//SR"
+
+
+def _ics_text(value) -> str:
+    """TEXT value escaping of RFC 5545 (backslash, semicolon, comma, newline)."""
+    value = str(value or '')
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _ics_line(line: str) -> str:
+    """A content line folded at 75 octets (continuations start with a space), CRLF terminated."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= ICS_LINE_OCTETS:
+        return line + '\r\n'
+    parts, current, size = [], '', 0
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        limit = ICS_LINE_OCTETS if not parts else ICS_LINE_OCTETS - 1
+        if size + char_size > limit:
+            parts.append(current)
+            current, size = '', 0
+        current += char
+        size += char_size
+    parts.append(current)
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _ics_datetime(value) -> str:
+    """Event.datetime is naive UTC."""
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def ics_chunks(events, name: str):
+    stamp = _ics_datetime(datetime.now(timezone.utc))
+    yield ''.join(_ics_line(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH', f'X-WR-CALNAME:{_ics_text(name)}',
+    ))
+    host = request.host.split(':')[0]
+    for event in events:
+        if event.datetime is None:
+            continue
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:event-{event.id}@{host}',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{_ics_datetime(event.datetime)}',
+            f'SUMMARY:{_ics_text(event.name)}',
+        ]
+        if event.rrule:
+            lines.append(f'RRULE:{event.rrule}')
+        if event.description:
+            lines.append(f'DESCRIPTION:{_ics_text(event.description)}')
+        if event.place is not None:
+            location = event.place.name if not event.place.address else f'{event.place.name}, {event.place.address}'
+            lines.append(f'LOCATION:{_ics_text(location)}')
+            if event.place.latitude is not None and event.place.longitude is not None:
+                lines.append(f'GEO:{event.place.latitude};{event.place.longitude}')
+        if event.category is not None:
+            lines.append(f'CATEGORIES:{_ics_text(event.category.name)}')
+        lines.append(f'URL:{url_for("routes.event_details", event_id=event.id, _external=True)}')
+        lines.append('END:VEVENT')
+        yield ''.join(_ics_line(line) for line in lines)
+    yield _ics_line('END:VCALENDAR')
+
+
+def json_feed_chunks(events, name: str):
+    """JSON Feed 1.1 (https://jsonfeed.org/version/1.1), streamed item by item."""
+    header = json.dumps({
+        "version": "https://jsonfeed.org/version/1.1",
+        "title": name,
+        "home_page_url": url_for('routes.event_search', _external=True),
+        "feed_url": request.url,
+    }, ensure_ascii=False)
+    yield header[:-1] + ', "items": ['
+    separator = ''
+    for event in events:
+        item = {
+            "id": str(event.id),
+            "url": url_for('routes.event_details', event_id=event.id, _external=True),
+            "title": event.name,
+            "content_text": event.description or '',
+            "date_published": event.datetime.isoformat() + 'Z' if event.datetime else None,
+            "tags": [event.category.name] if event.category is not None else [],
+            "_event": {
+                "datetime": event.datetime.isoformat() + 'Z' if event.datetime else None,
+                "rrule": event.rrule,
+                "place_id": event.place_id,
+                "place_name": event.place.name if event.place is not None else None,
+                "latitude": event.place.latitude if event.place is not None else None,
+                "longitude": event.place.longitude if event.place is not None else None,
+            },
+        }
+        if event.image_url:
+            item["image"] = url_for('static', filename=event.image_url.removeprefix('static/'), _external=True)
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ', '
+    yield ']}'
+
+
+def feed_response(make_chunks, mimetype: str, tags, tables):
+    """
+    Streamed feed response with validators and the per-feed cache.
+    make_chunks() -> iterable of str, called only when the feed has to be generated.
+    """
+    key = cache.cache_key()
+    tag_versions = response_cache.tag_versions(tags)
+    last_modified = versions.last_modified(*tables)
+    etag = hashlib.sha1(f"{key}|{sorted(tag_versions.items())}|{last_modified}".encode()).hexdigest()
+
+    def with_validators(response):
+        response.set_etag(etag, weak="Content-Encoding" in response.headers)
+        response.last_modified = int(last_modified)
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response
+
+    modified_at = datetime.fromtimestamp(int(last_modified), timezone.utc)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modified_at):
+        return with_validators(current_app.response_class(status=304))
+
+    entry = response_cache.lookup(key) if response_cache.enabled else None
+    if entry is not None and entry["etag"] == etag:
+        response = current_app.response_class(entry["body"], mimetype=entry["mimetype"])
+        compression.apply_encoded(response, entry.get("encoded"))
+        response.headers["X-Cache"] = "HIT"
+        return with_validators(response)
+
+    def generate():
+        kept, size = [], 0
+        for chunk in make_chunks():
+            data = chunk.encode('utf-8')
+            if kept is not None:
+                kept.append(data)
+                size += len(data)
+                if size > FEED_CACHE_MAX_BYTES:
+                    kept = None  # too big to cache, keep streaming
+            yield data
+        if kept is not None and response_cache.enabled:
+            response_cache.store(key, b''.join(kept), 200, mimetype, tag_versions, etag, last_modified)
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype=mimetype)
+    response.headers["X-Cache"] = "MISS"
+    return with_validators(response)
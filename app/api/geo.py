@@ -0,0 +1,110 @@
+import math
+
+from db import spatial
+
+# --- Spatial query parameters shared by the place and event list endpoints ---
+#
+# bbox=min_lng,min_lat,max_lng,max_lat   (Leaflet's map.getBounds().toBBoxString())
+# near=lat,lng&radius=meters             (radius defaults to DEFAULT_RADIUS)
+# sort=distance                          (nearest first, needs near=)
+#
+# Both filters first narrow the rows down through the R*Tree (db/spatial.py).
+# Distances use the equirectangular approximation of the great-circle distance:
+# cos(latitude) is computed once per request, so the per-row work is plain arithmetic
+# SQLite evaluates inside the query, and at city scale the error is far below a meter.
+
+EARTH_RADIUS = 6371008.8  # meters
+METERS_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+DEFAULT_RADIUS = 1000
+MAX_RADIUS = 100000
+
+
+def _floats(value: str, count: int, name: str) -> list:
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        raise ValueError(f"'{name}' must be {count} comma-separated numbers.")
+    if len(numbers) != count or not all(math.isfinite(n) for n in numbers):
+        raise ValueError(f"'{name}' must be {count} comma-separated numbers.")
+    return numbers
+
+
+def parse_spatial_args(args) -> dict:
+    """
+    Validated spatial parameters: {'bbox': (min_lat, min_lng, max_lat, max_lng) | None,
+    'near': (lat, lng) | None, 'radius': float | None, 'sort_by_distance': bool}.
+    Raises ValueError with a message for the client.
+    """
+    bbox = None
+    if args.get('bbox'):
+        min_lng, min_lat, max_lng, max_lat = _floats(args['bbox'], 4, 'bbox')
+        if min_lat > max_lat or min_lng > max_lng:
+            raise ValueError("'bbox' must be min_lng,min_lat,max_lng,max_lat.")
+        bbox = (min_lat, min_lng, max_lat, max_lng)
+
+    near, radius = None, None
+    if args.get('near'):
+        near = tuple(_floats(args['near'], 2, 'near'))
+        if not (-90 <= near[0] <= 90 and -180 <= near[1] <= 180):
+            raise ValueError("'near' is out of range.")
+        radius = args.get('radius', default=DEFAULT_RADIUS, type=float)
+        if radius is None or not 0 < radius <= MAX_RADIUS:
+            raise ValueError(f"'radius' must be a number of meters between 0 and {MAX_RADIUS}.")
+
+    sort_by_distance = args.get('sort') == 'distance'
+    if sort_by_distance and near is None:
+        raise ValueError("sort=distance requires 'near'.")
+
+    return {'bbox': bbox, 'near': near, 'radius': radius, 'sort_by_distance': sort_by_distance}
+
+
+def cache_key_args(spatial_args: dict) -> dict:
+    return {'bbox': spatial_args['bbox'], 'near': spatial_args['near'], 'radius': spatial_args['radius']}
+
+
+def squared_distance(latitude, longitude, near):
+    """Squared distance in m² from near=(lat, lng); works on columns (SQL) and on plain floats."""
+    k = math.cos(math.radians(near[0]))
+    dy = (latitude - near[0]) * METERS_PER_DEGREE
+    dx = (longitude - near[1]) * (METERS_PER_DEGREE * k)
+    return dy * dy + dx * dx
+
+
+def distance(latitude, longitude, near):
+    if latitude is None or longitude is None:
+        return None
+    return math.sqrt(squared_distance(latitude, longitude, near))
+
+
+def radius_bbox(near, radius):
+    """The box around a circle, (min_lat, min_lng, max_lat, max_lng), for the R*Tree prefilter."""
+    dlat = radius / METERS_PER_DEGREE
+    dlng = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(near[0])), 1e-6))
+    return near[0] - dlat, near[1] - dlng, near[0] + dlat, near[1] + dlng
+
+
+def apply_spatial_filters(query, place_id_column, latitude_column, longitude_column, spatial_args):
+    """
+    Adds the bbox / near filters to a query whose rows have a place (place_id_column
+    and the place's coordinate columns). Returns the query and the squared-distance
+    expression to order by (None unless near= was given).
+    """
+    if spatial_args['bbox'] is not None:
+        min_lat, min_lng, max_lat, max_lng = spatial_args['bbox']
+        query = query.filter(
+            place_id_column.in_(spatial.bbox_ids(min_lat, min_lng, max_lat, max_lng)),
+            latitude_column.between(min_lat, max_lat),
+            longitude_column.between(min_lng, max_lng),
+        )
+
+    distance_expression = None
+    near = spatial_args['near']
+    if near is not None:
+        radius = spatial_args['radius']
+        distance_expression = squared_distance(latitude_column, longitude_column, near)
+        query = query.filter(
+            place_id_column.in_(spatial.bbox_ids(*radius_bbox(near, radius))),
+            distance_expression <= radius * radius,
+        )
+
+    return query, distance_expression
@@ -0,0 +1,74 @@
+import hashlib
+import struct
+import sys
+import threading
+from array import array
+
+from . import versions
+
+# --- Compact columnar feed of all places for the map ---
+#
+# A marker needs an id, a position and a category, nothing else. The feed packs
+# exactly that into little-endian typed arrays the browser maps without parsing:
+#
+#   offset 0      magic b'ZPM1'
+#   offset 4      uint32  n (number of places)
+#   offset 8      uint32  id[n]
+#   8 + 4n        float32 latitude[n]
+#   8 + 8n        float32 longitude[n]
+#   8 + 12n       uint32  category_id[n]   (0 = no category)
+#
+# e.g. new Float32Array(buffer, 8 + 4 * n, n). Every section is 4-byte aligned.
+# float32 keeps coordinates to well under a meter. Places without a position are left out.
+#
+# The payload is rebuilt when the places table was written, and it is published under
+# its content hash, so its URL can be cached forever while a new version gets a new URL.
+
+MAGIC = b'ZPM1'
+
+_lock = threading.Lock()
+_feed = None  # (stamp, payload, version)
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def build_places_feed(rows) -> bytes:
+    """rows: (id, latitude, longitude, category_id) tuples."""
+    ids, latitudes, longitudes, categories = array('I'), array('f'), array('f'), array('I')
+    for place_id, latitude, longitude, category_id in rows:
+        if latitude is None or longitude is None:
+            continue
+        ids.append(place_id)
+        latitudes.append(latitude)
+        longitudes.append(longitude)
+        categories.append(category_id or 0)
+    return b''.join((
+        MAGIC,
+        struct.pack('<I', len(ids)),
+        _little_endian(ids),
+        _little_endian(latitudes),
+        _little_endian(longitudes),
+        _little_endian(categories),
+    ))
+
+
+def places_feed(db_sess):
+    """The current (payload, version) of the places feed; version is the payload's content hash."""
+    global _feed
+    from models.__all_models import Place
+
+    stamp = versions.stamp('places')
+    with _lock:
+        if _feed is not None and _feed[0] == stamp:
+            return _feed[1], _feed[2]
+
+    rows = db_sess.query(Place.id, Place.latitude, Place.longitude, Place.category_id).order_by(Place.id)
+    payload = build_places_feed(rows)
+    version = hashlib.sha1(payload).hexdigest()[:16]
+    with _lock:
+        _feed = (stamp, payload, version)
+    return payload, version
@@ -0,0 +1,72 @@
+import heapq
+from datetime import timedelta
+from itertools import islice
+
+from sqlalchemy import or_
+
+from db import recurrence
+from . import pagination
+from models.__all_models import Event
+
+# --- Occurrences of recurring events in time-window queries ---
+#
+# Without a time window a series is listed once, as its row. With from / to / upcoming
+# the series rows are replaced by their occurrences inside the window, merged in
+# (datetime, id) order with the single events the query reads from the index.
+# Only the series overlapping the window are loaded (ix_events_series), and only
+# the window is expanded (db/recurrence.py caches expansions).
+
+# Open-ended windows (upcoming=true, from= without to=) expand series this far ahead
+RECURRENCE_HORIZON = timedelta(days=366)
+SORT_COLUMNS = [Event.datetime, Event.id]
+
+
+def window(time_args: dict):
+    """(start, end) to expand series for, None without a time window. start may be None."""
+    if time_args['from'] is None and time_args['to'] is None:
+        return None
+    start = time_args['from']
+    end = time_args['to'] if time_args['to'] is not None else start + RECURRENCE_HORIZON
+    return start, end
+
+
+def series_in_window(query, start, end):
+    """The recurring rows of the (filtered, not yet time-limited) query that have occurrences in the window."""
+    query = query.filter(Event.rrule.is_not(None), Event.datetime < end)
+    if start is not None:
+        query = query.filter(or_(Event.recurrence_end.is_(None), Event.recurrence_end >= start))
+    return query
+
+
+def expand(series, start, end, after=None) -> list:
+    """(datetime, id, event) of every occurrence in the window, ordered; after=(datetime, id) skips up to a cursor."""
+    items = []
+    for event in series:
+        for occurrence in recurrence.occurrences_between(event.rrule, event.datetime, start, end):
+            if after is None or (occurrence, event.id) > tuple(after):
+                items.append((occurrence, event.id, event))
+    items.sort(key=lambda item: item[:2])
+    return items
+
+
+def merge(singles, occurrences):
+    """Single events (already in (datetime, id) order) and occurrences as one ordered stream."""
+    return heapq.merge(((event.datetime, event.id, event) for event in singles), occurrences,
+                       key=lambda item: item[:2])
+
+
+def offset_page(singles_query, occurrences: list, page: int, per_page: int) -> list:
+    offset = (page - 1) * per_page
+    # No more singles than the page's end can precede it
+    singles = singles_query.order_by(*SORT_COLUMNS).limit(offset + per_page)
+    return list(islice(merge(singles, occurrences), offset, offset + per_page))
+
+
+def keyset_page(singles_query, series, start, end, cursor_values, per_page: int):
+    """Like pagination.keyset_page over the merged stream: (items, next_cursor)."""
+    singles, more_singles = pagination.keyset_page(singles_query, SORT_COLUMNS, cursor_values, per_page)
+    items = list(islice(merge(singles, expand(series, start, end, cursor_values)), per_page + 1))
+    has_more = len(items) > per_page or more_singles is not None
+    items = items[:per_page]
+    next_cursor = pagination.encode_cursor(list(items[-1][:2])) if has_more and items else None
+    return items, next_cursor
@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, DateTime
+
+
+# --- Keyset (cursor) pagination ---
+#
+# Instead of OFFSET, a page continues right after the sort key of the previous page's
+# last row: WHERE (sort key) > (last key) ORDER BY sort key LIMIT per_page.
+# With an index on the sort key every page is a range scan, no matter how deep.
+# The cursor handed to the client is the last key, JSON encoded and base64url'd.
+
+DEFAULT_PER_PAGE = 10
+MAX_PER_PAGE = 1000
+
+
+def parse_page_args(args):
+    """(page, per_page) of the query string; raises ValueError with a message for the client."""
+    page = args.get('page', default=1, type=int)
+    per_page = args.get('per_page', default=DEFAULT_PER_PAGE, type=int)
+    if page < 1:
+        raise ValueError("'page' must be a positive integer.")
+    if not 1 <= per_page <= MAX_PER_PAGE:
+        raise ValueError(f"'per_page' must be between 1 and {MAX_PER_PAGE}.")
+    return page, per_page
+
+
+def encode_cursor(values: list) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_columns: list) -> list:
+    """Raises ValueError if the cursor wasn't produced by encode_cursor for these columns."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(sort_columns):
+        raise ValueError("Cursor doesn't match the sort key")
+
+    decoded = []
+    for column, value in zip(sort_columns, values):
+        if value is not None and isinstance(column.type, DateTime):
+            if not isinstance(value, str):
+                raise ValueError("Cursor doesn't match the sort key")
+            value = datetime.fromisoformat(value)
+        elif value is not None and not isinstance(value, (int, float, str)):
+            raise ValueError("Cursor doesn't match the sort key")
+        decoded.append(value)
+    return decoded
+
+
+def _after(sort_columns: list, values: list):
+    """
+    Lexicographic "row > key" predicate, NULLs sort first (as in SQLite):
+    (c1 > v1) OR (c1 = v1 AND c2 > v2) OR ...
+    """
+    alternatives = []
+    for i, (column, value) in enumerate(zip(sort_columns, values)):
+        equal_prefix = [c.is_(None) if v is None else c == v for c, v in zip(sort_columns[:i], values[:i])]
+        greater = column.is_not(None) if value is None else column > value
+        alternatives.append(and_(*equal_prefix, greater))
+    return or_(*alternatives)
+
+
+def keyset_page(query, sort_columns: list, cursor_values, per_page: int):
+    """
+    Fetches one page ordered by sort_columns, starting after cursor_values (None = first page).
+    Returns (rows, next_cursor), next_cursor is None on the last page.
+    """
+    query = query.order_by(*sort_columns)
+    if cursor_values is not None:
+        query = query.filter(_after(sort_columns, cursor_values))
+
+    # One extra row tells whether there is a next page without a COUNT
+    rows = query.limit(per_page + 1).all()
+    if len(rows) <= per_page:
+        return rows, None
+
+    rows = rows[:per_page]
+    last = rows[-1]
+    next_cursor = encode_cursor([getattr(last, column.key) for column in sort_columns])
+    return rows, next_cursor
@@ -1,38 +1,88 @@
-from flask import Blueprint, jsonify, request
-from sqlalchemy.orm import joinedload
-from sqlalchemy import exc, or_
-
-from db import db_session
-from models.__all_models import Place, PlaceCategory, Event  # Event is imported for the /places/<id>/events route
+from flask import Blueprint, current_app, jsonify, redirect, request, url_for
+from sqlalchemy import exc, false
+
+from db import db_session, fts
+from db.normalize import build_search_key
+from . import pagination, serializers, streaming, counts, geo, clusters, map_feed, timerange, occurrences, bulk
+from app import cache, images
+from app.cache import cached
+from .categories import subtree_ids, is_in_subtree, build_tree
+from models.__all_models import Place, PlaceCategory, PlaceCategoryClosure, Event  # Event is imported for the /places/<id>/events route
+from models.loading import eager_options
+from models.places import parse_position
 
 # Create a Blueprint specifically for Place-related APIs
 places_api_bp = Blueprint('places_api', __name__, url_prefix='/api')
 
 
+def place_to_dict(row, serializer, near=None):
+    """The serialized row, plus 'distance' in meters when searching near a point"""
+    place_data = serializer.to_dict(row)
+    if near is not None:
+        place_data['distance'] = geo.distance(
+            serializer.value(row, Place.latitude), serializer.value(row, Place.longitude), near)
+    return place_data
+
+
+def places_to_dicts(rows, serializer, near=None):
+    return [place_to_dict(row, serializer, near) for row in rows]
+
+
+def position_from_json(data: dict, current=(None, None)):
+    """
+    (latitude, longitude) from either numeric 'latitude' / 'longitude' or the
+    "lat,lng" 'position' string; fields that aren't sent keep their current value.
+    Raises ValueError for invalid coordinates.
+    """
+    if 'latitude' in data or 'longitude' in data:
+        latitude, longitude = data.get('latitude', current[0]), data.get('longitude', current[1])
+        if latitude is None and longitude is None:
+            return None, None
+        return parse_position((latitude, longitude))
+    if 'position' in data:
+        return parse_position(data['position'])
+    return current
+
+
 # GET a specific Place by ID
 @places_api_bp.route('/places/<int:place_id>', methods=['GET'])
+@cached("place:{place_id}", "place_categories")
 def get_place_by_id(place_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
-        place = db_sess.query(Place).options(joinedload(Place.category)).get(place_id)
+        place = db_sess.get(Place, place_id, options=eager_options(Place))
         if not place:
             return jsonify({"message": "Place not found."}), 404
         return jsonify(place.to_dict()), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving place: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # GET Places: Find, filter, search, and paginate place data
 @places_api_bp.route('/places', methods=['GET'])
+@cached("places:list", "place_categories")
 def find_places():
     """
     Query string parameters:
         page (int, optional): The page number to retrieve. Default is 1.
-        per_page (int, optional): The number of items per page. Default is 10.
+        per_page (int, optional): The number of items per page, 1 to 1000. Default is 10.
         search (str, optional): A keyword to search for in place names or descriptions.
-        categories (str, optional): A comma-separated string of categories names to filter by.
+        categories (str, optional): A comma-separated string of categories names to filter by,
+            a category matches together with all of its subcategories.
+        cursor (str, optional): Switches to keyset pagination. Pass an empty value for the first page
+            and 'next_cursor' of the previous response afterwards. Results are ordered by id
+            (search only filters), 'page' is ignored and no totals are computed.
+        include_total (str, optional): 'false' skips counting, the totals are returned as null.
+        total (str, optional): 'estimate' allows a cached or capped (approximate) total.
+        bbox (str, optional): 'min_lng,min_lat,max_lng,max_lat' (Leaflet's toBBoxString()), only places inside it.
+        near (str, optional): 'lat,lng', only places within 'radius' of it. Adds 'distance' (meters) to every place.
+        radius (float, optional): Radius for 'near' in meters. Default is 1000.
+        sort (str, optional): 'distance' orders by distance from 'near', nearest first.
+        fields (str, optional): A comma-separated list of the place fields to return
+            (e.g. 'id,name,position'), all fields by default.
+        stream (str, optional): 'true' (or the header Accept: application/x-ndjson) streams the
+            places as NDJSON, one place per line, without totals. All matching places are sent
+            unless 'per_page' is given, 'cursor' is ignored.
 
     Returns:
         JSON: A JSON object containing:
@@ -41,82 +91,215 @@ def find_places():
             - 'page' (int): The current page number.
             - 'per_page' (int): The number of items requested per page.
             - 'total_pages' (int): The total number of pages available.
+            - 'total_estimated' (bool): True if the totals are approximate.
+        In cursor mode:
+            - 'places' (list), 'per_page' (int)
+            - 'next_cursor' (str | null): Cursor of the next page, null on the last page.
         Status Code:
             200 OK: If places are successfully retrieved.
+            400 Bad Request: If the paging parameters, the cursor, a spatial parameter or a field name is invalid.
             500 Internal Server Error: If an unexpected error occurs during retrieval.
     """
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
-        query = db_sess.query(Place).options(joinedload(Place.category))
+        query = db_sess.query(Place)
 
         # Apply categories filtering
+        categories_list = []
         categories_param = request.args.get('categories')
         if categories_param:
             categories_list = [c.strip() for c in categories_param.split(',')]
-            # Join with PlaceCategory table and filter by category name
-            query = query.join(Place.category).filter(PlaceCategory.name.in_(categories_list))
-
-        # Apply search filtering by name or description
-        search_query = request.args.get('search')
-        if search_query:
-            search_pattern = f"%{search_query.lower()}%"
-            # Use ilike for case-insensitive search
+            # Expand every named category to its whole subtree through the closure table
             query = query.filter(
-                or_(
-                    Place.name.ilike(search_pattern),
-                    Place.description.ilike(search_pattern)
-                )
+                Place.category_id.in_(subtree_ids(PlaceCategory, PlaceCategoryClosure, categories_list))
             )
 
-        # Pagination
-        page = request.args.get('page', default=1, type=int)
-        per_page = request.args.get('per_page', default=10, type=int)
-
-        total_places = query.count()
-        places = query.offset((page - 1) * per_page).limit(per_page).all()
-        places_dicts = [place.to_dict() for place in places]
+        # Apply search filtering by name or description (FTS5 index, best bm25 matches first)
+        matches = None
+        search_query = request.args.get('search', '').strip()
+        if search_query:
+            matches = fts.match_subquery(Place.__tablename__, search_query)
+            if matches is not None:
+                query = query.join(matches, matches.c.rowid == Place.id)
+            else:
+                # Nothing searchable in it ('-', '"'): it matches no rows, not every row
+                query = query.filter(false())
+
+        # Apply bbox / radius filtering (R*Tree index)
+        try:
+            spatial_args = geo.parse_spatial_args(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        query, distance_order = geo.apply_spatial_filters(
+            query, Place.id, Place.latitude, Place.longitude, spatial_args)
+
+        # Only the columns of the requested fields are selected (plus the sort key and coordinates for distances)
+        try:
+            fields = serializers.parse_fields(request.args, serializers.PLACE_FIELDS)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        hidden_columns = [(Place.id, None)]
+        if spatial_args['near'] is not None:
+            hidden_columns += [(Place.latitude, None), (Place.longitude, None)]
+        serializer = serializers.RowSerializer(Place, serializers.PLACE_FIELDS, fields, hidden_columns)
 
-        total_pages = (total_places + per_page - 1) // per_page
+        # Pagination
+        try:
+            page, per_page = pagination.parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        # Keyset pagination: range scan on the primary key, no COUNT
+        stream = streaming.wants_stream(request)
+        cursor_param = request.args.get('cursor')
+        if cursor_param is not None and not stream:
+            sort_columns = [Place.id]
+            try:
+                cursor_values = pagination.decode_cursor(cursor_param, sort_columns) if cursor_param else None
+            except ValueError:
+                return jsonify({"message": "Invalid cursor."}), 400
+
+            rows, next_cursor = pagination.keyset_page(serializer.select(query), sort_columns, cursor_values, per_page)
+            return jsonify({
+                "places": places_to_dicts(rows, serializer, spatial_args['near']),
+                "per_page": per_page,
+                "next_cursor": next_cursor
+            }), 200
+
+        if spatial_args['sort_by_distance']:
+            query = query.order_by(distance_order, Place.id)
+        elif matches is not None:
+            query = query.order_by(matches.c.rank, Place.id)
+
+        # NDJSON: rows are read in batches and written out as they come
+        if stream:
+            if not spatial_args['sort_by_distance'] and matches is None:
+                query = query.order_by(Place.id)
+            rows = serializer.select(query)
+            if 'per_page' in request.args:
+                rows = rows.offset((page - 1) * per_page).limit(per_page)
+            near = spatial_args['near']
+            return streaming.ndjson_response(
+                place_to_dict(row, serializer, near) for row in rows.yield_per(streaming.YIELD_PER))
+
+        # Exact totals come from the count cache unless a write happened since
+        count_key = counts.filter_key('places', categories_list, fts.build_match_query(search_query) or search_query,
+                                      **geo.cache_key_args(spatial_args))
+        total_places, total_estimated = counts.total_for(
+            query, count_key, ('places', 'place_categories'), counts.total_mode(request.args))
+        rows = serializer.select(query).offset((page - 1) * per_page).limit(per_page).all()
+        places_dicts = places_to_dicts(rows, serializer, spatial_args['near'])
+
+        total_pages = (total_places + per_page - 1) // per_page if total_places is not None else None
 
         return jsonify({
             "places": places_dicts,
             "total_places": total_places,
             "page": page,
             "per_page": per_page,
-            "total_pages": total_pages
+            "total_pages": total_pages,
+            "total_estimated": total_estimated
         }), 200
 
     except Exception as e:
         # Log the error for debugging purposes (consider using Flask's current_app.logger)
         print(f"Error in get_all_places: {e}")
         return jsonify({"message": f"Error retrieving places: {str(e)}"}), 500
-    finally:
-        db_sess.close()
+
+
+# GET Place clusters for the map
+@places_api_bp.route('/places/clusters', methods=['GET'])
+@cached("places:list")
+def get_place_clusters():
+    """
+    Query string parameters:
+        zoom (int, required): The map zoom level, places are grouped into cells of
+            about 64x64 pixels at that zoom.
+        bbox (str, optional): 'min_lng,min_lat,max_lng,max_lat', only clusters inside it.
+    Returns: [{"latitude", "longitude", "count"}], the position being the cluster's centroid.
+    """
+    db_sess = db_session.create_reader_session()
+    try:
+        zoom = request.args.get('zoom', type=int)
+        if zoom is None:
+            return jsonify({"message": "'zoom' must be an integer."}), 400
+        try:
+            spatial_args = geo.parse_spatial_args(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        return jsonify(clusters.place_clusters.clusters(db_sess, zoom, spatial_args['bbox'])), 200
+    except Exception as e:
+        return jsonify({"message": f"Error retrieving place clusters: {str(e)}"}), 500
+
+
+# GET the compact map feed of all places (see app/api/map_feed.py for the format)
+@places_api_bp.route('/places/map', methods=['GET'])
+def get_places_map():
+    """Redirects to the current version of the feed; always revalidated."""
+    db_sess = db_session.create_reader_session()
+    try:
+        _, version = map_feed.places_feed(db_sess)
+        response = redirect(url_for('api.places_api.get_places_map_version', version=version))
+        response.cache_control.no_cache = True
+        return response
+    except Exception as e:
+        return jsonify({"message": f"Error retrieving the places map: {str(e)}"}), 500
+
+
+@places_api_bp.route('/places/map/<version>.bin', methods=['GET'])
+def get_places_map_version(version):
+    """A version of the feed never changes, so it's cached for a year; outdated versions redirect."""
+    db_sess = db_session.create_reader_session()
+    try:
+        payload, current = map_feed.places_feed(db_sess)
+        if version != current:
+            response = redirect(url_for('api.places_api.get_places_map_version', version=current))
+            response.cache_control.no_cache = True
+            return response
+
+        response = current_app.response_class(payload, mimetype='application/octet-stream')
+        response.set_etag(current)
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({"message": f"Error retrieving the places map: {str(e)}"}), 500
 
 
 # POST (Create) a new Place
 @places_api_bp.route('/places', methods=['POST'])
 def create_place():
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
         data = request.json
         if not all(k in data for k in ['name', 'category_id']):
             return jsonify({"message": "Missing required fields: 'name' and 'category_id'."}), 400
 
+        try:
+            latitude, longitude = position_from_json(data)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
         new_place = Place(
             name=data['name'],
             description=data.get('description'),
-            position=data.get('position'),
+            latitude=latitude,
+            longitude=longitude,
             address=data.get('address'),
             category_id=data['category_id']
         )
         db_sess.add(new_place)
         db_sess.commit()
+        clusters.place_clusters.move(new_place.id, latitude, longitude)
+        clusters.event_clusters.relocate(new_place.id, latitude, longitude)
+        cache.invalidate('places:list')
 
         # After commit, to ensure category relationship is available for .to_dict()
         # and to include the new ID, it's safest to refetch or manually construct response.
         # Refetching ensures all relationships are loaded for the new object.
-        place_response = db_sess.query(Place).options(joinedload(Place.category)).get(new_place.id)
+        place_response = db_sess.get(Place, new_place.id, options=eager_options(Place))
 
         return jsonify(place_response.to_dict()), 201  # 201 Created
     except exc.IntegrityError:
@@ -126,27 +309,231 @@ def create_place():
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error creating place: {str(e)}"}), 500
-    finally:
-        db_sess.close()
+
+
+# POST (Create) many Places at once
+@places_api_bp.route('/places/bulk', methods=['POST'])
+def create_places_bulk():
+    """
+    Body: a JSON array of place objects (as for POST /api/places) or NDJSON.
+    Query string parameters:
+        atomic (str, optional): 'true' creates nothing unless every item is valid.
+    Returns: {"created", "failed", "results": [{"index", "status", "id" | "message"}]}
+    """
+    db_sess = db_session.create_writer_session()
+    try:
+        try:
+            items = bulk.parse_items(request)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        category_ids = bulk.existing_ids(
+            db_sess, PlaceCategory.id, (item.get('category_id') for item in items if isinstance(item, dict)))
+        rows, errors = [], {}
+        for index, data in enumerate(items):
+            if not isinstance(data, dict):
+                errors[index] = "Item must be a JSON object."
+                continue
+            if not isinstance(data.get('name'), str) or not data['name'].strip():
+                errors[index] = "Missing required field: 'name'."
+                continue
+            if data.get('category_id') not in category_ids:
+                errors[index] = "Missing or unknown 'category_id'."
+                continue
+            try:
+                latitude, longitude = position_from_json(data)
+            except ValueError as e:
+                errors[index] = str(e)
+                continue
+            rows.append({
+                'name': data['name'],
+                'description': data.get('description'),
+                'latitude': latitude,
+                'longitude': longitude,
+                'address': data.get('address'),
+                'category_id': data['category_id'],
+                'image_url': data.get('image_url'),
+                'search_key': build_search_key(data['name'], data.get('description')),
+            })
+
+        if errors and request.args.get('atomic', '').lower() in ('true', '1', 'yes'):
+            return jsonify(bulk.results(items, errors, None)), 400
+
+        bulk.fill_image_columns(rows)
+        ids = bulk.insert_rows(db_sess, Place, rows)
+        db_sess.commit()
+        if ids:
+            # The cluster index sees the places counter jump by more than one write and rebuilds on its next use
+            cache.invalidate('places:list')
+            # Derivatives of the new images are made in the background, not on the first page view
+            for image_url in {row['image_url'] for row in rows if row['image_url']}:
+                images.warm(image_url)
+        return jsonify(bulk.results(items, errors, ids)), 200
+    except exc.IntegrityError:
+        db_sess.rollback()
+        return jsonify({"message": "Integrity error: nothing was created."}), 400
+    except Exception as e:
+        db_sess.rollback()
+        return jsonify({"message": f"Error creating places: {str(e)}"}), 500
+
+
+# PUT (Update) many Places at once
+@places_api_bp.route('/places/bulk', methods=['PUT'])
+def update_places_bulk():
+    """
+    Body: a JSON array (or NDJSON) of {"id", ...fields to change}, fields as for POST /api/places/bulk.
+    Query string parameters:
+        atomic (str, optional): 'true' updates nothing unless every item is valid.
+    Returns: {"updated", "failed", "results": [{"index", "status", "id" | "message"}]}
+    """
+    db_sess = db_session.create_writer_session()
+    try:
+        try:
+            items = bulk.parse_items(request)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        objects = [item for item in items if isinstance(item, dict)]
+        current = bulk.current_rows(
+            db_sess, [Place.id, Place.name, Place.description, Place.latitude, Place.longitude,
+                      Place.address, Place.category_id, Place.image_url, Place.image_digest, Place.image_width],
+            (bulk.item_id(item) for item in objects if bulk.item_id(item) is not None))
+        category_ids = bulk.existing_ids(
+            db_sess, PlaceCategory.id, (item['category_id'] for item in objects if 'category_id' in item))
+        rows, errors, seen = [], {}, set()
+        for index, data in enumerate(items):
+            place_id = bulk.item_id(data) if isinstance(data, dict) else None
+            if place_id is None:
+                errors[index] = "Item must be a JSON object with an integer 'id'."
+                continue
+            if place_id not in current:
+                errors[index] = (404, "Place not found.")
+                continue
+            if place_id in seen:
+                errors[index] = "Duplicate 'id' in the request."
+                continue
+            old = current[place_id]
+            if 'name' in data and (not isinstance(data['name'], str) or not data['name'].strip()):
+                errors[index] = "'name' must be a non-empty string."
+                continue
+            if 'category_id' in data and data['category_id'] not in category_ids:
+                errors[index] = "Unknown 'category_id'."
+                continue
+            try:
+                latitude, longitude = position_from_json(data, (old.latitude, old.longitude))
+            except ValueError as e:
+                errors[index] = str(e)
+                continue
+            seen.add(place_id)
+            name = data.get('name', old.name)
+            description = data.get('description', old.description)
+            rows.append({
+                'id': place_id,
+                'name': name,
+                'description': description,
+                'latitude': latitude,
+                'longitude': longitude,
+                'address': data.get('address', old.address),
+                'category_id': data.get('category_id', old.category_id),
+                'image_url': data.get('image_url', old.image_url),
+                'search_key': build_search_key(name, description),
+            })
+
+        if errors and request.args.get('atomic', '').lower() in ('true', '1', 'yes'):
+            return jsonify(bulk.results(items, errors, None, 200, "updated")), 400
+
+        bulk.fill_image_columns(rows, current)
+        ids = bulk.update_rows(db_sess, Place, rows)
+        db_sess.commit()
+        if ids:
+            # The cluster index sees the places counter jump by more than one write and rebuilds on its next use
+            cache.invalidate('places:list', *(f'place:{place_id}' for place_id in ids))
+            for image_url in {row['image_url'] for row in rows
+                              if row['image_url'] and row['image_url'] != current[row['id']].image_url}:
+                images.warm(image_url)
+        return jsonify(bulk.results(items, errors, ids, 200, "updated")), 200
+    except exc.IntegrityError:
+        db_sess.rollback()
+        return jsonify({"message": "Integrity error: nothing was updated."}), 400
+    except Exception as e:
+        db_sess.rollback()
+        return jsonify({"message": f"Error updating places: {str(e)}"}), 500
+
+
+# DELETE many Places at once
+@places_api_bp.route('/places/bulk', methods=['DELETE'])
+def delete_places_bulk():
+    """
+    Body: a JSON array (or NDJSON) of place ids, or of {"id"} objects.
+    Query string parameters:
+        atomic (str, optional): 'true' deletes nothing unless every item can be deleted.
+    Places that still have events are refused (409), like DELETE /api/places/<id>.
+    Returns: {"deleted", "failed", "results": [{"index", "status", "id" | "message"}]}
+    """
+    db_sess = db_session.create_writer_session()
+    try:
+        try:
+            items = bulk.parse_items(request)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        requested = [bulk.item_id(item) for item in items]
+        existing = bulk.existing_ids(db_sess, Place.id, requested)
+        with_events = bulk.existing_ids(db_sess, Event.place_id, existing)
+        ids, errors, seen = [], {}, set()
+        for index, place_id in enumerate(requested):
+            if place_id is None:
+                errors[index] = "Item must be a place id or a JSON object with an integer 'id'."
+            elif place_id not in existing:
+                errors[index] = (404, "Place not found.")
+            elif place_id in seen:
+                errors[index] = "Duplicate 'id' in the request."
+            elif place_id in with_events:
+                errors[index] = (409, "Cannot delete place due to existing related events. Delete related events first.")
+            else:
+                seen.add(place_id)
+                ids.append(place_id)
+
+        if errors and request.args.get('atomic', '').lower() in ('true', '1', 'yes'):
+            return jsonify(bulk.results(items, errors, None, 200, "deleted")), 400
+
+        ids = bulk.delete_rows(db_sess, Place, ids)
+        db_sess.commit()
+        if ids:
+            # The cluster index sees the places counter jump by more than one write and rebuilds on its next use
+            cache.invalidate('places:list', *(f'place:{place_id}' for place_id in ids))
+        return jsonify(bulk.results(items, errors, ids, 200, "deleted")), 200
+    except exc.IntegrityError:
+        db_sess.rollback()
+        return jsonify({"message": "Integrity error: nothing was deleted."}), 400
+    except Exception as e:
+        db_sess.rollback()
+        return jsonify({"message": f"Error deleting places: {str(e)}"}), 500
 
 
 # PUT (Update) an existing Place
 @places_api_bp.route('/places/<int:place_id>', methods=['PUT'])
 def update_place(place_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
         data = request.json
         # Eager load category for the embedded category in to_dict for the response
-        place = db_sess.query(Place).options(joinedload(Place.category)).get(place_id)
+        place = db_sess.get(Place, place_id, options=eager_options(Place))
         if not place:
             return jsonify({"message": "Place not found."}), 404
 
         place.name = data.get('name', place.name)
         place.description = data.get('description', place.description)
-        place.position = data.get('position', place.position)
+        try:
+            place.latitude, place.longitude = position_from_json(data, (place.latitude, place.longitude))
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
         place.category_id = data.get('category_id', place.category_id)  # Update category_id if provided
 
         db_sess.commit()
+        clusters.place_clusters.move(place_id, place.latitude, place.longitude)
+        clusters.event_clusters.relocate(place_id, place.latitude, place.longitude)
+        cache.invalidate(f'place:{place_id}', 'places:list')
         return jsonify(place.to_dict()), 200
     except exc.IntegrityError:
         db_sess.rollback()
@@ -154,21 +541,22 @@ def update_place(place_id):
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error updating place: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # DELETE a Place
 @places_api_bp.route('/places/<int:place_id>', methods=['DELETE'])
 def delete_place(place_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
-        place = db_sess.query(Place).get(place_id)
+        place = db_sess.get(Place, place_id)
         if not place:
             return jsonify({"message": "Place not found."}), 404
 
         db_sess.delete(place)
         db_sess.commit()
+        clusters.place_clusters.move(place_id)
+        clusters.event_clusters.move(place_id)  # no events are left at a deleted place
+        cache.invalidate(f'place:{place_id}', 'places:list')
         return jsonify({"message": f"Place {place_id} deleted successfully."}), 200
     except exc.IntegrityError:
         db_sess.rollback()
@@ -178,78 +566,109 @@ def delete_place(place_id):
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error deleting place: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # GET all Events for a specific Place
 @places_api_bp.route('/places/<int:place_id>/events', methods=['GET'])
+@cached("place:{place_id}", "place_events:{place_id}", "event_categories")
 def get_events_for_place(place_id):
-    db_sess = db_session.create_session()
+    """
+    The place's events in chronological order.
+    Query string parameters: from, to, upcoming (see GET /api/events); within such a window
+    a recurring event is listed once per occurrence.
+    """
+    db_sess = db_session.create_reader_session()
     try:
-        place = db_sess.query(Place).get(place_id)
+        try:
+            time_args = timerange.parse_time_args(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        place = db_sess.get(Place, place_id)
         if not place:
             return jsonify({"message": "Place not found."}), 404
 
-        # Load events for this specific place, eager load their categories for to_dict
-        events = db_sess.query(Event).filter_by(place_id=place_id).options(
-            joinedload(Event.category)
-        ).all()
-
+        # Load events for this specific place, eager load their categories for to_dict.
+        # A range scan of ix_events_place_datetime, already in datetime order
+        query = db_sess.query(Event).filter_by(place_id=place_id).options(*eager_options(Event))
+
+        # Within a time window recurring series are listed once per occurrence
+        window = occurrences.window(time_args)
+        if window is not None:
+            series = occurrences.series_in_window(query, *window).all()
+            singles = timerange.apply_time_filters(
+                query.filter(Event.rrule.is_(None)), Event.datetime, time_args).order_by(Event.datetime, Event.id)
+            event_dicts = []
+            for occurrence, _, event in occurrences.merge(singles, occurrences.expand(series, *window)):
+                event_data = event.to_dict()
+                event_data['datetime'] = occurrence
+                event_dicts.append(event_data)
+            return jsonify(event_dicts), 200
+
+        events = query.order_by(Event.datetime, Event.id).all()
         return jsonify([event.to_dict() for event in events]), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving events for place {place_id}: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # GET basic categories (where parent_id is null)
 @places_api_bp.route('/place_categories/basic', methods=['GET'])
+@cached("place_categories")
 def get_basic_categories():
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
-        basic_categories = db_sess.query(PlaceCategory).filter(PlaceCategory.parent_id.is_(None)).all()
+        basic_categories = db_sess.query(PlaceCategory).options(
+            *eager_options(PlaceCategory)
+        ).filter(PlaceCategory.parent_id.is_(None)).all()
         return jsonify([category.to_dict() for category in basic_categories]), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving basic categories: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # --- PlaceCategory API Endpoints ---
 
 # GET all PlaceCategories
 @places_api_bp.route('/place_categories', methods=['GET'])
+@cached("place_categories")
 def get_all_place_categories():
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
-        categories = db_sess.query(PlaceCategory).all()
+        categories = db_sess.query(PlaceCategory).options(*eager_options(PlaceCategory)).all()
         return jsonify([category.to_dict() for category in categories]), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving place categories: {str(e)}"}), 500
-    finally:
-        db_sess.close()
+
+
+# GET the whole PlaceCategory tree (one query)
+@places_api_bp.route('/place_categories/tree', methods=['GET'])
+@cached("place_categories")
+def get_place_category_tree():
+    db_sess = db_session.create_reader_session()
+    try:
+        all_categories = db_sess.query(PlaceCategory).order_by(PlaceCategory.id).all()
+        return jsonify(build_tree(all_categories)), 200
+    except Exception as e:
+        return jsonify({"message": f"Error retrieving place category tree: {str(e)}"}), 500
 
 
 # GET a specific PlaceCategory by ID
 @places_api_bp.route('/place_categories/<int:category_id>', methods=['GET'])
+@cached("place_categories")
 def get_place_category_by_id(category_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_reader_session()
     try:
-        category = db_sess.query(PlaceCategory).get(category_id)
+        category = db_sess.get(PlaceCategory, category_id, options=eager_options(PlaceCategory))
         if not category:
             return jsonify({"message": "Place category not found."}), 404
         return jsonify(category.to_dict()), 200
     except Exception as e:
         return jsonify({"message": f"Error retrieving place category: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # POST (Create) a new PlaceCategory
 @places_api_bp.route('/place_categories', methods=['POST'])
 def create_place_category():
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
         data = request.json
         if not 'name' in data:
@@ -261,6 +680,7 @@ def create_place_category():
         )
         db_sess.add(new_category)
         db_sess.commit()
+        cache.invalidate('place_categories')
         return jsonify(new_category.to_dict()), 201
     except exc.IntegrityError as e:
         db_sess.rollback()
@@ -270,24 +690,27 @@ def create_place_category():
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error creating place category: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # PUT (Update) an existing PlaceCategory
 @places_api_bp.route('/place_categories/<int:category_id>', methods=['PUT'])
 def update_place_category(category_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
         data = request.json
-        category = db_sess.query(PlaceCategory).get(category_id)
+        category = db_sess.get(PlaceCategory, category_id, options=eager_options(PlaceCategory))
         if not category:
             return jsonify({"message": "Place category not found."}), 404
 
+        parent_id = data.get('parent_id', category.parent_id)
+        if parent_id is not None and is_in_subtree(db_sess, PlaceCategoryClosure, category.id, parent_id):
+            return jsonify({"message": "A category can't be moved under itself or its own subcategory."}), 400
+
         category.name = data.get('name', category.name)
-        category.parent_id = data.get('parent_id', category.parent_id)
+        category.parent_id = parent_id
 
         db_sess.commit()
+        cache.invalidate('place_categories')
         return jsonify(category.to_dict()), 200
     except exc.IntegrityError as e:
         db_sess.rollback()
@@ -297,21 +720,20 @@ def update_place_category(category_id):
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error updating place category: {str(e)}"}), 500
-    finally:
-        db_sess.close()
 
 
 # DELETE a PlaceCategory
 @places_api_bp.route('/place_categories/<int:category_id>', methods=['DELETE'])
 def delete_place_category(category_id):
-    db_sess = db_session.create_session()
+    db_sess = db_session.create_writer_session()
     try:
-        category = db_sess.query(PlaceCategory).get(category_id)
+        category = db_sess.get(PlaceCategory, category_id)
         if not category:
             return jsonify({"message": "Place category not found."}), 404
 
         db_sess.delete(category)
         db_sess.commit()
+        cache.invalidate('place_categories')
         return jsonify({"message": f"Place category {category_id} deleted successfully."}), 200
     except exc.IntegrityError:
         db_sess.rollback()
@@ -320,5 +742,3 @@ def delete_place_category(category_id):
     except Exception as e:
         db_sess.rollback()
         return jsonify({"message": f"Error deleting place category: {str(e)}"}), 500
-    finally:
-        db_sess.close()
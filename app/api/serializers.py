@@ -0,0 +1,134 @@
+from db.derivatives import srcset
+from models.__all_models import Place, PlaceCategory, Event, EventCategory
+
+# --- Column-based serialization of the list endpoints ---
+#
+# List pages don't load ORM objects and call to_dict() per row: they select exactly the
+# columns of the requested fields (as plain rows, no identity map) and build the output
+# dicts straight from them. The field specs below produce the same shape as
+# Place.to_dict() / events_to_dicts(), ?fields= narrows them down (sparse fieldsets).
+
+
+class Field:
+    """An output field: the columns it reads and how their values become its JSON value."""
+
+    def __init__(self, *columns, build=None, join=None):
+        self.columns = columns
+        self.build = build  # None: the value of the single column
+        self.join = join  # relationship the columns come from, joined when the field is selected
+
+
+def _position(latitude, longitude):
+    """The "lat,lng" string of Place.position."""
+    if latitude is None or longitude is None:
+        return None
+    return f"{latitude},{longitude}"
+
+
+def _category(category_id, name, parent_id):
+    return {'category_id': category_id, 'category_name': name, 'category_parent_id': parent_id}
+
+
+PLACE_FIELDS = {
+    'id': Field(Place.id),
+    'name': Field(Place.name),
+    'description': Field(Place.description),
+    'position': Field(Place.latitude, Place.longitude, build=_position),
+    'latitude': Field(Place.latitude),
+    'longitude': Field(Place.longitude),
+    'address': Field(Place.address),
+    'category': Field(Place.category_id, PlaceCategory.name, PlaceCategory.parent_id,
+                      build=_category, join=Place.category),
+    'image_url': Field(Place.image_url),
+    'srcset': Field(Place.image_url, Place.image_digest, Place.image_width, build=srcset),
+}
+
+EVENT_FIELDS = {
+    'id': Field(Event.id),
+    'name': Field(Event.name),
+    'description': Field(Event.description),
+    'datetime': Field(Event.datetime),
+    'image_url': Field(Event.image_url),
+    'srcset': Field(Event.image_url, Event.image_digest, Event.image_width, build=srcset),
+    'rrule': Field(Event.rrule),
+    'place_id': Field(Event.place_id),
+    'category': Field(Event.category_id, EventCategory.name, EventCategory.parent_id,
+                      build=_category, join=Event.category),
+    'position': Field(Place.latitude, Place.longitude, build=_position, join=Event.place),
+    'latitude': Field(Place.latitude, join=Event.place),
+    'longitude': Field(Place.longitude, join=Event.place),
+}
+
+# Flat category rows (the tree endpoints nest them instead), used by the export
+CATEGORY_FIELDS = {
+    model: {'id': Field(model.id), 'name': Field(model.name), 'parent_id': Field(model.parent_id)}
+    for model in (PlaceCategory, EventCategory)
+}
+
+
+def parse_fields(args, spec: dict):
+    """The ?fields= list (None = all fields); raises ValueError for unknown names."""
+    if not args.get('fields'):
+        return None
+    names = [name.strip() for name in args['fields'].split(',') if name.strip()]
+    unknown = [name for name in names if name not in spec]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(spec)}.")
+    return names
+
+
+class RowSerializer:
+    """
+    Selects the columns of the chosen fields from a filtered query of `model` and turns
+    the rows into dicts. hidden_columns are selected too (sort keys, coordinates for
+    distances, ...) but only returned by value(). Row attributes are named like the
+    model's (row.id, row.datetime), columns of related tables as relationship_column.
+    """
+
+    def __init__(self, model, spec: dict, fields=None, hidden_columns=()):
+        self.model = model
+        self.fields = [(name, spec[name]) for name in (fields if fields is not None else spec)]
+        self.joins = []
+        self._join_ids = set()
+        self._columns = []
+        self._positions = {}  # id(column) -> index in the row
+
+        for _, field in self.fields:
+            for column in field.columns:
+                self._add(column, field.join)
+        for column, join in hidden_columns:
+            self._add(column, join)
+
+        self._plan = [(name, [self._positions[id(c)] for c in field.columns], field.build)
+                      for name, field in self.fields]
+
+    def _add(self, column, join):
+        # Mapped attributes overload ==, so they are told apart by identity
+        if join is not None and id(join) not in self._join_ids:
+            self._join_ids.add(id(join))
+            self.joins.append(join)
+        if id(column) in self._positions:
+            return
+        label = column.key if join is None else f"{join.key}_{column.key}"
+        self._positions[id(column)] = len(self._columns)
+        self._columns.append(column.label(label))
+
+    def select(self, query, joined=()):
+        """The query returning rows of the serializer's columns; `joined`: relationships the query already joined."""
+        joined_ids = {id(join) for join in joined}
+        for join in self.joins:
+            if id(join) not in joined_ids:
+                query = query.outerjoin(join)
+        return query.with_entities(*self._columns)
+
+    def value(self, row, column):
+        return row[self._positions[id(column)]]
+
+    def to_dict(self, row) -> dict:
+        data = {}
+        for name, positions, build in self._plan:
+            if build is None:
+                data[name] = row[positions[0]]
+            else:
+                data[name] = build(*(row[i] for i in positions))
+        return data
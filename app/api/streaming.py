@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+
+from flask import Blueprint, current_app, jsonify, request, stream_with_context
+
+from db import db_session
+
+from . import serializers
+from models.__all_models import Place, PlaceCategory, Event, EventCategory
+
+# --- NDJSON streaming of list results and the full export ---
+#
+# With ?stream=1 or Accept: application/x-ndjson the list endpoints write one JSON object
+# per line instead of building the whole page in memory: rows are read in batches of
+# YIELD_PER (yield_per) and encoded as they come, so memory stays flat however many
+# rows are sent. Lines are buffered into chunks of about CHUNK_BYTES per write.
+#
+# /api/export streams whole tables in the same format. It reads every table inside one
+# read transaction, so a dump taken while the site is being edited is still a consistent
+# snapshot (WAL keeps the snapshot readable while writers commit).
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+YIELD_PER = 1000
+CHUNK_BYTES = 64 * 1024
+TRUE_VALUES = ('true', '1', 'yes')
+
+# Tables of /api/export in the order they can be imported back (categories before their rows)
+EXPORT_TABLES = {
+    'place_categories': (PlaceCategory, serializers.CATEGORY_FIELDS[PlaceCategory]),
+    'places': (Place, serializers.PLACE_FIELDS),
+    'event_categories': (EventCategory, serializers.CATEGORY_FIELDS[EventCategory]),
+    'events': (Event, serializers.EVENT_FIELDS),
+}
+
+
+def wants_stream(request) -> bool:
+    """?stream=1, or an Accept header that prefers NDJSON over JSON."""
+    if request.args.get('stream', '').lower() in TRUE_VALUES:
+        return True
+    return request.accept_mimetypes.best_match(('application/json', NDJSON_MIMETYPE)) == NDJSON_MIMETYPE
+
+
+def ndjson_chunks(records):
+    dumps = current_app.json.dumps
+    lines, size = [], 0
+    for record in records:
+        line = dumps(record) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(lines).encode('utf-8')
+            lines, size = [], 0
+    if lines:
+        yield ''.join(lines).encode('utf-8')
+
+
+def ndjson_response(records, filename=None):
+    """Streamed response of an iterable of dicts, consumed lazily while the response is sent."""
+    response = current_app.response_class(stream_with_context(ndjson_chunks(records)), mimetype=NDJSON_MIMETYPE)
+    if filename is not None:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.vary.add('Accept')
+    return response
+
+
+def parse_export_tables(args) -> list:
+    """The ?tables= list (all by default) in EXPORT_TABLES order; raises ValueError for unknown names."""
+    if not args.get('tables'):
+        return list(EXPORT_TABLES)
+    names = {name.strip() for name in args['tables'].split(',') if name.strip()}
+    unknown = names - EXPORT_TABLES.keys()
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(sorted(unknown))}. Available: {', '.join(EXPORT_TABLES)}.")
+    return [name for name in EXPORT_TABLES if name in names]
+
+
+def export_records(db_sess, tables: list):
+    """
+    A header record, then {"table": name, "row": {...}} for every row of the tables, ordered by id.
+    Every table is read from the same snapshot.
+    """
+    # pysqlite only opens transactions for writes, an explicit BEGIN makes all the SELECTs
+    # below share one read transaction. It ends with the session (rollback on teardown).
+    db_sess.connection().exec_driver_sql("BEGIN")
+    yield {"exported_at": datetime.now(timezone.utc), "tables": tables}
+    for name in tables:
+        model, spec = EXPORT_TABLES[name]
+        serializer = serializers.RowSerializer(model, spec)
+        rows = serializer.select(db_sess.query(model)).order_by(model.id).yield_per(YIELD_PER)
+        for row in rows:
+            yield {"table": name, "row": serializer.to_dict(row)}
+
+
+export_api_bp = Blueprint('export_api', __name__, url_prefix='/api')
+
+
+# GET a full export of the data as NDJSON
+@export_api_bp.route('/export', methods=['GET'])
+def export_tables():
+    """
+    Query string parameters:
+        tables (str, optional): A comma-separated list of tables to export
+            (place_categories, places, event_categories, events), all by default.
+    Returns: NDJSON, a header line {"exported_at", "tables"} and then
+        {"table": name, "row": {...}} per row, tables in the order above, rows by id.
+        Rows have the shape of the list endpoints' items (categories: id, name, parent_id).
+    """
+    try:
+        tables = parse_export_tables(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        filename = f"export-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.ndjson"
+        return ndjson_response(export_records(db_session.create_reader_session(), tables), filename)
+    except Exception as e:
+        return jsonify({"message": f"Error exporting data: {str(e)}"}), 500
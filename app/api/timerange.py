@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+# --- Time window parameters of the event list endpoints ---
+#
+# from=2025-06-14            events at or after it (a date means its midnight)
+# to=2025-06-15              events before it; a date without a time includes that whole day
+# upcoming=true              events from now on
+#
+# Event.datetime is stored as naive UTC, aware values are converted to it.
+# Each filter is a plain range on the column, served by the datetime indexes.
+
+TRUE_VALUES = ('true', '1', 'yes')
+
+
+def naive_utc(value: datetime) -> datetime:
+    """The naive UTC form Event.datetime is stored in; naive values are taken as UTC already."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _parse(value: str, name: str, end_of_day: bool) -> datetime:
+    try:
+        parsed = naive_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO date or datetime, e.g. 2025-06-14 or 2025-06-14T18:00.")
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def parse_time_args(args) -> dict:
+    """
+    Validated time window: {'from': datetime | None, 'to': datetime | None, 'upcoming': bool},
+    'from' inclusive and 'to' exclusive. Raises ValueError with a message for the client.
+    """
+    start = _parse(args['from'], 'from', False) if args.get('from') else None
+    end = _parse(args['to'], 'to', True) if args.get('to') else None
+    upcoming = args.get('upcoming', '').lower() in TRUE_VALUES
+    if upcoming:
+        now = utc_now()
+        start = max(start, now) if start is not None else now
+    if start is not None and end is not None and start > end:
+        raise ValueError("'from' must not be after 'to'.")
+    return {'from': start, 'to': end, 'upcoming': upcoming}
+
+
+def cache_key_args(time_args: dict) -> dict:
+    """For upcoming=true 'from' moves every request, the count cache keys it by the minute."""
+    start = time_args['from']
+    if start is not None and time_args['upcoming']:
+        start = start.replace(second=0, microsecond=0)
+    return {'from': start, 'to': time_args['to']}
+
+
+def apply_time_filters(query, datetime_column, time_args):
+    if time_args['from'] is not None:
+        query = query.filter(datetime_column >= time_args['from'])
+    if time_args['to'] is not None:
+        query = query.filter(datetime_column < time_args['to'])
+    return query
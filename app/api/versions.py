@@ -0,0 +1,29 @@
+import time
+
+from db import db_session
+from db.versions import read_versions
+
+# --- Per-table write counters ---
+#
+# The counters live in the database (db/versions.py) and are bumped by triggers, so
+# every worker process sees every write, including writes made by the tools.
+# Anything derived from a table (cached counts, the cluster index, the map feed,
+# feed validators) remembers the counters it was built from and is stale as soon as
+# one of them moved. Reading them is one primary key lookup on the reader connection.
+
+_started_at = time.time()
+
+
+def _read(tables) -> dict:
+    return read_versions(db_session.create_reader_session(), tables)
+
+
+def stamp(*tables: str) -> tuple:
+    """Current counters of the given tables, compare stamps to detect writes in between."""
+    current = _read(tables)
+    return tuple(current.get(table, (0, None))[0] for table in tables)
+
+
+def last_modified(*tables: str) -> float:
+    """Unix time of the latest write to any of the tables."""
+    return max((modified_at for _, modified_at in _read(tables).values()), default=_started_at)
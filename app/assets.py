@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+from app import compression
+
+# --- Fingerprinted static assets ---
+#
+# url_for('static', filename='css/base.css') gives /static/css/base.1a2b3c4d5e6f.css, the
+# name carrying a hash of the file's content. Such a URL always names the same bytes, so it
+# is sent with Cache-Control: public, max-age=1y, immutable and a browser with the page's
+# assets in its cache makes no requests for them at all. A changed file gets a new name.
+#
+# `tools/asset manifest.py` writes the names into static/manifest.json at build time; without
+# a manifest (development) they are computed on first use and recomputed when a file changes.
+# Uploads aren't fingerprinted, their URLs come from the database. Fingerprinted names are
+# served from the original files (and their .br / .gz siblings, see app/compression.py).
+
+MANIFEST_FILE = 'manifest.json'
+EXCLUDED_FOLDERS = ('uploads/',)
+EXCLUDED_SUFFIXES = ('.gz', '.br', '.tmp')
+HASH_LENGTH = 12
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# name.<hash>.ext
+FINGERPRINT = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<suffix>\.[^./]+)$' % HASH_LENGTH)
+
+
+def fingerprintable(filename: str) -> bool:
+    return (filename != MANIFEST_FILE and not filename.startswith(EXCLUDED_FOLDERS)
+            and not filename.endswith(EXCLUDED_SUFFIXES))
+
+
+def content_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted_name(filename: str, digest: str) -> str:
+    stem, suffix = os.path.splitext(filename)
+    return f"{stem}.{digest}{suffix}"
+
+
+def build_manifest(static_folder: str) -> dict:
+    """original name -> fingerprinted name of every fingerprintable file of the static folder."""
+    manifest = {}
+    for directory, _, names in os.walk(static_folder):
+        for name in names:
+            path = os.path.join(directory, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            if fingerprintable(filename):
+                manifest[filename] = fingerprinted_name(filename, content_hash(path))
+    return dict(sorted(manifest.items()))
+
+
+class AssetManifest:
+    def __init__(self):
+        self.static_folder = None
+        self.frozen = False  # True when loaded from a build-time manifest
+        self._names = {}  # original -> fingerprinted
+        self._originals = {}  # fingerprinted -> original
+        self._versions = {}  # original -> (mtime_ns, size) the name was computed from
+        self._lock = threading.Lock()
+
+    def load(self, static_folder: str):
+        self.static_folder = static_folder
+        path = os.path.join(static_folder, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                names = json.load(f)
+            with self._lock:
+                self._names = dict(names)
+                self._originals = {hashed: original for original, hashed in names.items()}
+            self.frozen = True
+
+    def _current(self, filename: str):
+        """Fingerprinted name from the file itself, None for files that don't exist."""
+        path = os.path.join(self.static_folder, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._versions.get(filename) == version:
+                return self._names[filename]
+        hashed = fingerprinted_name(filename, content_hash(path))
+        with self._lock:
+            self._versions[filename] = version
+            self._names[filename] = hashed
+            self._originals[hashed] = filename
+        return hashed
+
+    def url_name(self, filename: str) -> str:
+        """The name url_for('static') should use for a file."""
+        if not fingerprintable(filename):
+            return filename
+        if self.frozen:
+            return self._names.get(filename, filename)
+        return self._current(filename) or filename
+
+    def resolve(self, requested: str):
+        """(original name, whether the request named its current content) for a requested static filename."""
+        if not fingerprintable(requested):
+            return requested, False
+        original = self._originals.get(requested)
+        if original is None:
+            match = FINGERPRINT.match(requested)
+            if match is None:
+                return requested, False
+            original = match['stem'] + match['suffix']
+        # A fingerprint of an older version (a page cached before a deploy) gets the current file, not immutable
+        current = self._names.get(original) if self.frozen else self._current(original)
+        return original, current == requested
+
+
+asset_manifest = AssetManifest()
+
+
+def hashed_static_url(endpoint, values):
+    """url_defaults hook: url_for('static', filename=...) points to the fingerprinted name."""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = asset_manifest.url_name(values['filename'])
+
+
+def send_static(filename):
+    original, immutable = asset_manifest.resolve(filename)
+    response = compression.send_static(original)
+    if immutable and response.status_code == 200:
+        response.cache_control.no_cache = None  # send_file's default without SEND_FILE_MAX_AGE_DEFAULT
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    asset_manifest.load(app.static_folder)
+    app.url_defaults(hashed_static_url)
+    app.view_functions['static'] = send_static
@@ -0,0 +1,318 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Blueprint, current_app, g, jsonify, request
+
+from app import compression
+from db import db_session
+from db.versions import read_versions
+
+# --- Response cache for the JSON API ---
+#
+# GET views decorated with @cached store the serialized response body, keyed by
+# path + normalized query string. Every entry is labeled with tags ("place:5",
+# "places:list", ...) and remembers the tags' versions from the moment it was built.
+# Write handlers call invalidate(*tags), which bumps those versions, so exactly the
+# entries that depend on the written rows stop matching; nothing else is touched.
+# Tag versions live in the backend, so with LocalBackend only this process sees them.
+# Entries therefore also remember the database write counters (db/versions.py) of the
+# tables behind their tags: a write from another worker process or from the tools
+# makes them stale too (every entry on that table, as precise tags can't come from SQL).
+# Entries also keep their ETag and Last-Modified, conditional GETs are answered from them.
+
+# Tag prefix -> the table the tagged data is read from
+TAG_TABLES = {
+    "place": "places", "places": "places",
+    "event": "events", "events": "events", "place_events": "events",
+    "place_categories": "place_categories", "event_categories": "event_categories",
+}
+TABLE_TAG_PREFIX = "table:"
+
+
+class LocalBackend:
+    """In-process LRU with per-entry TTL, capped by entry count and total body size."""
+
+    def __init__(self, max_entries=2048, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._counters = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, size, value = item
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, size, value)
+            self._size += size
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def get_counters(self, names):
+        with self._lock:
+            return [self._counters.get(name, 0) for name in names]
+
+    def incr(self, name):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+            self._size = 0
+
+    def info(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size}
+
+
+class RedisBackend:
+    """
+    Shared backend so several worker processes see the same entries and tag versions.
+    Needs the optional `redis` package; LocalBackend stands in for it everywhere else.
+    """
+
+    def __init__(self, url, prefix="zfy:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND='redis' requires the 'redis' package") from e
+        import pickle
+        self._pickle = pickle
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + key)
+        return self._pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, size, ttl=None):
+        self._client.set(self._prefix + key, self._pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+    def get_counters(self, names):
+        if not names:
+            return []
+        return [int(value or 0) for value in self._client.mget([self._prefix + "tag:" + n for n in names])]
+
+    def incr(self, name):
+        return self._client.incr(self._prefix + "tag:" + name)
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + "*"):
+            self._client.delete(key)
+
+    def info(self):
+        return {"backend": "redis"}
+
+
+class ResponseCache:
+    def __init__(self, backend=None, ttl=300):
+        self.backend = backend or LocalBackend()
+        self.ttl = ttl
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def configure(self, backend, ttl, enabled=True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, key):
+        entry = self.backend.get(key)
+        if entry is None:
+            self._count(False)
+            return None
+        tags = entry["tags"]
+        if self.tag_versions(t for t in tags if not t.startswith(TABLE_TAG_PREFIX)) != tags:
+            self.backend.delete(key)
+            self._count(False)
+            return None
+        self._count(True)
+        return entry
+
+    def store(self, key, body: bytes, status: int, mimetype: str, tags: dict, etag: str, last_modified: float):
+        """Stores the body together with its compressed variants, hits never compress again."""
+        encoded = compression.encode_all(body, mimetype)
+        entry = {"body": body, "encoded": encoded, "status": status, "mimetype": mimetype, "tags": tags,
+                 "etag": etag, "last_modified": last_modified}
+        self.backend.set(key, entry, len(body) + sum(len(data) for data in encoded.values()), self.ttl)
+        return entry
+
+    def tag_versions(self, tags) -> dict:
+        """Versions of the tags plus the write counters of their tables (as "table:<name>"), one query."""
+        tags = list(tags)
+        versions = dict(zip(tags, self.backend.get_counters(tags)))
+        tables = sorted({TAG_TABLES[name] for name in (t.split(":")[0] for t in tags) if name in TAG_TABLES})
+        if tables:
+            current = read_versions(db_session.create_reader_session(), tables)
+            versions.update((TABLE_TAG_PREFIX + table, current.get(table, (0, None))[0]) for table in tables)
+        return versions
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr(tag)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else None,
+            **self.backend.info(),
+        }
+
+
+response_cache = ResponseCache()
+
+
+def cache_key() -> str:
+    """
+    Path + query string with parameters sorted, so ?a=1&b=2 and ?b=2&a=1 share an entry.
+    Requests negotiating NDJSON (Accept: application/x-ndjson) get a key of their own.
+    """
+    query = urlencode(sorted(request.args.items(multi=True)))
+    key = f"{request.path}?{query}"
+    if request.accept_mimetypes.best_match(("application/json", "application/x-ndjson")) == "application/x-ndjson":
+        key += "|ndjson"
+    return key
+
+
+def tag(*tags: str):
+    """Add tags to the response currently being built by a @cached view (e.g. ids known only after a query)."""
+    pending = g.get("cache_tags")
+    if pending is not None:
+        versions = response_cache.tag_versions(t for t in tags if t not in pending)
+        # Counters already read before the view's queries stay as they are
+        pending.update((name, version) for name, version in versions.items() if name not in pending)
+
+
+def invalidate(*tags: str):
+    response_cache.invalidate(*tags)
+
+
+def _set_validators(response, etag: str, last_modified: float):
+    """
+    Strong ETag (hash of the body) + Last-Modified (when this representation was built),
+    clients revalidate every time and get a bodiless 304 while nothing changed.
+    """
+    response.set_etag(etag, weak="Content-Encoding" in response.headers)
+    response.last_modified = int(last_modified)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    response.vary.add("Accept")  # the list endpoints also answer with NDJSON
+    return response.make_conditional(request)
+
+
+def cached(*tag_templates: str):
+    """
+    Cache successful responses of a GET view and answer conditional requests.
+    Tag templates are formatted with the view arguments,
+    e.g. @cached("place:{place_id}", "place_categories").
+
+    A cache hit is served (or turned into a 304 on a matching If-None-Match /
+    If-Modified-Since) without serializing anything, the only query reads the table counters.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**view_args):
+            if not response_cache.enabled:
+                response = current_app.make_response(view(**view_args))
+                if response.status_code == 200 and not response.is_streamed:
+                    _set_validators(response, hashlib.sha1(response.get_data()).hexdigest(), time.time())
+                return response
+
+            key = cache_key()
+            entry = response_cache.lookup(key)
+            if entry is not None:
+                response = current_app.response_class(entry["body"], status=entry["status"],
+                                                      mimetype=entry["mimetype"])
+                compression.apply_encoded(response, entry.get("encoded"))
+                response.headers["X-Cache"] = "HIT"
+                return _set_validators(response, entry["etag"], entry["last_modified"])
+
+            # Versions are read before the view queries anything, a write that lands
+            # in between makes the entry stale immediately instead of hiding the write
+            g.cache_tags = response_cache.tag_versions(t.format(**view_args) for t in tag_templates)
+            response = current_app.make_response(view(**view_args))
+            tags = g.pop("cache_tags")
+            response.headers["X-Cache"] = "MISS"
+
+            if response.status_code == 200 and not response.is_streamed:
+                body = response.get_data()
+                etag, last_modified = hashlib.sha1(body).hexdigest(), time.time()
+                entry = response_cache.store(key, body, response.status_code, response.mimetype, tags, etag, last_modified)
+                compression.apply_encoded(response, entry["encoded"])
+                _set_validators(response, etag, last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def init_app(app):
+    config = app.config
+    if config.get("RESPONSE_CACHE_BACKEND") == "redis":
+        backend = RedisBackend(config["RESPONSE_CACHE_REDIS_URL"])
+    else:
+        backend = LocalBackend(
+            max_entries=config.get("RESPONSE_CACHE_MAX_ENTRIES", 2048),
+            max_bytes=config.get("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+        )
+    response_cache.configure(
+        backend,
+        ttl=config.get("RESPONSE_CACHE_TTL", 300),
+        enabled=config.get("RESPONSE_CACHE_ENABLED", True),
+    )
+
+
+cache_api_bp = Blueprint('cache_api', __name__, url_prefix='/api')
+
+
+@cache_api_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify(response_cache.stats()), 200
@@ -0,0 +1,148 @@
+import gzip
+import mimetypes
+import os
+import zlib
+
+from flask import current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+# --- Negotiated compression of API responses and static assets ---
+#
+# API responses of a compressible type and at least COMPRESS_MIN_SIZE bytes are sent
+# with Content-Encoding br or gzip, whichever the client accepts (br preferred, it needs
+# the optional `brotli` package). Cached responses are compressed once when they are
+# stored (see ResponseCache.store), a cache hit sends the stored bytes as they are.
+# Streamed responses (NDJSON, feeds) are compressed chunk by chunk.
+#
+# A compressed representation gets the weak form of the body's ETag, so revalidation
+# still works (If-None-Match compares weakly) without claiming byte equality.
+#
+# For static/css and static/js, `tools/compress static.py` writes .br / .gz siblings at
+# build time, they are served in place of the original when the client accepts them.
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'application/feed+json',
+                          'text/calendar', 'text/css', 'text/javascript', 'application/javascript')
+PRECOMPRESSED_STATIC = ('css/', 'js/')
+EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+# On-the-fly levels: close to the best ratio for JSON at a fraction of the maximum's cost
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def available_encodings() -> tuple:
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(encodings=None):
+    """The best encoding of `encodings` (default: all available) the client accepts, None for identity."""
+    accepted = request.accept_encodings
+    for encoding in encodings if encodings is not None else available_encodings():
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def compressible(mimetype: str) -> bool:
+    return mimetype in COMPRESSIBLE_MIMETYPES or mimetype.startswith('text/')
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encode_all(body: bytes, mimetype: str) -> dict:
+    """{encoding: compressed body} for a response that is worth compressing, else {}."""
+    if len(body) < current_app.config.get('COMPRESS_MIN_SIZE', 1024) or not compressible(mimetype):
+        return {}
+    return {encoding: compress(body, encoding) for encoding in available_encodings()}
+
+
+def _compress_stream(chunks, encoding: str):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        for chunk in chunks:
+            # Sync flush: every chunk reaches the client as soon as it is produced
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def _mark_encoded(response, encoding: str):
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def apply_encoded(response, encoded: dict):
+    """Sends one of the precompressed variants of a stored body instead of the body, if the client accepts one."""
+    if not encoded:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(tuple(encoded))
+    if encoding is not None:
+        response.set_data(encoded[encoding])
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def compress_response(response):
+    """after_request hook of the API: compresses responses that weren't compressed yet."""
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or not compressible(response.mimetype) or request.method == 'HEAD'):
+        return response
+
+    if response.is_streamed:
+        encoding = negotiate()
+        if encoding is not None:
+            response.response = _compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+            _mark_encoded(response, encoding)
+        return response
+
+    if response.content_length is not None and response.content_length < current_app.config.get('COMPRESS_MIN_SIZE', 1024):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate()
+    if encoding is not None:
+        response.set_data(compress(response.get_data(), encoding))
+        _mark_encoded(response, encoding)
+    return response
+
+
+def send_static(filename):
+    """A static file, the .br / .gz sibling of css and js files when there is an up-to-date one (see app/assets.py)."""
+    static_folder = current_app.static_folder
+    if not filename.startswith(PRECOMPRESSED_STATIC):
+        return current_app.send_static_file(filename)
+
+    original = safe_join(static_folder, filename)
+    encoding = negotiate(('br', 'gzip'))
+    if encoding is not None and original is not None and os.path.isfile(original):
+        sibling = filename + EXTENSIONS[encoding]
+        sibling_path = os.path.join(static_folder, sibling)
+        if os.path.isfile(sibling_path) and os.path.getmtime(sibling_path) >= os.path.getmtime(original):
+            response = send_from_directory(static_folder, sibling, mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+
+    response = current_app.send_static_file(filename)
+    response.vary.add('Accept-Encoding')
+    return response
+
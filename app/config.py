@@ -1,3 +1,14 @@
 class Config:
     SECRET_KEY = 'your_secret_key_here'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Response cache for the JSON API (see app/cache.py), backend is 'local' or 'redis'
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_BACKEND = 'local'
+    RESPONSE_CACHE_REDIS_URL = 'redis://localhost:6379/0'
+    RESPONSE_CACHE_TTL = 300  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = 2048
+    RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+    # Responses of the API smaller than this are sent uncompressed (see app/compression.py)
+    COMPRESS_MIN_SIZE = 1024
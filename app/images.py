@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import Blueprint, abort, redirect, send_file, url_for
+
+from db.derivatives import (FORMATS, PIPELINE_VERSION, ROOT_DIR, VARIANTS, derivative_key, derivative_url,  # noqa: F401
+                             formats, read_source, source_path as _source_path, variant_widths)
+
+# --- Resized AVIF / WebP derivatives of uploaded images ---
+#
+# Every image under static/uploads gets fixed-width derivatives (VARIANTS) in the modern
+# formats Pillow can write (AVIF, WebP). to_dict() of places and events exposes them as
+# 'srcset': {"image/avif": "/images/... 160w, ... 480w, ...", "image/webp": "..."},
+# ready for <picture><source type=... srcset=...>, so a list card downloads a ~480px
+# image instead of the upload. Widths are never larger than the original. The URLs are
+# built from the image_digest / image_width columns of the row (db/derivatives.py).
+#
+# Derivatives are stored in CACHE_DIR under the derivative key of the source, the key is
+# also part of their URL: a URL always names the same bytes and is cached forever, a
+# changed upload gets new URLs. They are made on the first request of a derivative or
+# ahead of time (warm(), generate_all()), the encoding runs in a process pool.
+#
+# Pillow is optional: without it there is no 'srcset' and the uploads are used as they are.
+# Animated GIFs are reduced to their first frame.
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache', 'images')
+RENDER_TIMEOUT = 60  # seconds a request waits for its derivative
+WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+_lock = threading.Lock()
+_sources = {}  # absolute path -> (mtime_ns, size, key, width)
+_pending = {}  # derivative path -> Future
+_executor = None
+
+
+def source_info(image_url):
+    """(derivative key, width) of an upload as it is on disk, None if it is missing or not an image. Cached per file version."""
+    path = _source_path(image_url)
+    if path is None or Image is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    cached = _sources.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2:]
+
+    read = read_source(path)
+    if read is None:
+        return None
+    info = (derivative_key(read[0]), read[1])
+    with _lock:
+        _sources[path] = (stat.st_mtime_ns, stat.st_size) + info
+    return info
+
+
+def derivative_path(key: str, variant: str, fmt: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], f"{key}-{variant}.{fmt}")
+
+
+def render(source: str, target: str, width: int, fmt: str):
+    """Writes one derivative (runs in a worker process)."""
+    spec = FORMATS[fmt]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary = f"{target}.{os.getpid()}.tmp"
+        image.save(temporary, spec['pil'], **spec['options'])
+    os.replace(temporary, target)  # readers never see half a file
+    return target
+
+
+def _pool():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: the web server's threads and open connections aren't forked into the workers
+            _executor = ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def _submit(source: str, target: str, width: int, fmt: str):
+    global _executor
+    pool = _pool()
+    with _lock:
+        future = _pending.get(target)
+        if future is None:
+            try:
+                future = _pending[target] = pool.submit(render, source, target, width, fmt)
+            except BrokenProcessPool:
+                # A worker died (killed for memory, crashed in a codec): the next call starts a new pool
+                if _executor is pool:
+                    _executor = None
+                raise
+            future.add_done_callback(lambda _: _pending.pop(target, None))
+    return future
+
+
+def _missing(image_url):
+    """(source, target, width, fmt) of every derivative of the upload that isn't on disk yet."""
+    info = source_info(image_url)
+    if info is None:
+        return []
+    digest, width = info
+    source = _source_path(image_url)
+    return [(source, derivative_path(digest, variant, fmt), output, fmt)
+            for fmt in formats()
+            for variant, output in variant_widths(width).items()
+            if not os.path.exists(derivative_path(digest, variant, fmt))]
+
+
+def warm(image_url):
+    """Starts making the derivatives of a new or changed upload in the background."""
+    for job in _missing(image_url):
+        _submit(*job)
+
+
+def generate_all(image_urls, workers: int = WORKERS):
+    """
+    Makes every missing derivative of the uploads in a pool of its own (tools).
+    Returns (number made, image_urls that couldn't be converted).
+    """
+    jobs = [(image_url, job) for image_url in image_urls for job in _missing(image_url)]
+    made, failed = 0, set()
+    if not jobs:
+        return made, failed
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {executor.submit(render, *job): image_url for image_url, job in jobs}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                made += 1
+            except Exception:
+                failed.add(futures[future])
+    return made, failed
+
+
+images_bp = Blueprint('images', __name__)
+
+
+@images_bp.route('/images/<digest>/<variant>.<fmt>/<path:source>')
+def get_derivative(digest, variant, fmt, source):
+    if variant not in VARIANTS or fmt not in formats():
+        abort(404)
+    image_url = 'static/' + source
+    info = source_info(image_url)
+    if info is None:
+        abort(404)
+    if info[0] != digest:
+        # The upload changed since this URL was handed out
+        return redirect(derivative_url(info[0], variant, fmt, image_url))
+
+    width = variant_widths(info[1]).get(variant)
+    if width is None:
+        # Collapsed into a smaller variant (the original is narrow)
+        variant = next(v for v, w in variant_widths(info[1]).items() if w == info[1])
+        return redirect(derivative_url(digest, variant, fmt, image_url))
+    target = derivative_path(digest, variant, fmt)
+    if not os.path.exists(target):
+        try:
+            _submit(_source_path(image_url), target, width, fmt).result(timeout=RENDER_TIMEOUT)
+        except Exception:
+            # Still rendering (TimeoutError), or the encoder failed on this upload: the page gets
+            # the original for now, a later request tries again (failed renders aren't remembered)
+            response = redirect(url_for('static', filename=source))
+            response.cache_control.no_store = True
+            return response
+
+    response = send_file(target, mimetype=FORMATS[fmt]['mimetype'], conditional=True, max_age=365 * 24 * 3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,54 @@
+import json
+from datetime import date, datetime, timezone
+
+from flask.json.provider import DefaultJSONProvider
+
+# --- JSON encoding of API responses ---
+#
+# orjson (optional, `pip install orjson`) encodes several times faster than the standard
+# library; without it the same output comes from json.dumps. Either way datetimes are
+# ISO 8601 in UTC with a 'Z' ("2025-06-13T14:27:00Z"): the database stores naive UTC,
+# and Flask's default would render them as RFC 822 strings ("Fri, 13 Jun 2025 ...").
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _isoformat(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat() + 'Z'
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return _isoformat(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    sort_keys = False
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is not None:
+            option = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=_default, option=option).decode()
+            except TypeError:
+                pass  # e.g. integers beyond 64 bits, the standard library handles them
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
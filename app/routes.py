@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template
 from db import db_session
 from models.__all_models import Place
+from models.loading import eager_options
 
 bp = Blueprint('routes', __name__)
 
@@ -23,7 +24,7 @@ def place_search():
 @bp.route('/places/<int:place_id>')
 def place_details(place_id: int):
     db_sess = db_session.create_session()
-    place = db_sess.query(Place).get(place_id)
+    place = db_sess.get(Place, place_id, options=eager_options(Place))
     place_dict = place.to_dict()
     return render_template("place_details.html", place=place_dict)
 
@@ -0,0 +1,61 @@
+from sqlalchemy import text
+
+# Closure tables of the category trees: one row per (ancestor, descendant) pair,
+# including every category with itself at depth 0. "Category X and everything below it"
+# becomes a single indexed lookup instead of a recursive query.
+# The tables themselves are models (models/place_categories.py, models/event_categories.py),
+# the triggers below keep them in sync with parent_id on every write path.
+CLOSURE_TABLES = {
+    "place_categories": "place_category_closure",
+    "event_categories": "event_category_closure",
+}
+
+
+def _triggers(table: str, closure: str) -> list[str]:
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {closure}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {closure}(ancestor_id, descendant_id, depth) "
+        f"SELECT ancestor_id, new.id, depth + 1 FROM {closure} WHERE descendant_id = new.parent_id "
+        f"UNION ALL SELECT new.id, new.id, 0; END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {closure}_ad AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {closure} WHERE descendant_id = old.id OR ancestor_id = old.id; END",
+
+        # Moving a subtree: drop the links from the old ancestors into the subtree,
+        # then link every new ancestor with every node of the subtree
+        f"CREATE TRIGGER IF NOT EXISTS {closure}_au AFTER UPDATE OF parent_id ON {table} "
+        f"WHEN old.parent_id IS NOT new.parent_id BEGIN "
+        f"DELETE FROM {closure} "
+        f"WHERE descendant_id IN (SELECT descendant_id FROM {closure} WHERE ancestor_id = old.id) "
+        f"AND ancestor_id NOT IN (SELECT descendant_id FROM {closure} WHERE ancestor_id = old.id); "
+        f"INSERT INTO {closure}(ancestor_id, descendant_id, depth) "
+        f"SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1 "
+        f"FROM {closure} AS above, {closure} AS below "
+        f"WHERE above.descendant_id = new.parent_id AND below.ancestor_id = new.id; END",
+    ]
+
+
+def rebuild(conn, table: str, closure: str):
+    """Recompute a closure table from parent_id with one recursive query."""
+    conn.execute(text(f"DELETE FROM {closure}"))
+    conn.execute(text(
+        f"INSERT INTO {closure}(ancestor_id, descendant_id, depth) "
+        f"WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS ("
+        f"SELECT id, id, 0 FROM {table} "
+        f"UNION ALL "
+        f"SELECT tree.ancestor_id, child.id, tree.depth + 1 "
+        f"FROM tree JOIN {table} AS child ON child.parent_id = tree.descendant_id"
+        f") SELECT ancestor_id, descendant_id, depth FROM tree"
+    ))
+
+
+def init_closure(engine):
+    """Create the sync triggers, filling the closure tables once for existing categories."""
+    with engine.begin() as conn:
+        for table, closure in CLOSURE_TABLES.items():
+            for statement in _triggers(table, closure):
+                conn.execute(text(statement))
+
+            empty = conn.execute(text(f"SELECT 1 FROM {closure} LIMIT 1")).first() is None
+            if empty:
+                rebuild(conn, table, closure)
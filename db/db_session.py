@@ -1,14 +1,76 @@
-from sqlalchemy import create_engine
+import os
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
 import sqlalchemy.orm as orm
 from os.path import exists
+from flask import has_request_context, request
+from flask.globals import app_ctx
+
+from db import closure, fts, migrations, spatial, versions
 
 SqlAlchemyBase = orm.declarative_base()
 
+# PRAGMAs applied to every new pooled connection.
+# WAL lets readers keep working while a writer holds the lock,
+# NORMAL sync is durable enough in WAL mode and avoids an fsync per commit.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,  # negative value = size in KiB (~20 MB)
+    "mmap_size": 268435456,  # 256 MB
+    "busy_timeout": 5000,  # ms to wait for the write lock before failing
+    "temp_store": "MEMORY",
+}
+
+# Reader connections are opened with mode=ro and additionally refuse writes,
+# journal_mode is left out because a read-only handle cannot change it.
+SQLITE_READER_PRAGMAS = {
+    "query_only": "ON",
+    "cache_size": SQLITE_PRAGMAS["cache_size"],
+    "mmap_size": SQLITE_PRAGMAS["mmap_size"],
+    "busy_timeout": SQLITE_PRAGMAS["busy_timeout"],
+    "temp_store": SQLITE_PRAGMAS["temp_store"],
+}
+
+# Readers scale with cores, SQLite only ever allows one writer at a time,
+# so the writer pool holds exactly one connection and callers queue on it.
+READER_POOL_SIZE = max(4, (os.cpu_count() or 1) * 2)
+READER_POOL_MAX_OVERFLOW = READER_POOL_SIZE
+WRITER_POOL_SIZE = 1
+POOL_TIMEOUT = 30
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+__engine = None
+__reader_engine = None
 __factory = None
+__reader_factory = None
+__session = None
+__reader_session = None
+
+
+def _pragma_listener(pragmas: dict):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return set_pragmas
+
+
+def _scope_id():
+    """One session per Flask app context; plain threads (tools, CLI) get one per thread."""
+    try:
+        return id(app_ctx._get_current_object())
+    except RuntimeError:
+        return threading.get_ident()
 
 
 def global_init(db_file: str):
-    global __factory
+    global __engine, __reader_engine, __factory, __reader_factory, __session, __reader_session
 
     if __factory:
         return
@@ -17,16 +79,81 @@ def global_init(db_file: str):
         raise Exception("Database file isn't specified!")
 
     db_exists = exists(db_file.strip())
-    connection_string = f'sqlite:///{db_file.strip()}?check_same_thread=False'
+    connection_string = f'sqlite:///{db_file.strip()}'
+    reader_connection_string = f'sqlite:///file:{os.path.abspath(db_file.strip())}?mode=ro&uri=true'
     print(f"Connecting to the database at {connection_string}")
 
-    engine = create_engine(connection_string, echo=False)
-    __factory = orm.sessionmaker(bind=engine)
+    __engine = create_engine(
+        connection_string,
+        echo=False,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=WRITER_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=POOL_TIMEOUT,
+    )
+    event.listen(__engine, "connect", _pragma_listener(SQLITE_PRAGMAS))
+
+    __factory = orm.sessionmaker(bind=__engine)
+    __session = orm.scoped_session(__factory, scopefunc=_scope_id)
+
+    # The schema (and the WAL switch) has to exist before read-only handles can open the file
+    SqlAlchemyBase.metadata.create_all(__engine)
+    migrations.upgrade(__engine)
+    fts.init_fts(__engine)
+    closure.init_closure(__engine)
+    spatial.init_spatial(__engine)
+    versions.init_versions(__engine)
+
+    __reader_engine = create_engine(
+        reader_connection_string,
+        echo=False,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=READER_POOL_SIZE,
+        max_overflow=READER_POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+    )
+    event.listen(__reader_engine, "connect", _pragma_listener(SQLITE_READER_PRAGMAS))
+
+    __reader_factory = orm.sessionmaker(bind=__reader_engine, autoflush=False)
+    __reader_session = orm.scoped_session(__reader_factory, scopefunc=_scope_id)
+
+
+def init_app(app):
+    """Close the scoped sessions together with the Flask app context."""
+    app.teardown_appcontext(remove_session)
+
+
+def remove_session(exception=None):
+    if __session is not None:
+        __session.remove()
+    if __reader_session is not None:
+        __reader_session.remove()
+
+
+def get_engine():
+    return __engine
+
+
+def get_reader_engine():
+    return __reader_engine
+
+
+def create_reader_session():
+    """Read-only session bound to the current app context (or thread)."""
+    global __reader_session
+    return __reader_session()
 
 
-    SqlAlchemyBase.metadata.create_all(engine)
+def create_writer_session():
+    """Session on the single serialized writer connection."""
+    global __session
+    return __session()
 
 
 def create_session():
-    global __factory
-    return __factory()
+    """Pick the reader for safe HTTP methods and the writer for everything else."""
+    if has_request_context() and request.method in READ_METHODS:
+        return create_reader_session()
+    return create_writer_session()
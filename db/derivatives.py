@@ -0,0 +1,116 @@
+import hashlib
+import os
+from functools import lru_cache
+
+from sqlalchemy import inspect
+
+# --- What the rows know about their uploaded image ---
+#
+# places / events store the content hash and pixel width of their upload (image_digest,
+# image_width), read once when image_url is written (ORM listeners, bulk endpoints,
+# tools/add data.py). srcset() builds the derivative URLs from these columns alone, so
+# serializing a list touches no files. The derivatives themselves are made and served
+# by app/images.py.
+#
+# The URLs hold derivative_key() of the content hash: it also covers PIPELINE_VERSION,
+# so new encoding settings give new URLs without rewriting the rows.
+#
+# Pillow is optional: without it the columns stay empty and there is no 'srcset'.
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SOURCE_PREFIX = 'static/uploads/'
+
+VARIANTS = {'thumb': 160, 'card': 480, 'detail': 1024}
+# Best format first, browsers take the first <source> they support
+FORMATS = {
+    'avif': {'mimetype': 'image/avif', 'pil': 'AVIF', 'options': {'quality': 50}},
+    'webp': {'mimetype': 'image/webp', 'pil': 'WEBP', 'options': {'quality': 75, 'method': 4}},
+}
+# Part of the derivative key, bump it when the encoding settings change so the URLs change too
+PIPELINE_VERSION = b'2'
+HASH_CHUNK = 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def formats() -> tuple:
+    """The formats this Pillow build can write."""
+    if Image is None:
+        return ()
+    return tuple(name for name in FORMATS if features.check(name))
+
+
+def source_path(image_url):
+    """Absolute path of an upload, None for anything outside static/uploads."""
+    if not image_url or not image_url.startswith(SOURCE_PREFIX):
+        return None
+    path = os.path.normpath(os.path.join(ROOT_DIR, image_url))
+    if not path.startswith(os.path.join(ROOT_DIR, 'static', 'uploads') + os.sep):
+        return None
+    return path
+
+
+def read_source(path):
+    """(sha256 of the content, width) of an image file, None if it is missing or not an image."""
+    if path is None or Image is None:
+        return None
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+        with Image.open(path) as image:  # reads only the header
+            return digest.hexdigest(), image.width
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+
+def image_columns(image_url) -> dict:
+    """The image_digest / image_width values of a row with this image_url."""
+    info = read_source(source_path(image_url))
+    digest, width = info if info is not None else (None, None)
+    return {'image_digest': digest, 'image_width': width}
+
+
+def update_image_columns(target):
+    """Before insert / update of a place or event: reads the upload behind a new or changed image_url."""
+    if target.id is None or inspect(target).attrs.image_url.history.has_changes():
+        target.image_digest, target.image_width = image_columns(target.image_url).values()
+
+
+@lru_cache(maxsize=4096)
+def derivative_key(digest: str) -> str:
+    """The part of the derivative URLs and file names that names one upload's content."""
+    return hashlib.sha256(PIPELINE_VERSION + digest.encode()).hexdigest()[:20]
+
+
+def variant_widths(width: int) -> dict:
+    """variant -> output width, variants that would all be the original's size collapse into the smallest."""
+    widths = {}
+    for variant, variant_width in VARIANTS.items():
+        output = min(variant_width, width)
+        if output not in widths.values():
+            widths[variant] = output
+    return widths
+
+
+def derivative_url(key: str, variant: str, fmt: str, image_url: str) -> str:
+    return f"/images/{key}/{variant}.{fmt}/{image_url[len('static/'):]}"
+
+
+def srcset(image_url, digest, width):
+    """{mimetype: srcset} of an upload's derivatives from the row's columns, None without them."""
+    available = formats()
+    if not available or not digest or not width or source_path(image_url) is None:
+        return None
+    key = derivative_key(digest)
+    widths = variant_widths(width)
+    return {
+        FORMATS[fmt]['mimetype']: ', '.join(f"{derivative_url(key, variant, fmt, image_url)} {output}w"
+                                            for variant, output in widths.items())
+        for fmt in available
+    }
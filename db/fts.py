@@ -0,0 +1,95 @@
+import re
+
+from sqlalchemy import text, Integer, Float
+
+from db.normalize import normalize_search_text
+
+# Tables with an FTS5 index: table name -> indexed text columns.
+# The indexes are external-content tables, so the text itself is stored only once
+# in the original table and the triggers below keep the index in sync with it.
+# search_key is the normalized (Latin, ASCII-folded) name + description, see db/normalize.py
+FTS_TABLES = {
+    "places": ("search_key",),
+    "events": ("search_key",),
+}
+
+# Prefix indexes make "term*" lookups cheap
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"
+FTS_PREFIX = "2 3 4"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_table_name(table: str) -> str:
+    return f"{table}_fts"
+
+
+def _ddl(table: str, columns: tuple) -> list[str]:
+    fts = fts_table_name(table)
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', "
+        f"tokenize='{FTS_TOKENIZE}', prefix='{FTS_PREFIX}')",
+
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def init_fts(engine):
+    """Create the FTS5 indexes and sync triggers, building the index for existing rows once."""
+    with engine.begin() as conn:
+        for table, columns in FTS_TABLES.items():
+            fts = fts_table_name(table)
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": fts}
+            ).first() is not None
+
+            for statement in _ddl(table, columns):
+                conn.execute(text(statement))
+
+            if not existed:
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def build_match_query(search: str):
+    """
+    Turn free user input into an FTS5 query: the input is normalized like the
+    stored search keys, every word becomes a quoted prefix term ("park"*),
+    terms are implicitly ANDed.
+    Returns None if the input contains no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(normalize_search_text(search))
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def match_subquery(table: str, search: str):
+    """
+    Subquery with (rowid, rank) of the rows matching the search, rank is bm25 (lower is better).
+    Join it on the primary key and order by rank.
+    Returns None if the search has no searchable words.
+    """
+    match_query = build_match_query(search)
+    if match_query is None:
+        return None
+
+    fts = fts_table_name(table)
+    return (
+        text(f"SELECT rowid, bm25({fts}) AS rank FROM {fts} WHERE {fts} MATCH :match_query")
+        .bindparams(match_query=match_query)
+        .columns(rowid=Integer, rank=Float)
+        .subquery(f"{fts}_match")
+    )
@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from db import derivatives, fts
+from db.normalize import build_search_key
+
+# Schema changes create_all() can't make on an existing database file.
+# The number of applied migrations is kept in PRAGMA user_version,
+# new migrations are appended to MIGRATIONS and must be safe on a freshly created schema.
+
+
+def _has_column(conn, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(text(f"PRAGMA table_info({table})")))
+
+
+def _add_column(conn, table: str, column: str, ddl_type: str):
+    if not _has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _drop_fts(conn, table: str):
+    name = fts.fts_table_name(table)
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}_{suffix}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+
+def add_search_keys(conn):
+    """Normalized search_key on places and events; the FTS indexes are rebuilt over it."""
+    for table in ("places", "events"):
+        _add_column(conn, table, "search_key", "TEXT")
+
+        rows = conn.execute(text(f"SELECT id, name, description FROM {table} WHERE search_key IS NULL")).all()
+        if rows:
+            conn.execute(
+                text(f"UPDATE {table} SET search_key = :search_key WHERE id = :id"),
+                [{"id": row.id, "search_key": build_search_key(row.name, row.description)} for row in rows]
+            )
+
+        _drop_fts(conn, table)
+
+
+def normalize_event_datetimes(conn):
+    """
+    Rows seeded by hand hold ISO strings ("2025-06-16T14:27:00+00:00") while SQLAlchemy stores
+    "2025-06-16 14:27:00.000000"; the mix breaks range comparisons on the column.
+    Rewrite them in SQLAlchemy's format (naive UTC) and index the column.
+    """
+    rows = conn.execute(text("SELECT id, datetime FROM events WHERE datetime LIKE '%T%'")).all()
+    updates = []
+    for row in rows:
+        value = datetime.fromisoformat(row.datetime)
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        updates.append({"id": row.id, "datetime": value.strftime("%Y-%m-%d %H:%M:%S.%f")})
+    if updates:
+        conn.execute(text("UPDATE events SET datetime = :datetime WHERE id = :id"), updates)
+
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_events_datetime ON events (datetime)"))
+
+
+def split_place_positions(conn):
+    """
+    places.position ("45.38, 20.39") becomes numeric latitude / longitude columns.
+    Unparseable positions are reported and left empty.
+    """
+    _add_column(conn, "places", "latitude", "FLOAT")
+    _add_column(conn, "places", "longitude", "FLOAT")
+    if not _has_column(conn, "places", "position"):
+        return
+
+    updates = []
+    for row in conn.execute(text("SELECT id, position FROM places WHERE position IS NOT NULL")).all():
+        try:
+            latitude, longitude = (float(part) for part in row.position.split(','))
+        except ValueError:
+            print(f"  Place {row.id}: can't parse position {row.position!r}, leaving it empty")
+            continue
+        updates.append({"id": row.id, "latitude": latitude, "longitude": longitude})
+    if updates:
+        conn.execute(text("UPDATE places SET latitude = :latitude, longitude = :longitude WHERE id = :id"), updates)
+
+    try:
+        conn.execute(text("ALTER TABLE places DROP COLUMN position"))
+    except OperationalError:
+        # SQLite < 3.35 can't drop columns; the old column just stays unmapped
+        pass
+
+
+def add_event_time_indexes(conn):
+    """Composite indexes for time windows by category and for a place's events in time order."""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_events_datetime_category ON events (datetime, category_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_events_place_datetime ON events (place_id, datetime)"))
+
+
+def add_event_recurrence(conn):
+    """Recurrence rule columns on events, see db/recurrence.py."""
+    _add_column(conn, "events", "rrule", "VARCHAR")
+    _add_column(conn, "events", "recurrence_end", "DATETIME")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_events_series ON events (datetime) WHERE rrule IS NOT NULL"))
+
+
+def add_image_columns(conn):
+    """Content hash and width of the uploads on places and events, see db/derivatives.py."""
+    for table in ("places", "events"):
+        _add_column(conn, table, "image_digest", "VARCHAR")
+        _add_column(conn, table, "image_width", "INTEGER")
+
+        rows = conn.execute(text(f"SELECT id, image_url FROM {table} WHERE image_url IS NOT NULL")).all()
+        columns = {url: derivatives.image_columns(url) for url in {row.image_url for row in rows}}
+        updates = [{"id": row.id, **columns[row.image_url]} for row in rows if columns[row.image_url]["image_digest"]]
+        if updates:
+            conn.execute(
+                text(f"UPDATE {table} SET image_digest = :image_digest, image_width = :image_width WHERE id = :id"),
+                updates
+            )
+
+
+MIGRATIONS = [
+    add_search_keys,
+    normalize_event_datetimes,
+    split_place_positions,
+    add_event_time_indexes,
+    add_event_recurrence,
+    add_image_columns,
+]
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            print(f"Applying database migration {number}: {migration.__name__}")
+            migration(conn)
+            conn.execute(text(f"PRAGMA user_version = {number}"))
@@ -0,0 +1,44 @@
+import re
+import unicodedata
+
+# Serbian Cyrillic -> Serbian Latin (the same table tools/creating places.py uses)
+CYRILLIC_TO_LATIN = {
+    'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Ђ': 'Đ', 'Е': 'E', 'Ж': 'Ž', 'З': 'Z', 'И': 'I',
+    'Ј': 'J', 'К': 'K', 'Л': 'L', 'Љ': 'Lj', 'М': 'M', 'Н': 'N', 'Њ': 'Nj', 'О': 'O', 'П': 'P', 'Р': 'R',
+    'С': 'S', 'Т': 'T', 'Ћ': 'Ć', 'У': 'U', 'Ф': 'F', 'Х': 'H', 'Ц': 'C', 'Ч': 'Č', 'Џ': 'Dž', 'Ш': 'Š',
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ђ': 'đ', 'е': 'e', 'ж': 'ž', 'з': 'z', 'и': 'i',
+    'ј': 'j', 'к': 'k', 'л': 'l', 'љ': 'lj', 'м': 'm', 'н': 'n', 'њ': 'nj', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'ћ': 'ć', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'č', 'џ': 'dž', 'ш': 'š'
+}
+_CYRILLIC_TABLE = str.maketrans(CYRILLIC_TO_LATIN)
+
+# Letters NFKD can't decompose into base letter + accent
+_ASCII_FOLD_TABLE = str.maketrans({'đ': 'dj', 'Đ': 'Dj', 'ß': 'ss', 'ø': 'o', 'Ø': 'O', 'ł': 'l', 'Ł': 'L'})
+
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def to_serbian_latin(text: str) -> str:
+    """Transliterates Serbian Cyrillic to Serbian Latin, leaving other characters as they are."""
+    if not isinstance(text, str):
+        return text
+    return text.translate(_CYRILLIC_TABLE)
+
+
+def normalize_search_text(text: str) -> str:
+    """
+    Folds text to the form stored in the search keys:
+    Cyrillic -> Latin, diacritics stripped ("Čokliget" -> "cokliget", "đ" -> "dj"),
+    lowercase, punctuation collapsed to single spaces.
+    """
+    if not text:
+        return ""
+    text = to_serbian_latin(text).translate(_ASCII_FOLD_TABLE)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+def build_search_key(*parts) -> str:
+    """Search key for a row, built from its searchable text columns."""
+    return " ".join(filter(None, (normalize_search_text(part) for part in parts)))
@@ -0,0 +1,188 @@
+import calendar
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# --- Recurrence rules of repeating events ---
+#
+# A series is one events row: its datetime is the first occurrence and its rrule an
+# RFC 5545 style rule, e.g. "FREQ=WEEKLY;BYDAY=SA" or "FREQ=MONTHLY;INTERVAL=1;COUNT=12".
+# Supported parts: FREQ (DAILY, WEEKLY, MONTHLY, YEARLY), INTERVAL, COUNT, UNTIL and,
+# for weekly rules, BYDAY. Occurrences are never stored; they are generated on demand
+# and only for the window a query asks about (occurrences_between). UNTIL is limited to
+# MAX_SPAN after the first occurrence and nothing is generated past the year 9999.
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+MAX_COUNT = 10000
+# UNTIL at most this long after the first occurrence, which bounds every expansion
+MAX_SPAN = timedelta(days=100 * 366)
+EXPANSION_CACHE_SIZE = 4096
+
+
+def parse_rrule(value: str, dtstart: datetime = None) -> dict:
+    """
+    {'freq', 'interval', 'count', 'until', 'byday'} of a rule string; with dtstart, UNTIL
+    is also checked against MAX_SPAN. Raises ValueError with a message for the client.
+    """
+    if value.upper().startswith('RRULE:'):
+        value = value[6:]
+    parts = {}
+    for part in value.split(';'):
+        name, sep, part_value = part.partition('=')
+        if not sep or not part_value:
+            raise ValueError(f"Malformed rrule part {part!r}.")
+        parts[name.strip().upper()] = part_value.strip().upper()
+
+    unknown = set(parts) - {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYDAY'}
+    if unknown:
+        raise ValueError(f"Unsupported rrule parts: {', '.join(sorted(unknown))}.")
+    if parts.get('FREQ') not in FREQUENCIES:
+        raise ValueError(f"rrule FREQ must be one of {', '.join(FREQUENCIES)}.")
+    rule = {'freq': parts['FREQ'], 'interval': 1, 'count': None, 'until': None, 'byday': None}
+
+    try:
+        if 'INTERVAL' in parts:
+            rule['interval'] = int(parts['INTERVAL'])
+        if 'COUNT' in parts:
+            rule['count'] = int(parts['COUNT'])
+    except ValueError:
+        raise ValueError("rrule INTERVAL and COUNT must be integers.")
+    if rule['interval'] < 1 or (rule['count'] is not None and not 1 <= rule['count'] <= MAX_COUNT):
+        raise ValueError(f"rrule INTERVAL must be positive and COUNT between 1 and {MAX_COUNT}.")
+
+    if 'UNTIL' in parts:
+        until = parts['UNTIL'].rstrip('Z')
+        try:
+            rule['until'] = datetime.strptime(until, '%Y%m%dT%H%M%S') if 'T' in until \
+                else datetime.strptime(until, '%Y%m%d').replace(hour=23, minute=59, second=59)
+        except ValueError:
+            raise ValueError("rrule UNTIL must look like 20251231 or 20251231T180000Z.")
+    if rule['count'] is not None and rule['until'] is not None:
+        raise ValueError("rrule can't have both COUNT and UNTIL.")
+    if dtstart is not None and rule['until'] is not None and rule['until'] - dtstart > MAX_SPAN:
+        raise ValueError(f"rrule UNTIL can be at most {MAX_SPAN.days // 366} years after the first occurrence.")
+
+    if 'BYDAY' in parts:
+        if rule['freq'] != 'WEEKLY':
+            raise ValueError("rrule BYDAY is only supported with FREQ=WEEKLY.")
+        days = parts['BYDAY'].split(',')
+        if not all(day in WEEKDAYS for day in days):
+            raise ValueError(f"rrule BYDAY must be a list of {', '.join(WEEKDAYS)}.")
+        rule['byday'] = sorted({WEEKDAYS.index(day) for day in days})
+    return rule
+
+
+def _add_months(value: datetime, months: int):
+    """value moved by whole months, None if that month has no such day (e.g. the 31st)."""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    if value.day > calendar.monthrange(year, month)[1]:
+        return None
+    return value.replace(year=year, month=month)
+
+
+def _periods(rule: dict, dtstart: datetime, first: int):
+    """Candidate occurrences period by period, starting with period number `first`; ends at datetime.max."""
+    freq, interval = rule['freq'], rule['interval']
+    period = first
+    try:
+        while True:
+            if freq == 'DAILY':
+                yield dtstart + timedelta(days=period * interval)
+            elif freq == 'WEEKLY':
+                if rule['byday'] is None:
+                    yield dtstart + timedelta(weeks=period * interval)
+                else:
+                    week = dtstart - timedelta(days=dtstart.weekday()) + timedelta(weeks=period * interval)
+                    for weekday in rule['byday']:
+                        candidate = week + timedelta(days=weekday)
+                        if candidate >= dtstart:
+                            yield candidate
+            else:
+                months = period * interval * (12 if freq == 'YEARLY' else 1)
+                if dtstart.year + (dtstart.month - 1 + months) // 12 > datetime.max.year:
+                    return
+                candidate = _add_months(dtstart, months)
+                if candidate is not None:
+                    yield candidate
+            period += 1
+    except (OverflowError, ValueError):
+        # The next period is past year 9999
+        return
+
+
+def _first_period(rule: dict, dtstart: datetime, after: datetime) -> int:
+    """
+    A period number at or before the one containing `after`. Skipping ahead is only exact
+    without COUNT (which counts from the very first occurrence).
+    """
+    if after is None or after <= dtstart or rule['count'] is not None:
+        return 0
+    freq, interval = rule['freq'], rule['interval']
+    if freq == 'DAILY':
+        periods = (after - dtstart).days // interval
+    elif freq == 'WEEKLY':
+        periods = (after - dtstart).days // (7 * interval)
+    else:
+        months = (after.year - dtstart.year) * 12 + after.month - dtstart.month
+        periods = months // (interval * (12 if freq == 'YEARLY' else 1))
+    return max(periods - 1, 0)
+
+
+def iter_occurrences(rule: dict, dtstart: datetime, after: datetime = None):
+    """Occurrences in order, lazily; starting near `after` when the rule allows it."""
+    count = 0
+    for occurrence in _periods(rule, dtstart, _first_period(rule, dtstart, after)):
+        if rule['until'] is not None and occurrence > rule['until']:
+            return
+        yield occurrence
+        count += 1
+        if rule['count'] is not None and count >= rule['count']:
+            return
+
+
+def recurrence_end(rrule: str, dtstart: datetime):
+    """
+    The last occurrence of the series, None if it repeats forever.
+    Raises ValueError with a message for the client.
+    """
+    rule = parse_rrule(rrule, dtstart)
+    if rule['count'] is None and rule['until'] is None:
+        return None
+    if rule['freq'] == 'DAILY' or (rule['freq'] == 'WEEKLY' and rule['byday'] is None):
+        # Evenly spaced: computed, not walked
+        step = timedelta(days=rule['interval'] * (7 if rule['freq'] == 'WEEKLY' else 1))
+        periods = rule['count'] - 1 if rule['count'] is not None else max((rule['until'] - dtstart) // step, 0)
+        try:
+            return dtstart + periods * step
+        except OverflowError:
+            raise ValueError("rrule occurrences go past the year 9999.")
+    last = None
+    for last in iter_occurrences(rule, dtstart):
+        pass
+    return last if last is not None else dtstart
+
+
+@lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def _expand(rrule: str, dtstart: datetime, start_day, end_day) -> tuple:
+    start = datetime.combine(start_day, datetime.min.time()) if start_day is not None else None
+    end = datetime.combine(end_day, datetime.min.time())
+    occurrences = []
+    for occurrence in iter_occurrences(parse_rrule(rrule), dtstart, start):
+        if occurrence >= end:
+            break
+        if start is None or occurrence >= start:
+            occurrences.append(occurrence)
+    return tuple(occurrences)
+
+
+def occurrences_between(rrule: str, dtstart: datetime, start, end: datetime) -> list:
+    """
+    Occurrences with start <= datetime < end (start None = from the first one).
+    Windows are expanded for whole days and cached by (rule, dtstart, days),
+    so e.g. repeated upcoming=true queries reuse one expansion.
+    """
+    start_day = start.date() if start is not None else None
+    end_day = (end + timedelta(days=1)).date()
+    return [occurrence for occurrence in _expand(rrule, dtstart, start_day, end_day)
+            if (start is None or occurrence >= start) and occurrence < end]
@@ -0,0 +1,60 @@
+from sqlalchemy import text, table, column, select
+
+# R*Tree index over places.latitude / places.longitude.
+# Points are stored as degenerate boxes (min = max); the triggers keep the index
+# in sync on every write path, rows without coordinates are simply not indexed.
+RTREE_TABLE = "places_rtree"
+
+_rtree = table(RTREE_TABLE, column("id"), column("min_lat"), column("max_lat"), column("min_lng"), column("max_lng"))
+
+_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_ai AFTER INSERT ON places "
+    f"WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN "
+    f"INSERT INTO {RTREE_TABLE}(id, min_lat, max_lat, min_lng, max_lng) "
+    f"VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_ad AFTER DELETE ON places BEGIN "
+    f"DELETE FROM {RTREE_TABLE} WHERE id = old.id; END",
+
+    f"CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_au AFTER UPDATE OF latitude, longitude ON places BEGIN "
+    f"DELETE FROM {RTREE_TABLE} WHERE id = old.id; "
+    f"INSERT INTO {RTREE_TABLE}(id, min_lat, max_lat, min_lng, max_lng) "
+    f"SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude "
+    f"WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL; END",
+]
+
+
+def init_spatial(engine):
+    """Create the R*Tree and its sync triggers, indexing existing places once."""
+    with engine.begin() as conn:
+        existed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": RTREE_TABLE}
+        ).first() is not None
+
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(id, min_lat, max_lat, min_lng, max_lng)"
+        ))
+        for statement in _TRIGGERS:
+            conn.execute(text(statement))
+
+        if not existed:
+            conn.execute(text(
+                f"INSERT INTO {RTREE_TABLE}(id, min_lat, max_lat, min_lng, max_lng) "
+                f"SELECT id, latitude, latitude, longitude, longitude FROM places "
+                f"WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+            ))
+
+
+def bbox_ids(min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+    """
+    Subquery of place ids inside the box, answered by the R*Tree.
+    The tree stores 32-bit floats rounded outwards, so it can return points a hair
+    outside the box; filter on the real columns too if exact edges matter.
+    """
+    return select(_rtree.c.id).where(
+        _rtree.c.min_lat >= min_lat,
+        _rtree.c.max_lat <= max_lat,
+        _rtree.c.min_lng >= min_lng,
+        _rtree.c.max_lng <= max_lng,
+    )
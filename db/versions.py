@@ -0,0 +1,41 @@
+from sqlalchemy import text, bindparam
+
+# Write counters of the tables the API derives cached data from (counts, the map cluster
+# index, the map feed, feed validators). The triggers bump a table's counter and its
+# modification time in the same transaction as the write, on every write path: the API
+# handlers of any worker process, the bulk endpoints and the tools writing to the file.
+VERSIONS_TABLE = "table_versions"
+VERSIONED_TABLES = ("places", "events", "place_categories", "event_categories")
+# Unix time with fractional seconds
+_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+
+
+def _triggers(table: str) -> list[str]:
+    bump = (f"UPDATE {VERSIONS_TABLE} SET version = version + 1, modified_at = {_NOW} "
+            f"WHERE name = '{table}';")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_ai AFTER INSERT ON {table} BEGIN {bump} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_ad AFTER DELETE ON {table} BEGIN {bump} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_au AFTER UPDATE ON {table} BEGIN {bump} END",
+    ]
+
+
+def init_versions(engine):
+    """Create the counters table (one row per table) and the triggers that bump it."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} ("
+            f"name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0, modified_at REAL NOT NULL)"
+        ))
+        for table in VERSIONED_TABLES:
+            conn.execute(text(f"INSERT OR IGNORE INTO {VERSIONS_TABLE}(name, modified_at) VALUES (:name, {_NOW})"),
+                         {"name": table})
+            for statement in _triggers(table):
+                conn.execute(text(statement))
+
+
+def read_versions(session, tables) -> dict:
+    """{table: (version, modified_at)} of the given tables, one query."""
+    statement = text(f"SELECT name, version, modified_at FROM {VERSIONS_TABLE} WHERE name IN :names").bindparams(
+        bindparam("names", expanding=True))
+    return {row.name: (row.version, row.modified_at) for row in session.execute(statement, {"names": list(tables)})}
@@ -2,5 +2,7 @@ from models import events, event_categories, places, place_categories
 
 Place = places.Place
 PlaceCategory = place_categories.PlaceCategory
+PlaceCategoryClosure = place_categories.PlaceCategoryClosure
 Event = events.Event
 EventCategory = event_categories.EventCategory
+EventCategoryClosure = event_categories.EventCategoryClosure
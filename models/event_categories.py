@@ -1,5 +1,7 @@
 from sqlalchemy import Column, Integer, String, ForeignKey
 from db.db_session import SqlAlchemyBase
+from sqlalchemy.orm import relationship
+from models.loading import RECURSIVE
 
 
 class EventCategory(SqlAlchemyBase):
@@ -9,6 +11,10 @@ class EventCategory(SqlAlchemyBase):
     name = Column(String, nullable=False, unique=True)
 
     parent_id = Column(Integer, ForeignKey("event_categories.id"))
+    parent = relationship("EventCategory", remote_side=[id])
+
+    # Relationships to_dict() walks, see models/loading.py
+    serialize_shape = {"parent": RECURSIVE}
 
     def to_dict(self):
         return {
@@ -16,3 +22,12 @@ class EventCategory(SqlAlchemyBase):
             "name": self.name,
             "parent": self.parent.to_dict() if self.parent_id is not None else None
         }
+
+
+class EventCategoryClosure(SqlAlchemyBase):
+    """Every (ancestor, descendant) pair of the category tree, maintained by triggers (see db/closure.py)."""
+    __tablename__ = 'event_category_closure'
+
+    ancestor_id = Column(Integer, ForeignKey("event_categories.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("event_categories.id"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
@@ -1,22 +1,46 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
 from db.db_session import SqlAlchemyBase
+from db.normalize import build_search_key
+from db.derivatives import srcset, update_image_columns
+from db.recurrence import recurrence_end
 from sqlalchemy.orm import relationship
+from sqlalchemy import event
 
 
 class Event(SqlAlchemyBase):
     __tablename__ = 'events'
+    __table_args__ = (
+        # Time windows filtered by category: "what's on this weekend" in the concerts
+        Index('ix_events_datetime_category', 'datetime', 'category_id'),
+        # GET /api/places/<id>/events: one place's events, already in datetime order
+        Index('ix_events_place_datetime', 'place_id', 'datetime'),
+        # Recurring series only, a handful of rows scanned for every time window
+        Index('ix_events_series', 'datetime', sqlite_where=text('rrule IS NOT NULL')),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     description = Column(Text)
-    datetime = Column(DateTime)
+    datetime = Column(DateTime, index=True)  # ix_events_datetime, SQLite appends id to it
     image_url = Column(String)
+    # Content hash and width of the upload at image_url, for srcset (see db/derivatives.py)
+    image_digest = Column(String)
+    image_width = Column(Integer)
+    # Recurrence rule of a series (see db/recurrence.py), datetime is then its first occurrence
+    rrule = Column(String)
+    # Last occurrence of the series, NULL if it repeats forever (or isn't recurring)
+    recurrence_end = Column(DateTime)
+    # Normalized name + description, indexed by the FTS5 table (see db/fts.py)
+    search_key = Column(Text)
     place_id = Column(Integer, ForeignKey('places.id'), nullable=False)
     category_id = Column(Integer, ForeignKey('event_categories.id'), nullable=False)
 
-    place = relationship("Place")
+    place = relationship("Place", back_populates="events")
     category = relationship("EventCategory")
 
+    # Relationships to_dict() walks, see models/loading.py
+    serialize_shape = {"category": {}}
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -24,6 +48,8 @@ class Event(SqlAlchemyBase):
             'description': self.description,
             'datetime': self.datetime,
             'image_url': self.image_url,
+            'srcset': srcset(self.image_url, self.image_digest, self.image_width),
+            'rrule': self.rrule,
             'place_id': self.place_id,
             'category': {
                 'category_id': self.category_id,
@@ -31,3 +57,11 @@ class Event(SqlAlchemyBase):
                 'category_parent_id': self.category.parent_id
             }
         }
+
+
+@event.listens_for(Event, "before_insert")
+@event.listens_for(Event, "before_update")
+def update_derived_columns(mapper, connection, target):
+    target.search_key = build_search_key(target.name, target.description)
+    target.recurrence_end = recurrence_end(target.rrule, target.datetime) if target.rrule else None
+    update_image_columns(target)
@@ -0,0 +1,46 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+# Marker for a self-referential relationship that to_dict() follows all the way up (category -> parent -> ...)
+RECURSIVE = "recursive"
+
+
+def serialize_shape(model, extra: dict = None) -> dict:
+    """
+    The relationships model.to_dict() walks, as {relationship name: nested shape},
+    optionally merged with relationships a view touches on top of it.
+    """
+    shape = dict(getattr(model, "serialize_shape", {}))
+    shape.update(extra or {})
+    return shape
+
+
+def eager_options(model, extra: dict = None) -> list:
+    """
+    Loader options that fetch everything serialize_shape(model, extra) needs up front,
+    so serializing any number of rows costs a fixed number of queries:
+    many-to-one -> joinedload (same query), collections -> selectinload (one IN query),
+    RECURSIVE -> selectinload repeated per level of the hierarchy.
+    """
+    return _options(model, serialize_shape(model, extra), None)
+
+
+def _options(model, shape: dict, parent_loader) -> list:
+    options = []
+    for name, nested in shape.items():
+        attribute = getattr(model, name)
+        relationship = attribute.property
+
+        if nested == RECURSIVE:
+            load = parent_loader.selectinload if parent_loader is not None else selectinload
+            options.append(load(attribute, recursion_depth=-1))
+            continue
+
+        if relationship.uselist:
+            load = parent_loader.selectinload if parent_loader is not None else selectinload
+        else:
+            load = parent_loader.joinedload if parent_loader is not None else joinedload
+        loader = load(attribute)
+
+        nested_options = _options(relationship.mapper.class_, nested, loader)
+        options.extend(nested_options or [loader])
+    return options
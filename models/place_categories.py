@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, ForeignKey
 from db.db_session import SqlAlchemyBase
 from sqlalchemy.orm import relationship
+from models.loading import RECURSIVE
 
 
 class PlaceCategory(SqlAlchemyBase):
@@ -12,9 +13,21 @@ class PlaceCategory(SqlAlchemyBase):
     parent_id = Column(Integer, ForeignKey("place_categories.id"))
     parent = relationship("PlaceCategory", remote_side=[id])
 
+    # Relationships to_dict() walks, see models/loading.py
+    serialize_shape = {"parent": RECURSIVE}
+
     def to_dict(self):
         return {
             "id": self.id,
             "name": self.name,
             "parent": self.parent.to_dict() if self.parent_id is not None else None
         }
+
+
+class PlaceCategoryClosure(SqlAlchemyBase):
+    """Every (ancestor, descendant) pair of the category tree, maintained by triggers (see db/closure.py)."""
+    __tablename__ = 'place_category_closure'
+
+    ancestor_id = Column(Integer, ForeignKey("place_categories.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("place_categories.id"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
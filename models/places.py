@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey
 from db.db_session import SqlAlchemyBase
+from db.normalize import build_search_key
+from db.derivatives import srcset, update_image_columns
 from sqlalchemy.orm import relationship
+from sqlalchemy import event
 
 
 class Place(SqlAlchemyBase):
@@ -9,13 +12,34 @@ class Place(SqlAlchemyBase):
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     description = Column(Text)
-    position = Column(String)
+    # Indexed by the R*Tree in db/spatial.py
+    latitude = Column(Float)
+    longitude = Column(Float)
     address = Column(String)
     category_id = Column(Integer, ForeignKey('place_categories.id'), nullable=False)
     image_url = Column(String)
+    # Content hash and width of the upload at image_url, for srcset (see db/derivatives.py)
+    image_digest = Column(String)
+    image_width = Column(Integer)
+    # Normalized name + description, indexed by the FTS5 table (see db/fts.py)
+    search_key = Column(Text)
 
     category = relationship("PlaceCategory")
-    events = relationship("Event")
+    events = relationship("Event", back_populates="place")
+
+    # Relationships to_dict() walks, see models/loading.py
+    serialize_shape = {"category": {}}
+
+    @property
+    def position(self):
+        """The "lat,lng" string the API has always exposed."""
+        if self.latitude is None or self.longitude is None:
+            return None
+        return f"{self.latitude},{self.longitude}"
+
+    @position.setter
+    def position(self, value):
+        self.latitude, self.longitude = parse_position(value)
 
     def to_dict(self):
         return {
@@ -23,11 +47,40 @@ class Place(SqlAlchemyBase):
             'name': self.name,
             'description': self.description,
             'position': self.position,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
             'address': self.address,
             'category': {
                 'category_id': self.category_id,
                 'category_name': self.category.name,
                 'category_parent_id': self.category.parent_id
             },
-            'image_url': self.image_url
+            'image_url': self.image_url,
+            'srcset': srcset(self.image_url, self.image_digest, self.image_width)
         }
+
+
+def parse_position(value):
+    """
+    "45.38, 20.39" -> (45.38, 20.39); None or "" -> (None, None).
+    Raises ValueError for anything else or coordinates out of range.
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None, None
+    parts = value.split(',') if isinstance(value, str) else list(value)
+    if len(parts) != 2:
+        raise ValueError(f"Invalid position: {value!r}")
+    try:
+        latitude, longitude = float(parts[0]), float(parts[1])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid position: {value!r}")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"Position out of range: {value!r}")
+    return latitude, longitude
+
+
+@event.listens_for(Place, "before_insert")
+@event.listens_for(Place, "before_update")
+def update_derived_columns(mapper, connection, target):
+    target.search_key = build_search_key(target.name, target.description)
+    update_image_columns(target)
@@ -18,14 +18,24 @@ document.addEventListener('DOMContentLoaded', async () => {
   document.getElementById('event-category').textContent = event.category?.name || '—';
   document.getElementById('event-datetime').textContent = new Date(event.datetime).toLocaleString();
   document.getElementById('event-description').textContent = event.description || '—';
-  document.getElementById('event-image').src = '/' + event.image_url || '/static/placeholder.jpg';
+  const eventImage = document.getElementById('event-image');
+  // Resized AVIF/WebP versions (added before src, so the upload isn't fetched), the browser takes the first type it supports
+  Object.entries(event.srcset || {}).forEach(([type, srcset]) => {
+    const source = document.createElement('source');
+    source.type = type;
+    source.srcset = srcset;
+    source.sizes = '(max-width: 800px) 100vw, 50vw';
+    eventImage.before(source);
+  });
+  eventImage.src = '/' + event.image_url || '/static/placeholder.jpg';
 
   const placeName = place.name || '—';
   const placeId = place.id;
   document.getElementById('event-place').innerHTML = `<a href="/places/${placeId}">${placeName}</a>`;
 
-  if (place.position) {
-    const [lat, lng] = place.position.split(',').map(coord => parseFloat(coord.trim()));
+  if (place.latitude != null && place.longitude != null) {
+    const lat = place.latitude;
+    const lng = place.longitude;
     const map = L.map('map').setView([lat, lng], 16 );
     L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
       attribution: '&copy; OpenStreetMap contributors'
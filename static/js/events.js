@@ -95,11 +95,10 @@ function initializeMap(container, events) {
 
     if (events && events.length > 0) {
         events.forEach(event => {
-            const [latStr, lngStr] = event.position.split(',');
-            const lat = parseFloat(latStr);
-            const lng = parseFloat(lngStr);
+            const lat = event.latitude;
+            const lng = event.longitude;
 
-            if (!isNaN(lat) && !isNaN(lng)) {
+            if (lat != null && lng != null) {
                 const marker = L.marker([lat, lng]).addTo(map);
                 marker.bindPopup(`
                     <strong>${event.name}</strong><br>
@@ -201,13 +200,23 @@ async function performSearch() {
     }
 }
 
+// Card image: the resized AVIF/WebP versions from 'srcset' when the server has them, the upload otherwise
+const CARD_IMAGE_SIZES = '(max-width: 600px) 100vw, 320px';
+
+function cardPicture(item) {
+    const sources = Object.entries(item.srcset || {})
+        .map(([type, srcset]) => `<source type="${type}" srcset="${srcset}" sizes="${CARD_IMAGE_SIZES}">`)
+        .join('');
+    return `<picture>${sources}<img src="${item.image_url || '/static/img/placeholder.jpg'}" alt="${item.name}" loading="lazy"></picture>`;
+}
+
 function displayEvents(events) {
     eventsResultsDiv.innerHTML = '';
     events.forEach(event => {
         const eventCard = document.createElement('div');
         eventCard.classList.add('place-card');
         eventCard.innerHTML = `
-            <img src="${event.image_url || '/static/img/placeholder.jpg'}" alt="${event.name}">
+            ${cardPicture(event)}
             <h4>${event.name}</h4>
             <p class="category">${event.category?.category_name || 'Nedefinisano'}</p>
             <p class="short-desc">${event.short_description || event.description || 'Opis nije dostupan'}</p>
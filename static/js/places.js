@@ -14,6 +14,7 @@ const closeMapButton = document.querySelector(".close-map");
 const mapContainer = document.getElementById("map");
 
 let places_data = [];
+const MAP_MARKERS_LIMIT = 500;
 
 const categoriesFilterDiv = document.querySelector(".filters .category-filters");
 const perPageSelect = document.getElementById('perPageSelect');
@@ -99,20 +100,15 @@ function initializeMap(mapContainer, places) {
     }).addTo(map);
     map.invalidateSize();
     const bounds = new L.LatLngBounds();
+    const markersLayer = L.layerGroup().addTo(map);
 
     if (places && places.length > 0) {
         places.forEach(place => {
-            const [latStr, lngStr] = place.position.split(',');
-            const latitude = parseFloat(latStr);
-            const longitude = parseFloat(lngStr);
-
-            if (!isNaN(latitude) && !isNaN(longitude)) {
-                const marker = L.marker([latitude, longitude]).addTo(map);
-                marker.bindPopup(`
-                    <strong>${place.name}</strong><br>
-                    <p>${place.short_description || 'No description'}</p>
-                    <a href="/places/${place.id}">Više</a>
-                `);
+            const latitude = place.latitude;
+            const longitude = place.longitude;
+
+            if (latitude != null && longitude != null) {
+                addPlaceMarker(markersLayer, place);
                 bounds.extend([latitude, longitude]);
             } else {
                 console.warn(`Invalid coordinates for place: ${place.name} (${place.position})`);
@@ -133,9 +129,49 @@ function initializeMap(mapContainer, places) {
         map.setView([45.38036, 20.39056], 13);
     }
 
+    // After every pan/zoom show all matching places inside the visible area, not just the current page
+    map.on('moveend', () => loadVisibleMarkers(map, markersLayer));
+
     mapContainer.mapInstance = map;
 }
 
+function addPlaceMarker(layer, place) {
+    const marker = L.marker([place.latitude, place.longitude]).addTo(layer);
+    marker.bindPopup(`
+        <strong>${place.name}</strong><br>
+        <p>${place.short_description || 'No description'}</p>
+        <a href="/places/${place.id}">Više</a>
+    `);
+}
+
+async function loadVisibleMarkers(map, markersLayer) {
+    const params = new URLSearchParams();
+    params.append('bbox', map.getBounds().toBBoxString());
+    params.append('per_page', MAP_MARKERS_LIMIT);
+    params.append('include_total', 'false');
+
+    const searchTerm = searchInput.value.trim();
+    if (searchTerm) params.append('search', searchTerm);
+    const selectedCategories = Array.from(filterCheckboxes)
+        .filter(checkbox => checkbox.checked)
+        .map(checkbox => checkbox.value);
+    if (selectedCategories.length > 0) params.append('categories', selectedCategories.join(','));
+
+    try {
+        const response = await fetch(`/api/places?${params.toString()}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        const data = await response.json();
+        markersLayer.clearLayers();
+        data.places
+            .filter(place => place.latitude != null && place.longitude != null)
+            .forEach(place => addPlaceMarker(markersLayer, place));
+    } catch (error) {
+        console.error('Error fetching visible places:', error);
+    }
+}
+
 async function getPlaces(options = {}) {
     const { page = 1, per_page = 10, search = '', categories = [] } = options;
 
@@ -239,6 +275,16 @@ async function performSearch() {
     }
 }
 
+// Card image: the resized AVIF/WebP versions from 'srcset' when the server has them, the upload otherwise
+const CARD_IMAGE_SIZES = '(max-width: 600px) 100vw, 320px';
+
+function cardPicture(item) {
+    const sources = Object.entries(item.srcset || {})
+        .map(([type, srcset]) => `<source type="${type}" srcset="${srcset}" sizes="${CARD_IMAGE_SIZES}">`)
+        .join('');
+    return `<picture>${sources}<img src="${item.image_url || '/static/img/placeholder.jpg'}" alt="${item.name}" loading="lazy"></picture>`;
+}
+
 // --- Function to display places on the page ---
 function displayPlaces(filteredPlaces) {
     placesResultsDiv.innerHTML = '';
@@ -247,7 +293,7 @@ function displayPlaces(filteredPlaces) {
         const placeCard = document.createElement('div');
         placeCard.classList.add('place-card');
         placeCard.innerHTML = `
-            <img src="${place.image_url || '/static/img/placeholder.jpg'}" alt="${place.name}">
+            ${cardPicture(place)}
             <h4>${place.name}</h4>
             <p class="category">${place.category && place.category.category_name ? place.category.category_name : 'Not specified'}</p>
             <p class="short-desc">${place.short_description || place.description || 'No description available'}</p>
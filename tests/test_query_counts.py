@@ -0,0 +1,110 @@
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.api import counts
+from app.cache import response_cache
+from db import db_session
+
+# Regression guard for the eager-loading plan (models/loading.py) and the column
+# serialization of the list endpoints: the number of statements a read runs must not
+# depend on how many rows it returns. Statements are counted on the reader engine.
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_DB = ROOT_DIR / "db" / "zrenjanin.sqlite"
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    db_file = tmp_path_factory.mktemp("db") / "zrenjanin.sqlite"
+    shutil.copy(SAMPLE_DB, db_file)
+    app = create_app()
+    db_session.global_init(str(db_file))
+    # Every request has to reach the database
+    response_cache.enabled = False
+    yield app.test_client()
+    response_cache.enabled = True
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_reader_engine()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def get(client, url):
+    with count_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json(), statements
+
+
+def first_id(client, url, key):
+    data, _ = get(client, url)
+    assert data[key], f"the sample database has no {key}"
+    return data[key][0]["id"]
+
+
+@pytest.mark.parametrize("path, key", [("/api/places", "places"), ("/api/events", "events")])
+@pytest.mark.parametrize("per_page", [1, 50])
+def test_list_page_without_total(client, path, key, per_page):
+    # The page itself: one SELECT of the columns, related tables joined in
+    data, statements = get(client, f"{path}?per_page={per_page}&include_total=false")
+    assert data[key]
+    assert len(statements) == 1, statements
+
+
+@pytest.mark.parametrize("path, key", [("/api/places", "places"), ("/api/events", "events")])
+@pytest.mark.parametrize("per_page", [1, 50])
+def test_list_page_with_total(client, path, key, per_page):
+    counts._cache.clear()
+    # Write counters of the count cache, COUNT, page
+    data, statements = get(client, f"{path}?per_page={per_page}")
+    assert data[key]
+    assert len(statements) == 3, statements
+
+    # The total comes from the count cache while nothing was written
+    _, statements = get(client, f"{path}?per_page={per_page}&page=2")
+    assert len(statements) == 2, statements
+
+
+@pytest.mark.parametrize("path, key", [("/api/places", "places"), ("/api/events", "events")])
+def test_cursor_page(client, path, key):
+    _, statements = get(client, f"{path}?per_page=50&cursor=")
+    assert len(statements) == 1, statements
+
+
+def test_place_detail(client):
+    place_id = first_id(client, "/api/places?include_total=false", "places")
+    # The place with its category joined
+    _, statements = get(client, f"/api/places/{place_id}")
+    assert len(statements) == 1, statements
+
+
+def test_event_detail(client):
+    event_id = first_id(client, "/api/events?include_total=false", "events")
+    # The event with its category joined
+    _, statements = get(client, f"/api/events/{event_id}")
+    assert len(statements) == 1, statements
+
+
+def test_place_events(client):
+    data, _ = get(client, "/api/events?include_total=false&fields=place_id&per_page=1")
+    place_id = data["events"][0]["place_id"]
+    # The place, then its events with their categories joined
+    events, statements = get(client, f"/api/places/{place_id}/events")
+    assert events
+    assert len(statements) == 2, statements
@@ -1,89 +1,217 @@
-from flask import Flask, jsonify, request
+import argparse
+import hashlib
+import json
 import os
-import glob
-from datetime import datetime
-from sqlalchemy.exc import SQLAlchemyError
+import sys
+from pathlib import Path
 
-IMAGE_BASE_PATH = "/static/uploads/places"
+# Alat se pokreće iz korena projekta ili iz tools/
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy import update  # noqa: E402
+from sqlalchemy.exc import SQLAlchemyError  # noqa: E402
+
+from app import images  # noqa: E402
+from db import db_session  # noqa: E402
+from db.derivatives import image_columns  # noqa: E402
+from models.__all_models import Place  # noqa: E402
+
+IMAGE_BASE_PATH = ROOT_DIR / "static" / "uploads" / "places"
 DB_IMAGE_PREFIX = "static/uploads/places/"
+DEFAULT_DB_FILE = ROOT_DIR / "db" / "zrenjanin.sqlite"
+DEFAULT_MANIFEST_FILE = Path(__file__).resolve().parent / "image_manifest.json"
+ALLOWED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+HASH_CHUNK = 1024 * 1024
 
 
-# --- Funkcije za obradu slika i baze podataka (premeštene u rutu ili pozvane iz nje) ---
+# --- Inkrementalna sinhronizacija slika mesta ---
+#
+# Manifest pamti za svaku sliku (ime fajla) njenu veličinu, mtime, sha256 sadržaja i mesto
+# kome je dodeljena. Pri ponovnom pokretanju fajl čiji se size i mtime nisu promenili
+# se ne čita, pa je sinhronizacija hiljada nepromenjenih slika gotovo trenutna.
+# Slika koja je samo preimenovana ili premeštena (isti sadržaj) zadržava svoje mesto.
+# Nove slike dobijaju mesta bez slike, po redu ID-jeva, redom kojim su slike nastale.
+# Sve izmene idu u bazu jednim bulk UPDATE-om, zajedno sa hešom i širinom slike (image_digest,
+# image_width) od kojih API pravi srcset bez čitanja fajlova.
+# Posle dodele se za nove i izmenjene slike prave umanjene AVIF/WebP verzije (app/images.py),
+# paralelno u više procesa, pa ih sajt ne pravi tek pri prvom prikazu.
 
-def get_image_files_sorted_by_creation_date(folder_path: str) -> list[str]:
-    image_files = []
-    allowed_extensions = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp']
 
-    print(f"Skeniram folder za slike: {folder_path}")
-    for ext in allowed_extensions:
-        for filepath in glob.glob(os.path.join(folder_path, ext)):
+def load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("files", {})
+
+
+def save_manifest(path: Path, files: dict):
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps({"files": files}, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    temporary.replace(path)  # Atomska zamena, prekid nikad ne ostavlja pola fajla
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_images(folder_path: Path, manifest: dict):
+    """
+    Trenutno stanje foldera: ime -> {size, mtime, hash, place_id}.
+    Heš se računa samo za nove i promenjene fajlove. Vraća (fajlovi, broj pročitanih fajlova).
+    """
+    files, hashed = {}, 0
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(ALLOWED_EXTENSIONS):
+                continue
             try:
-                modification_timestamp = os.path.getmtime(filepath)
-                image_files.append((filepath, modification_timestamp))
+                stat = entry.stat()
             except OSError as e:
-                print(f"  ⚠️ Upozorenje: Nije moguće dohvatiti informacije o fajlu '{filepath}': {e}")
+                print(f"  ⚠️ Upozorenje: Nije moguće dohvatiti informacije o fajlu '{entry.path}': {e}")
+                continue
 
-    image_files.sort(key=lambda x: x[1], reverse=False)
+            known = manifest.get(entry.name)
+            if known is not None and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+                files[entry.name] = dict(known)
+                continue
+            files[entry.name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns,
+                                 "hash": file_hash(entry.path), "place_id": None}
+            hashed += 1
+    return files, hashed
 
-    sorted_paths = [file_info[0] for file_info in image_files]
-    print(f"Pronađeno i sortirano {len(sorted_paths)} slika.")
-    return sorted_paths
 
+def image_url_for(name: str) -> str:
+    return DB_IMAGE_PREFIX + name
 
-def update_place_image_urls_in_db():
-    db_sess = db_session.create_session()
 
-    try:
-        sorted_image_paths = get_image_files_sorted_by_creation_date(IMAGE_BASE_PATH)
-
-        if not sorted_image_paths:
-            return {"status": "error", "message": "Nema pronađenih slika u navedenom folderu."}, 404
+def plan_assignments(files: dict, manifest: dict, places: dict, verbose: bool = False) -> dict:
+    """
+    Dodeljuje mesta slikama u `files` (menja ih) i vraća izmene baze: place_id -> novi image_url (ili None).
+    places: place_id -> trenutni image_url.
+    """
+    by_url = {url: place_id for place_id, url in places.items() if url}
+    current_urls = {image_url_for(name) for name in files}
+    # Mesta slika koje su nestale, po sadržaju, za prepoznavanje preimenovanih fajlova
+    gone = {entry["hash"]: entry["place_id"] for name, entry in manifest.items()
+            if name not in files and entry.get("place_id") is not None}
+
+    assigned = set()
+    for name, entry in files.items():
+        place_id = entry["place_id"]
+        if place_id is None or place_id not in places:
+            # Nova ili izmenjena slika: preimenovana (isti sadržaj), ili već upisana u bazu (prvo pokretanje)
+            place_id = gone.pop(entry["hash"], None)
+            if place_id is None:
+                place_id = by_url.get(image_url_for(name))
+        entry["place_id"] = place_id if place_id in places and place_id not in assigned else None
+        if entry["place_id"] is not None:
+            assigned.add(entry["place_id"])
+
+    # Preostale nove slike dobijaju mesta bez slike, kao i ranije: po redu ID-jeva i redom nastanka slika
+    free_places = iter(sorted(place_id for place_id, url in places.items()
+                              if place_id not in assigned
+                              and (not url or (url.startswith(DB_IMAGE_PREFIX) and url not in current_urls))))
+    for name in sorted((n for n, e in files.items() if e["place_id"] is None), key=lambda n: files[n]["mtime"]):
+        place_id = next(free_places, None)
+        if place_id is None:
+            print(f"  ⚠️ Upozorenje: Nema više mesta bez slike, '{name}' ostaje nedodeljena.")
+            break
+        files[name]["place_id"] = place_id
+        assigned.add(place_id)
+
+    changes = {}
+    for name, entry in files.items():
+        url = image_url_for(name)
+        if entry["place_id"] is not None and places[entry["place_id"]] != url:
+            changes[entry["place_id"]] = url
+    # Mesta čija slika više ne postoji
+    for place_id, url in places.items():
+        if url and url.startswith(DB_IMAGE_PREFIX) and url not in current_urls and place_id not in changes:
+            changes[place_id] = None
+
+    if verbose:
+        for place_id, url in sorted(changes.items()):
+            print(f"  Ažuriram Mesto ID: {place_id} sa URL-om: '{url}'")
+    return changes
+
+
+def make_derivatives(files: dict, workers: int) -> int:
+    """Umanjene verzije slika koje ih još nemaju (po manifestu), vraća broj napravljenih fajlova."""
+    version = images.PIPELINE_VERSION.decode()
+    pending = [name for name, entry in files.items() if entry.get("derivatives") != version]
+    if not pending or not images.formats():
+        return 0
+    print(f"Pravim umanjene verzije za {len(pending)} slika ({', '.join(images.formats())})...")
+    made, failed = images.generate_all([image_url_for(name) for name in pending], workers)
+    for name in pending:
+        if image_url_for(name) not in failed:
+            files[name]["derivatives"] = version
+    for source in sorted(failed):
+        print(f"  ⚠️ Upozorenje: Nije moguće napraviti umanjene verzije za '{source}'.")
+    return made
+
+
+def sync_place_images(db_file=DEFAULT_DB_FILE, manifest_file=DEFAULT_MANIFEST_FILE,
+                      folder_path=IMAGE_BASE_PATH, verbose=False, derivatives=True,
+                      workers=images.WORKERS) -> dict:
+    manifest = load_manifest(Path(manifest_file))
+    print(f"Skeniram folder za slike: {folder_path}")
+    files, hashed = scan_images(Path(folder_path), manifest)
+    print(f"Pronađeno {len(files)} slika, pročitano {hashed} novih ili izmenjenih.")
 
-        places = db_sess.query(Place).order_by(Place.id).all()
+    if hashed == 0 and files.keys() == manifest.keys():
+        if derivatives and make_derivatives(files, workers):
+            save_manifest(Path(manifest_file), files)
+        return {"status": "success", "message": "Nema izmena.", "updated": 0}
 
+    db_session.global_init(str(db_file))
+    db_sess = db_session.create_writer_session()
+    try:
+        places = dict(db_sess.query(Place.id, Place.image_url).all())
         if not places:
-            return {"status": "error", "message": "Nema pronađenih mesta u bazi podataka."}, 404
-
-        print(f"Pronađeno {len(places)} mesta u bazi podataka.")
-        updated_count = 0
-
-        for i, place in enumerate(places):
-            if i < len(sorted_image_paths):
-                full_image_path = sorted_image_paths[i]
-                filename = os.path.basename(full_image_path)
-                db_image_url = os.path.join(DB_IMAGE_PREFIX, filename).replace('\\', '/')
-
-                if place.image_url != db_image_url:
-                    place.image_url = db_image_url
-                    updated_count += 1
-                    print(f"  Ažuriram Mesto ID: {place.id}, Naziv: '{place.name}' sa URL-om: '{db_image_url}'")
-                else:
-                    print(f"  Mesto ID: {place.id}, Naziv: '{place.name}' već ima ispravan URL: '{db_image_url}'")
-            else:
-                print(
-                    f"  ⚠️ Upozorenje: Nema više slika za dodelu. Mesto ID: {place.id}, Naziv: '{place.name}' neće biti ažurirano.")
-                break
-
+            return {"status": "error", "message": "Nema pronađenih mesta u bazi podataka."}
+
+        changes = plan_assignments(files, manifest, places, verbose)
+        # Mesta čija je slika izmenjena pod istim imenom: isti URL, nov heš i širina
+        rewritten = {entry["place_id"]: image_url_for(name) for name, entry in files.items()
+                     if entry["place_id"] is not None and entry["place_id"] not in changes
+                     and manifest.get(name, {}).get("hash") != entry["hash"]}
+        if changes or rewritten:
+            # Jedan executemany UPDATE po primarnom ključu za sve izmene, sa hešom i širinom slike za srcset
+            db_sess.execute(update(Place), [{"id": place_id, "image_url": url, **image_columns(url)}
+                                            for place_id, url in {**changes, **rewritten}.items()])
         db_sess.commit()
+        if derivatives:
+            make_derivatives(files, workers)
+        save_manifest(Path(manifest_file), files)
         return {"status": "success",
-                "message": f"Uspešno ažurirano {updated_count} URL-ova slika u bazi podataka."}, 200
-
+                "message": f"Uspešno ažurirano {len(changes)} URL-ova slika u bazi podataka.",
+                "updated": len(changes)}
     except SQLAlchemyError as e:
         db_sess.rollback()
-        return {"status": "error", "message": f"Greška baze podataka: {str(e)}"}, 500
-    except Exception as e:
-        db_sess.rollback()
-        return {"status": "error", "message": f"Neočekivana greška: {str(e)}"}, 500
+        return {"status": "error", "message": f"Greška baze podataka: {str(e)}"}
     finally:
-        db_sess.close()
-
-
-@bp.route('/add_places', methods=['GET'])
-def add_places_route():
-    """
-    Ruta za ažuriranje URL-ova slika za mesta u bazi podataka.
-    Očekuje POST zahtev.
-    """
-    print("Primljen zahtev za /add_places rutu.")
-    response, status_code = update_place_image_urls_in_db()
-    return jsonify(response), status_code
+        db_session.remove_session()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Inkrementalna dodela slika iz static/uploads/places mestima u bazi.")
+    parser.add_argument("--db", default=str(DEFAULT_DB_FILE))
+    parser.add_argument("--manifest", default=str(DEFAULT_MANIFEST_FILE))
+    parser.add_argument("--folder", default=str(IMAGE_BASE_PATH))
+    parser.add_argument("--verbose", action="store_true", help="Ispisuje svaku izmenu")
+    parser.add_argument("--no-derivatives", dest="derivatives", action="store_false",
+                        help="Ne pravi umanjene AVIF/WebP verzije slika")
+    parser.add_argument("--workers", type=int, default=images.WORKERS, help="Broj procesa za pravljenje umanjenih verzija")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = sync_place_images(args.db, args.manifest, args.folder, args.verbose, args.derivatives, args.workers)
+    print(result["message"])
+    sys.exit(0 if result["status"] == "success" else 1)
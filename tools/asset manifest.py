@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Alat se pokreće iz korena projekta ili iz tools/
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from app import assets  # noqa: E402
+
+STATIC_DIR = ROOT_DIR / "static"
+
+# --- Manifest statičkih fajlova sa heš imenima ---
+#
+# Pokreće se pri izgradnji (build), posle "tools/compress static.py". Za svaki fajl iz
+# static/ (osim uploads/ i kompresovanih verzija) upisuje u static/manifest.json ime sa
+# hešom sadržaja, npr. "css/base.css": "css/base.1a2b3c4d5e6f.css". Server sa manifestom
+# ne računa heševe u radu, a url_for('static') daje imena iz manifesta (vidi app/assets.py).
+# Posle svake izmene u static/ alat se mora ponovo pokrenuti, inače server daje stara imena.
+# Tokom razvoja manifest ne treba praviti: bez njega se heševi računaju pri svakoj izmeni.
+
+
+def write_manifest(static_dir: Path = STATIC_DIR) -> dict:
+    manifest = assets.build_manifest(str(static_dir))
+    target = static_dir / assets.MANIFEST_FILE
+    temporary = target.with_suffix(".tmp")
+    temporary.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporary, target)  # Server nikad ne čita napola upisan manifest
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pravi static/manifest.json sa heš imenima statičkih fajlova.")
+    parser.add_argument("--static", default=str(STATIC_DIR), help="Folder sa statičkim fajlovima")
+    parser.add_argument("--remove", action="store_true", help="Briše manifest (povratak na računanje heševa u radu)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    static_dir = Path(args.static)
+    if args.remove:
+        (static_dir / assets.MANIFEST_FILE).unlink(missing_ok=True)
+        print("🗑️ Manifest je obrisan.")
+    else:
+        manifest = write_manifest(static_dir)
+        print(f"✅ Upisano {len(manifest)} fajlova u {static_dir / assets.MANIFEST_FILE}.")
@@ -0,0 +1,73 @@
+import argparse
+import gzip
+from pathlib import Path
+
+try:
+    import brotli  # Opciono: bez njega se pravi samo .gz
+except ImportError:
+    brotli = None
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+STATIC_DIR = ROOT_DIR / "static"
+COMPRESSED_FOLDERS = ("css", "js")
+COMPRESSED_EXTENSIONS = (".css", ".js")
+
+# --- Unapred kompresovani CSS i JS ---
+#
+# Pokreće se pri izgradnji (build), posle svake izmene u static/css i static/js.
+# Pored svakog fajla pravi .gz (gzip -9) i .br (brotli, najviši kvalitet) verziju, koje
+# server šalje umesto originala kada ih pregledač prihvata (vidi app/compression.py).
+# Pri izgradnji vreme nije bitno, pa se koristi najjača kompresija. Fajl čija je
+# kompresovana verzija novija od originala se preskače.
+
+
+def compress_file(path: Path, force: bool = False) -> list:
+    """Pravi .gz i .br pored fajla, vraća imena napravljenih fajlova."""
+    data = None
+    written = []
+    encoders = {".gz": lambda d: gzip.compress(d, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoders[".br"] = lambda d: brotli.compress(d, quality=11, mode=brotli.MODE_TEXT)
+
+    for extension, encode in encoders.items():
+        target = path.with_name(path.name + extension)
+        if not force and target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+            continue
+        if data is None:
+            data = path.read_bytes()
+        compressed = encode(data)
+        if len(compressed) >= len(data):
+            # Kompresija ne pomaže (vrlo mali fajl), server će poslati original
+            target.unlink(missing_ok=True)
+            continue
+        target.write_bytes(compressed)
+        written.append(target.name)
+    return written
+
+
+def compress_static(static_dir: Path = STATIC_DIR, force: bool = False) -> int:
+    count = 0
+    for folder in COMPRESSED_FOLDERS:
+        for path in sorted((static_dir / folder).rglob("*")):
+            if not path.is_file() or path.suffix not in COMPRESSED_EXTENSIONS:
+                continue
+            written = compress_file(path, force)
+            if written:
+                print(f"  🗜️ {path.relative_to(static_dir)} -> {', '.join(written)}")
+                count += len(written)
+    return count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pravi .gz i .br verzije CSS i JS fajlova iz static/.")
+    parser.add_argument("--static", default=str(STATIC_DIR), help="Folder sa statičkim fajlovima")
+    parser.add_argument("--force", action="store_true", help="Ponovo kompresuje i nepromenjene fajlove")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if brotli is None:
+        print("⚠️ Paket 'brotli' nije instaliran, prave se samo .gz fajlovi.")
+    total = compress_static(Path(args.static), args.force)
+    print(f"✅ Napravljeno {total} kompresovanih fajlova.")
@@ -1,13 +1,34 @@
-import requests
+import argparse
 import json
-import time
 import re  # Uvozimo modul za regularne izraze
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+
+# Alat se pokreće iz korena projekta ili iz tools/, transliteracija je ista kao u pretrazi
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from db.normalize import to_serbian_latin  # noqa: E402
 
 # --- Konfiguracija API-ja ---
 YOUR_API_BASE_URL = "http://127.0.0.1:5000/api"  # Baza URL vašeg API-ja
-YOUR_API_CREATE_PLACE_URL = f"{YOUR_API_BASE_URL}/places"
+YOUR_API_BULK_PLACES_URL = f"{YOUR_API_BASE_URL}/places/bulk"
 YOUR_API_CATEGORIES_URL = f"{YOUR_API_BASE_URL}/place_categories"
 
+# --- Konfiguracija geokodera i uvoza ---
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = "my-place-app-pure-requests"
+DEFAULT_RATE = 1.0  # Nominatim dozvoljava najviše jedan zahtev u sekundi
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 50  # Broj mesta po zahtevu ka /places/bulk
+TOOLS_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_FILE = TOOLS_DIR / "geocoder_cache.sqlite"
+DEFAULT_CHECKPOINT_FILE = TOOLS_DIR / "import_checkpoint.json"
+
 # --- Mapa OSM tagova na vaše kategorije ---
 OSM_CATEGORY_MAP = {
     # Hrana i piće
@@ -81,7 +102,7 @@ OSM_CATEGORY_MAP = {
     'default_category': 'Ostalo ',  # Sa razmakom na kraju, kao što je u vašoj bazi
 }
 
-# Keš za ID-jeve kategorija - popunjava se pozivom API-ja
+# Keš za ID-jeve kategorija - popunjava se iz checkpoint-a ili pozivom API-ja
 category_name_to_id_map = {}
 
 
@@ -114,230 +135,316 @@ def fetch_categories_from_api(api_url: str) -> dict:
         return {}
 
 
-# --- Funkcija za transliteraciju ćirilice u latinicu ---
-def to_serbian_latin(text: str) -> str:
+# --- Ograničavanje brzine zahteva ---
+class TokenBucket:
     """
-    Prebacuje srpsku ćirilicu u srpsku latinicu.
+    Najviše `rate` zahteva u sekundi, uz nalete do `capacity` zahteva.
+    Deli se između svih niti, svaka čeka na svoj token pre zahteva.
     """
-    if not isinstance(text, str):
-        return text
-
-    cyrillic_to_latin_map = {
-        'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Ђ': 'Đ', 'Е': 'E', 'Ж': 'Ž', 'З': 'Z', 'И': 'I',
-        'Ј': 'J', 'К': 'K', 'Л': 'L', 'Љ': 'Lj', 'М': 'M', 'Н': 'N', 'Њ': 'Nj', 'О': 'O', 'П': 'P', 'Р': 'R',
-        'С': 'S', 'Т': 'T', 'Ћ': 'Ć', 'У': 'U', 'Ф': 'F', 'Х': 'H', 'Ц': 'C', 'Ч': 'Č', 'Џ': 'Dž', 'Ш': 'Š',
-        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ђ': 'đ', 'е': 'e', 'ж': 'ž', 'з': 'z', 'и': 'i',
-        'ј': 'j', 'к': 'k', 'л': 'l', 'љ': 'lj', 'м': 'm', 'н': 'n', 'њ': 'nj', 'о': 'o', 'п': 'p', 'р': 'r',
-        'с': 's', 'т': 't', 'ћ': 'ć', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'č', 'џ': 'dž', 'ш': 'š'
-    }
-
-    latin_text = []
-    i = 0
-    while i < len(text):
-        char = text[i]
-
-        # Provera za 'Nj', 'Lj', 'Dž' kao celinu
-        if i + 1 < len(text):
-            two_chars = text[i:i + 2]
-            if two_chars == 'Њ' or two_chars == 'њ':
-                latin_text.append('Nj' if char == 'Њ' else 'nj')
-                i += 1  # Povećava se za 1, jer smo već obradili dva znaka kao jedan digraf
-            elif two_chars == 'Љ' or two_chars == 'љ':
-                latin_text.append('Lj' if char == 'Љ' else 'lj')
-                i += 1
-            elif two_chars == 'Џ' or two_chars == 'џ':
-                latin_text.append('Dž' if char == 'Џ' else 'dž')
-                i += 1
-            else:
-                latin_text.append(cyrillic_to_latin_map.get(char, char))
-        else:  # Samo jedan karakter preostao
-            latin_text.append(cyrillic_to_latin_map.get(char, char))
-        i += 1
-
-    return ''.join(latin_text)
-
-
-# --- Interakcija sa OpenStreetMap API-jem ---
-def get_place_details_from_osm_raw(place_name: str, city: str = "Zrenjanin", limit: int = 1) -> list:
-    base_url = "https://nominatim.openstreetmap.org/search"
-    headers = {
-        "User-Agent": "my-place-app-pure-requests"
-    }
-
-    params = {
-        "q": f"{place_name}, {city}",
-        "format": "json",
-        "limit": limit,
-        "addressdetails": 1,
-        "extratags": 1,
-        "namedetails": 1
-    }
-
-    request_url = requests.Request('GET', base_url, params=params).prepare().url
-    print(f"Zahtev ka OSM: {request_url}")
 
-    places_data = []  # Lista za čuvanje više mesta
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
 
-    try:
-        response = requests.get(base_url, params=params, headers=headers, timeout=10)
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# --- Geokoderi ---
+class NominatimGeocoder:
+    """
+    Nominatim /search, ili bilo koji server sa istim API-jem
+    (npr. lokalni stub za testove: --geocoder-url http://127.0.0.1:8080/search).
+    Svaki geokoder ima metodu search(query, limit) -> lista sirovih rezultata.
+    """
+
+    def __init__(self, base_url: str = NOMINATIM_URL, rate_limiter: TokenBucket = None, timeout: int = 10):
+        self.base_url = base_url
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self._local = threading.local()  # requests.Session po niti
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+            self._local.session.headers["User-Agent"] = USER_AGENT
+        return self._local.session
+
+    def search(self, query: str, limit: int) -> list:
+        params = {
+            "q": query,
+            "format": "json",
+            "limit": limit,
+            "addressdetails": 1,
+            "extratags": 1,
+            "namedetails": 1
+        }
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        print(f"Zahtev ka OSM: {query} ({limit})")
+        response = self._session().get(self.base_url, params=params, timeout=self.timeout)
         response.raise_for_status()
-        data = response.json()
-
-        if not data:
-            print(f"  ❌ Greška OSM: Mesto '{place_name}' nije pronađeno u '{city}'. Pokušajte da precizirate pretragu.")
-            return []
-
-        for osm_result in data:  # Preimenovano iz 'first_result' u 'osm_result' radi jasnoće
-            clean_name = place_name
-            if "address" in osm_result and "name" in osm_result["address"]:
-                clean_name = osm_result["address"]["name"]
-            elif "extratags" in osm_result and isinstance(osm_result["extratags"], dict) and "name" in \
-                    osm_result["extratags"]:
-                clean_name = osm_result["extratags"]["name"]
-            elif "osm_type" in osm_result and osm_result["osm_type"] == "node" and isinstance(osm_result.get("tags"),
-                                                                                              dict) and "name" in \
-                    osm_result["tags"]:
-                clean_name = osm_result["tags"]["name"]
-            else:
-                parts = osm_result.get("display_name", "").split(',')
-                if parts and parts[0].strip() != city:
-                    clean_name = parts[0].strip()
-
-            lat = osm_result.get("lat")
-            lon = osm_result.get("lon")
-
-            address_string_parts = []
-            if "address" in osm_result:
-                address_data = osm_result["address"]
-
-                street_info = []
-                if "road" in address_data:
-                    street_info.append(address_data["road"])
-                if "house_number" in address_data:
-                    street_info.append(address_data["house_number"])
-
-                if street_info:
-                    address_string_parts.append(" ".join(street_info))
-
-                district = None
-                if "suburb" in address_data:
-                    district = address_data["suburb"]
-                elif "city_district" in address_data:
-                    district = address_data["city_district"]
-                elif "village" in address_data and address_data["village"].lower() != city.lower():
-                    district = address_data["village"]
-
-                if district:
-                    address_string_parts.append(district)
-
-            address_string = ", ".join(address_string_parts) if address_string_parts else osm_result.get(
-                "display_name", "")
-
-            if not lat or not lon or not address_string_parts:
-                print(
-                    f"  ⚠️ Upozorenje OSM: Delimični podaci za '{clean_name}' (originalni upit: '{place_name}'). Proverite URL.")
-
-            # --- ODREĐIVANJE KATEGORIJE NA OSNOVU OSM TAGOVA ---
-            determined_category_name = OSM_CATEGORY_MAP['default_category']  # Podrazumevana vrednost
-
-            tags_to_check = {}
-            if isinstance(osm_result.get("extratags"), dict):
-                tags_to_check.update(osm_result["extratags"])
-            if isinstance(osm_result.get("tags"), dict):
-                tags_to_check.update(osm_result["tags"])
-
-            found_category = False
-            for osm_key, osm_value in tags_to_check.items():
-                if osm_value in OSM_CATEGORY_MAP:
-                    determined_category_name = OSM_CATEGORY_MAP[osm_value]
-                    found_category = True
-                    break
-                if osm_key in OSM_CATEGORY_MAP:
-                    determined_category_name = OSM_CATEGORY_MAP[osm_key]
-                    found_category = True
-                    break
+        return response.json()
 
-            if not found_category:
-                osm_class = osm_result.get("class")
-                osm_type = osm_result.get("type")
-
-                if osm_class in OSM_CATEGORY_MAP:
-                    determined_category_name = OSM_CATEGORY_MAP[osm_class]
-                elif osm_type in OSM_CATEGORY_MAP:
-                    determined_category_name = OSM_CATEGORY_MAP[osm_type]
-
-            # --- Prevod u srpsku latinicu i dohvat ID-a kategorije ---
-            final_name = to_serbian_latin(clean_name)
-            final_address = to_serbian_latin(address_string)
-
-            category_id_to_use = category_name_to_id_map.get(
-                to_serbian_latin(determined_category_name).strip(),
-                category_name_to_id_map.get(OSM_CATEGORY_MAP['default_category'].strip())
-            )
-            if category_id_to_use is None:
-                print(
-                    f"  ❌ Greška: ID za kategoriju '{determined_category_name.strip()}' ili podrazumevanu kategoriju 'Ostalo' nije pronađen u vašem API-ju. Preskačem mesto '{final_name}'.")
-                continue  # Preskoči ovo mesto i pređi na sledeće
-
-            places_data.append({
-                'id': None,
-                'name': final_name,
-                'description': None,
-                'position': f"{lat},{lon}" if lat and lon else None,
-                'address': final_address,
-                'category_id': category_id_to_use,
-                'image_url': None
-            })
-        return places_data
-    except requests.exceptions.HTTPError as e:
-        print(
-            f"  ❌ HTTP greška Nominatim: Status {e.response.status_code} za '{place_name}'. Odgovor: {e.response.text.strip()}")
-        return []
-    except requests.exceptions.ConnectionError as e:
-        print(
-            f"  ❌ Greška konekcije Nominatim: Nije moguće povezati se sa serverom za '{place_name}'. Proverite internet ili URL. {e}")
-        return []
-    except requests.exceptions.Timeout as e:
-        print(f"  ❌ Greška isteka vremena Nominatim: Zahtev ka OSM za '{place_name}' je predugo trajao. {e}")
-        return []
-    except requests.exceptions.RequestException as e:
-        print(f"  ❌ Opšta greška zahteva Nominatim za '{place_name}': {e}")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"  ❌ Greška parsiranja JSON-a od Nominatim-a za '{place_name}': Neispravan odgovor servera. {e}")
-        return []
-    except Exception as e:
-        print(f"  ❌ Nepredviđena greška prilikom obrade OSM podataka za '{place_name}': {e}")
+
+class GeocoderCache:
+    """Trajni keš odgovora geokodera na disku (SQLite fajl), ključ je upit sa limitom."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, fetched_at REAL)")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query: str, limit: int) -> str:
+        return json.dumps([query, limit], ensure_ascii=False)
+
+    def get(self, query: str, limit: int):
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (self._key(query, limit),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, query: str, limit: int, response: list):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                               (self._key(query, limit), json.dumps(response, ensure_ascii=False), time.time()))
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedGeocoder:
+    """Prvo gleda u keš; samo promašaji idu na mrežu (i čekaju na rate limiter)."""
+
+    def __init__(self, geocoder, cache: GeocoderCache):
+        self.geocoder = geocoder
+        self.cache = cache
+
+    def search(self, query: str, limit: int) -> list:
+        results = self.cache.get(query, limit)
+        if results is None:
+            results = self.geocoder.search(query, limit)
+            self.cache.set(query, limit, results)
+        return results
+
+
+# --- Checkpoint za nastavak prekinutog uvoza ---
+class Checkpoint:
+    """
+    Završeni upiti, već uvezeni OSM objekti i mapa kategorija, sačuvani posle svake serije.
+    Ponovno pokretanje preskače sve što je već uvezeno.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        data = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+        self.done_queries = set(data.get("done_queries", []))
+        self.seen_osm = set(data.get("seen_osm", []))
+        self.categories = data.get("categories", {})
+
+    def save(self):
+        data = {
+            "done_queries": sorted(self.done_queries),
+            "seen_osm": sorted(self.seen_osm),
+            "categories": self.categories,
+        }
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        temporary.replace(self.path)  # Atomska zamena, prekid nikad ne ostavlja pola fajla
+
+
+def query_key(place_name: str, limit: int, city: str) -> str:
+    return f"{place_name} ({limit}) @ {city}"
+
+
+# --- Obrada rezultata OpenStreetMap-a ---
+def places_from_osm_results(data: list, place_name: str, city: str = "Zrenjanin") -> list:
+    """Sirovi rezultati Nominatim-a -> podaci mesta za vaš API (sa 'osm_id' za prepoznavanje duplikata)."""
+    places_data = []  # Lista za čuvanje više mesta
+
+    if not data:
+        print(f"  ❌ Greška OSM: Mesto '{place_name}' nije pronađeno u '{city}'. Pokušajte da precizirate pretragu.")
         return []
 
+    for osm_result in data:  # Preimenovano iz 'first_result' u 'osm_result' radi jasnoće
+        clean_name = place_name
+        if "address" in osm_result and "name" in osm_result["address"]:
+            clean_name = osm_result["address"]["name"]
+        elif "extratags" in osm_result and isinstance(osm_result["extratags"], dict) and "name" in \
+                osm_result["extratags"]:
+            clean_name = osm_result["extratags"]["name"]
+        elif "osm_type" in osm_result and osm_result["osm_type"] == "node" and isinstance(osm_result.get("tags"),
+                                                                                          dict) and "name" in \
+                osm_result["tags"]:
+            clean_name = osm_result["tags"]["name"]
+        else:
+            parts = osm_result.get("display_name", "").split(',')
+            if parts and parts[0].strip() != city:
+                clean_name = parts[0].strip()
+
+        lat = osm_result.get("lat")
+        lon = osm_result.get("lon")
+
+        address_string_parts = []
+        if "address" in osm_result:
+            address_data = osm_result["address"]
+
+            street_info = []
+            if "road" in address_data:
+                street_info.append(address_data["road"])
+            if "house_number" in address_data:
+                street_info.append(address_data["house_number"])
+
+            if street_info:
+                address_string_parts.append(" ".join(street_info))
+
+            district = None
+            if "suburb" in address_data:
+                district = address_data["suburb"]
+            elif "city_district" in address_data:
+                district = address_data["city_district"]
+            elif "village" in address_data and address_data["village"].lower() != city.lower():
+                district = address_data["village"]
+
+            if district:
+                address_string_parts.append(district)
+
+        address_string = ", ".join(address_string_parts) if address_string_parts else osm_result.get(
+            "display_name", "")
+
+        if not lat or not lon or not address_string_parts:
+            print(
+                f"  ⚠️ Upozorenje OSM: Delimični podaci za '{clean_name}' (originalni upit: '{place_name}'). Proverite URL.")
+
+        # --- ODREĐIVANJE KATEGORIJE NA OSNOVU OSM TAGOVA ---
+        determined_category_name = OSM_CATEGORY_MAP['default_category']  # Podrazumevana vrednost
+
+        tags_to_check = {}
+        if isinstance(osm_result.get("extratags"), dict):
+            tags_to_check.update(osm_result["extratags"])
+        if isinstance(osm_result.get("tags"), dict):
+            tags_to_check.update(osm_result["tags"])
+
+        found_category = False
+        for osm_key, osm_value in tags_to_check.items():
+            if osm_value in OSM_CATEGORY_MAP:
+                determined_category_name = OSM_CATEGORY_MAP[osm_value]
+                found_category = True
+                break
+            if osm_key in OSM_CATEGORY_MAP:
+                determined_category_name = OSM_CATEGORY_MAP[osm_key]
+                found_category = True
+                break
 
-# --- Funkcija za slanje podataka API-ju ---
-def submit_place_to_api(place_data: dict) -> bool:
-    if not YOUR_API_CREATE_PLACE_URL:
-        print("Greška: Nije naveden URL za vaš API. Postavite YOUR_API_CREATE_PLACE_URL.")
-        return False
+        if not found_category:
+            osm_class = osm_result.get("class")
+            osm_type = osm_result.get("type")
+
+            if osm_class in OSM_CATEGORY_MAP:
+                determined_category_name = OSM_CATEGORY_MAP[osm_class]
+            elif osm_type in OSM_CATEGORY_MAP:
+                determined_category_name = OSM_CATEGORY_MAP[osm_type]
+
+        # --- Prevod u srpsku latinicu i dohvat ID-a kategorije ---
+        final_name = to_serbian_latin(clean_name)
+        final_address = to_serbian_latin(address_string)
+
+        category_id_to_use = category_name_to_id_map.get(
+            to_serbian_latin(determined_category_name).strip(),
+            category_name_to_id_map.get(OSM_CATEGORY_MAP['default_category'].strip())
+        )
+        if category_id_to_use is None:
+            print(
+                f"  ❌ Greška: ID za kategoriju '{determined_category_name.strip()}' ili podrazumevanu kategoriju 'Ostalo' nije pronađen u vašem API-ju. Preskačem mesto '{final_name}'.")
+            continue  # Preskoči ovo mesto i pređi na sledeće
+
+        places_data.append({
+            'osm_id': f"{osm_result.get('osm_type')}/{osm_result.get('osm_id')}",
+            'name': final_name,
+            'description': None,
+            'latitude': float(lat) if lat and lon else None,
+            'longitude': float(lon) if lat and lon else None,
+            'address': final_address,
+            'category_id': category_id_to_use,
+        })
+    return places_data
+
+
+# --- Slanje podataka API-ju u serijama ---
+class BulkWriter:
+    """
+    Skuplja mesta i šalje ih serijama na /api/places/bulk.
+    OSM objekat se beleži u checkpoint kao uvezen tek kada ga API prihvati, a upit kao
+    završen tek kada su prihvaćena sva njegova mesta; odbijena se ponavljaju pri sledećem pokretanju.
+    """
 
-    data_to_send = place_data.copy()
-    data_to_send.pop('id', None)
-    data_to_send.pop('image_url', None)
+    def __init__(self, api_url: str, checkpoint: Checkpoint, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.api_url = api_url
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.submitted = []
+        self._pending = []  # (ključ upita, mesta)
+        self._queued_osm = set()  # OSM objekti u seriji koja još nije poslata
+
+    def is_known(self, osm_id) -> bool:
+        """Da li je OSM objekat već uvezen ili već čeka u seriji (isto mesto iz dva upita)."""
+        return osm_id in self.checkpoint.seen_osm or osm_id in self._queued_osm
+
+    def add(self, key: str, places: list):
+        self._pending.append((key, places))
+        self._queued_osm.update(place['osm_id'] for place in places)
+        if sum(len(p) for _, p in self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        items = [(key, place) for key, places in self._pending for place in places]
+        failed_queries = set()
+        if items:
+            data_to_send = [{k: v for k, v in place.items() if k != 'osm_id'} for _, place in items]
+            print(f"Šaljem seriju od {len(items)} mesta u API...")
+            response = requests.post(self.api_url, json=data_to_send, timeout=60)
+            response.raise_for_status()
+
+            for (key, place), result in zip(items, response.json()["results"]):
+                if result["status"] == 201:
+                    self.submitted.append(place)
+                    self.checkpoint.seen_osm.add(place['osm_id'])
+                else:
+                    failed_queries.add(key)
+                    print(f"  ❌ API je odbio mesto '{place.get('name')}': {result.get('message')}")
 
-    print(
-        f"Pokušavam da pošaljem podatke u API: '{data_to_send.get('name')}' (kategorija ID: {data_to_send.get('category_id')})")
+        for key, _ in self._pending:
+            if key not in failed_queries:
+                self.checkpoint.done_queries.add(key)
+        self.checkpoint.save()
+        self._pending.clear()
+        self._queued_osm.clear()
 
-    try:
-        response = requests.post(YOUR_API_CREATE_PLACE_URL, json=data_to_send)
-        response.raise_for_status()
 
-        print(f"Uspešno kreirano mesto '{place_data.get('name')}'. Odgovor API-ja: {response.json()}")
-        return True
-    except requests.exceptions.HTTPError as e:
-        print(
-            f"  ❌ HTTP greška API: Prilikom slanja '{place_data.get('name')}'. Status: {e.response.status_code}. Odgovor: {e.response.text}")
-    except requests.exceptions.RequestException as e:
-        print(f"  ❌ Greška zahteva API-ja prilikom slanja '{place_data.get('name')}': {e}")
-    except Exception as e:
-        print(f"  ❌ Nepredviđena greška prilikom slanja '{place_data.get('name')}': {e}")
-    return False
+def load_categories(checkpoint: Checkpoint, api_url: str = YOUR_API_CATEGORIES_URL, refresh: bool = False) -> dict:
+    """Mapa kategorija iz checkpoint-a, a sa API-ja samo pri prvom pokretanju ili uz --refresh-categories."""
+    if checkpoint.categories and not refresh:
+        return checkpoint.categories
+    print(f"Pokušavam da dohvatim kategorije sa vašeg API-ja: {api_url}")
+    categories = fetch_categories_from_api(api_url)
+    if categories:
+        checkpoint.categories = categories
+        checkpoint.save()
+    return categories
 
 
 def parse_user_input(user_input: str) -> list[tuple[str, int]]:
@@ -384,30 +491,69 @@ def parse_user_input(user_input: str) -> list[tuple[str, int]]:
 def process_and_submit_places(
         search_items: list[tuple[str, int]],
         city: str,
+        geocoder,
+        writer: BulkWriter,
+        workers: int,
         all_places_data: list,
-        all_submitted_places: list,
         all_queries: list
 ) -> None:
     """
-    Procesira listu upita (naziv mesta, limit), dohvata podatke sa OSM-a
-    i šalje ih na vaš API.
+    Geokodira upite (naziv mesta, limit) paralelno, brzinu mrežnih zahteva ograničava
+    rate limiter geokodera. Nova mesta idu u BulkWriter redom kojim stižu rezultati.
+    Upiti završeni u ranijem pokretanju se preskaču.
     """
+    todo = []
     for item, limit_val in search_items:
-        query_display = f"{item} ({limit_val})" if limit_val > 1 else item
-        all_queries.append(query_display)
-
-        places_from_osm = get_place_details_from_osm_raw(item, city=city, limit=limit_val)
-        if places_from_osm:
-            for place_data in places_from_osm:
-                all_places_data.append(place_data)
-                if submit_place_to_api(place_data):
-                    all_submitted_places.append(place_data)
-                time.sleep(0.5)  # Mali prekid između slanja svakog mesta
+        all_queries.append(f"{item} ({limit_val})" if limit_val > 1 else item)
+        if query_key(item, limit_val, city) in writer.checkpoint.done_queries:
+            print(f"  ↷ Upit '{item}' je već uvezen, preskačem.")
+            continue
+        todo.append((item, limit_val))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(geocoder.search, f"{item}, {city}", limit_val): (item, limit_val)
+                   for item, limit_val in todo}
+        for future in as_completed(futures):
+            item, limit_val = futures[future]
+            try:
+                results = future.result()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # Upit ostaje nezavršen i ponavlja se pri sledećem pokretanju
+                print(f"  ❌ Greška Nominatim za '{item}': {e}")
+                continue
+
+            new_places, new_osm_ids = [], set()
+            for place_data in places_from_osm_results(results, item, city=city):
+                if writer.is_known(place_data['osm_id']) or place_data['osm_id'] in new_osm_ids:
+                    continue
+                new_osm_ids.add(place_data['osm_id'])
+                new_places.append(place_data)
+            all_places_data.extend(new_places)
+            writer.add(query_key(item, limit_val, city), new_places)
+
+    writer.flush()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Uvoz mesta iz OpenStreetMap-a (Nominatim) u vaš API.")
+    parser.add_argument("--input", help="Fajl sa upitima, jedan po redu (npr. 'kafe (3)'); bez njega se upiti unose ručno")
+    parser.add_argument("--city", default="Zrenjanin")
+    parser.add_argument("--api-url", default=YOUR_API_BASE_URL, help="Baza URL vašeg API-ja")
+    parser.add_argument("--geocoder-url", default=NOMINATIM_URL)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Najviše zahteva ka geokoderu u sekundi")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_FILE), help="Keš odgovora geokodera")
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT_FILE))
+    parser.add_argument("--refresh-categories", action="store_true")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    print(f"Pokušavam da dohvatim kategorije sa vašeg API-ja: {YOUR_API_CATEGORIES_URL}")
-    category_name_to_id_map = fetch_categories_from_api(YOUR_API_CATEGORIES_URL)
+    args = parse_args()
+    checkpoint = Checkpoint(args.checkpoint)
+    category_name_to_id_map = load_categories(checkpoint, f"{args.api_url}/place_categories",
+                                              args.refresh_categories)
 
     if not category_name_to_id_map:
         print("Fatalna greška: Nije moguće dohvatiti kategorije sa API-ja. Proverite URL i da li je API aktivan.")
@@ -418,38 +564,50 @@ if __name__ == "__main__":
             f"Upozorenje: Podrazumevana kategorija '{OSM_CATEGORY_MAP['default_category'].strip()}' nije pronađena u API-ju. ")
         print("Molimo dodajte je u vašu bazu podataka ili promenite 'default_category' u skripti.")
 
+    geocoder_cache = GeocoderCache(args.cache)
+    geocoder = CachedGeocoder(NominatimGeocoder(args.geocoder_url, TokenBucket(args.rate)), geocoder_cache)
+    writer = BulkWriter(f"{args.api_url}/places/bulk", checkpoint, args.batch_size)
+
     all_places_data = []
     all_queries = []
-    all_submitted_places = []
-
-    fixed_city = "Zrenjanin"
-
-    print(
-        f"Unesite naziv mesta ili listu mesta u {fixed_city} (npr. 'kafe (3)', 'muzej', ['park (2)', 'biblioteka']) ili 'stop' za završetak: ")
+    fixed_city = args.city
+
+    def run(search_items):
+        process_and_submit_places(search_items, fixed_city, geocoder, writer, args.workers,
+                                  all_places_data, all_queries)
+
+    if args.input:
+        search_items = []
+        for line in Path(args.input).read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                search_items.extend(parse_user_input(line.strip()))
+        run(search_items)
+    else:
+        print(
+            f"Unesite naziv mesta ili listu mesta u {fixed_city} (npr. 'kafe (3)', 'muzej', ['park (2)', 'biblioteka']) ili 'stop' za završetak: ")
 
-    first_input = input().strip()
+        first_input = input().strip()
 
-    # Procesirajte prvi unos
-    parsed_first_input = parse_user_input(first_input)
-    process_and_submit_places(parsed_first_input, fixed_city, all_places_data, all_submitted_places, all_queries)
+        # Procesirajte prvi unos
+        run(parse_user_input(first_input))
 
-    # Nastavite sa unosom dok korisnik ne unese 'stop'
-    if not (first_input.lower() == 'stop' or (first_input.startswith('[') and first_input.endswith(']'))):
-        while True:
-            user_input = input(
-                f"Unesite sledeći naziv mesta u {fixed_city} (npr. 'muzej (2)') ili 'stop' za završetak: ").strip()
-            if user_input.lower() == 'stop':
-                break
+        # Nastavite sa unosom dok korisnik ne unese 'stop'
+        if not (first_input.lower() == 'stop' or (first_input.startswith('[') and first_input.endswith(']'))):
+            while True:
+                user_input = input(
+                    f"Unesite sledeći naziv mesta u {fixed_city} (npr. 'muzej (2)') ili 'stop' za završetak: ").strip()
+                if user_input.lower() == 'stop':
+                    break
+                run(parse_user_input(user_input))
 
-            parsed_input = parse_user_input(user_input)
-            process_and_submit_places(parsed_input, fixed_city, all_places_data, all_submitted_places, all_queries)
+    geocoder_cache.close()
 
     print("\n--- Svi prikupljeni podaci o mestima (iz OSM) ---")
     for place in all_places_data:
         print(place)
 
     print("\n--- Mesta uspešno poslata u API ---")
-    for place in all_submitted_places:
+    for place in writer.submitted:
         print(place)
 
     print("\n--- Svi korisnički upiti ---")